@@ -0,0 +1,209 @@
+import asyncio
+import functools
+import inspect
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers import asgi
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections
+from whitenoise import middleware as whitenoise
+
+try:
+    from asgiref.sync import markcoroutinefunction
+except ImportError:
+    # asgiref < 3.6, the same fallbacks as its own
+    if hasattr(inspect, 'markcoroutinefunction'):
+        markcoroutinefunction = inspect.markcoroutinefunction
+    else:
+        def markcoroutinefunction(func):
+            func._is_coroutine = asyncio.coroutines._is_coroutine
+            return func
+
+
+executors = {}
+executors_lock = threading.Lock()
+
+
+def get_read_executor():
+    """Return threads of the current process running async views, created
+    after a fork of a worker.
+    """
+
+    pid = os.getpid()
+    with executors_lock:
+        if pid not in executors:
+            executors[pid] = ThreadPoolExecutor(
+                max_workers=settings.AUCTION_ASYNC_READ_THREADS,
+                thread_name_prefix='async-read')
+        return executors[pid]
+
+
+def run_view(view, request, *args, **kwargs):
+    """Call a view and render its response in the current thread. Return
+    database connections of the thread to the pool afterwards.
+    """
+
+    try:
+        response = view(request, *args, **kwargs)
+        if callable(getattr(response, 'render', None)):
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def read_part(parts):
+    """Return the next part of a streaming response, or `None` after the
+    last one. Return database connections of the thread to the pool
+    afterwards.
+    """
+
+    try:
+        return next(parts, None)
+    finally:
+        close_old_connections()
+
+
+def async_read_view(view):
+    """Return an async view of a sync one. Requests of an ASGI server run
+    in the threads of `get_read_executor`, shared by requests of the
+    worker, so the event loop serves other requests while views wait for
+    the database, and concurrent views are bounded by the number of threads
+    instead of a thread per request. Under WSGI the view runs in the
+    request's thread.
+    """
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if isinstance(request, ASGIRequest):
+            return await sync_to_async(run_view, thread_sensitive=False,
+                executor=get_read_executor())(view, request, *args, **kwargs)
+        return await sync_to_async(view)(request, *args, **kwargs)
+
+    return wrapper
+
+
+class AsyncReadMixin:
+    """Mixin for read heavy views and view sets served by `async_read_view`
+    (Django 4.0 has neither async class-based views nor an async ORM, so
+    views run in threads off the event loop).
+    """
+
+    @classmethod
+    def as_view(cls, *args, **initkwargs):
+        return async_read_view(super().as_view(*args, **initkwargs))
+
+
+class AsyncCapableMiddleware:
+    """Base of middleware passing requests in the mode of the handler: by
+    `call` under WSGI and by the `__acall__` coroutine under ASGI, so an
+    async request doesn't switch to a thread to pass the middleware.
+    Under ASGI, hooks named by `async_hooks` (e.g. `process_view`) are
+    replaced by their coroutines prefixed by `a`, which Django awaits in
+    the event loop too.
+    """
+
+    sync_capable = True
+    async_capable = True
+    async_hooks = ()
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            # awaited by Django like a coroutine function
+            markcoroutinefunction(self)
+            for hook in self.async_hooks:
+                setattr(self, hook, getattr(self, f'a{hook}'))
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self.call(request)
+
+    def call(self, request):
+        raise NotImplementedError
+
+    async def __acall__(self, request):
+        raise NotImplementedError
+
+
+class WhiteNoiseMiddleware(AsyncCapableMiddleware,
+                           whitenoise.WhiteNoiseMiddleware):
+    """WhiteNoise's middleware passing requests of other files than static
+    ones in the mode of the handler (WhiteNoise 6.0 middleware is sync
+    only).
+    """
+
+    def __init__(self, get_response=None, settings=settings):
+        whitenoise.WhiteNoiseMiddleware.__init__(self, get_response, settings)
+        AsyncCapableMiddleware.__init__(self, get_response)
+
+    def call(self, request):
+        return whitenoise.WhiteNoiseMiddleware.__call__(self, request)
+
+    async def __acall__(self, request):
+        response = self.process_request(request)
+        if response is None:
+            response = await self.get_response(request)
+        return response
+
+
+class ASGIHandler(asgi.ASGIHandler):
+    """Django's ASGI handler running requests in a bounded number of
+    threads of a worker.
+    Sync views run in the threads of `get_read_executor` like views of
+    `async_read_view`, and so do reads of parts of streaming responses:
+    Django 4.0 iterates them in the event loop, where queries raise
+    `SynchronousOnlyOperation`. A part may be read in any of the threads,
+    so streams of query sets read each part by a query of its own (see
+    `auctions_api.mixins.RelatedListMixin`).
+    Short thread sensitive calls of Django (request signals, hooks of its
+    middleware) run in a thread shared by requests instead of a thread per
+    request, so all middleware must be async capable (see
+    `AsyncCapableMiddleware`): a sync only one would hold the shared
+    thread for whole requests.
+    """
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            raise ValueError('Django can only handle ASGI/HTTP connections, '
+                f'not {scope["type"]}.')
+        await self.handle(scope, receive, send)
+
+    def make_view_atomic(self, view):
+        view = super().make_view_atomic(view)
+        if asyncio.iscoroutinefunction(view):
+            return view
+        return async_read_view(view)
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            return await super().send_response(response, send)
+
+        headers = []
+        for header, value in response.items():
+            if isinstance(header, str):
+                header = header.encode('ascii')
+            if isinstance(value, str):
+                value = value.encode('latin1')
+            headers.append((bytes(header), bytes(value)))
+        for cookie in response.cookies.values():
+            headers.append((b'Set-Cookie',
+                cookie.output(header='').encode('ascii').strip()))
+        await send({'type': 'http.response.start',
+            'status': response.status_code, 'headers': headers})
+
+        parts = iter(response)
+        read = sync_to_async(read_part, thread_sensitive=False,
+            executor=get_read_executor())
+        while (part := await read(parts)) is not None:
+            for chunk, _ in self.chunk_bytes(part):
+                await send({'type': 'http.response.body', 'body': chunk,
+                    'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+        await sync_to_async(response.close, thread_sensitive=True)()
@@ -0,0 +1,51 @@
+from django.db.backends.postgresql import base, creation
+
+from .pool import close_pools, get_pool
+
+
+DEFAULT_POOL_OPTIONS = {
+    'MAX_SIZE': 10,
+    'TIMEOUT': 10,
+    'MAX_IDLE': 300,
+    'MAX_LIFETIME': 3600,
+    'CHECK_AFTER': 1,
+}
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # pooled connections to the test database would block dropping it
+        close_pools()
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """A PostgreSQL backend pooling connections in each worker process.
+    Django opens a connection per thread, and with `CONN_MAX_AGE`
+    connections of finished threads (e.g. of requests of ASGI workers) stay
+    open and stale ones fail requests after a failover. Here connections
+    are taken from a `ConnectionPool` and returned to it when Django closes
+    them, so with `CONN_MAX_AGE` 0 they're returned at the end of a request.
+    Options of the pool are set by the `POOL` key of database settings.
+    """
+
+    creation_class = DatabaseCreation
+
+    def get_pool(self, conn_params):
+        return get_pool(conn_params, {**DEFAULT_POOL_OPTIONS,
+            **self.settings_dict.get('POOL', {})})
+
+    def get_new_connection(self, conn_params):
+        connection = self.get_pool(conn_params).getconn(
+            lambda: super(DatabaseWrapper, self).get_new_connection(
+                conn_params))
+        self.isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level', connection.isolation_level)
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.get_pool(self.get_connection_params()).putconn(
+                    self.connection)
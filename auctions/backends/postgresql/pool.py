@@ -0,0 +1,167 @@
+import os
+import threading
+from time import monotonic, perf_counter
+
+import psycopg2
+from psycopg2 import extensions
+
+from auctions.metrics import count_pool_connection, observe_pool_checkout
+
+
+class ConnectionPool:
+    """Connections of a worker process to a database, shared by its
+    threads. At most `MAX_SIZE` connections are checked out, others wait up
+    to `TIMEOUT` seconds. Returned connections are rolled back and reused
+    last in, first out; a connection is closed once it's idle for
+    `MAX_IDLE` or open for `MAX_LIFETIME` seconds, and checked by `SELECT 1`
+    before reuse if it's idle for `CHECK_AFTER` seconds, so connections
+    broken by a failover are replaced instead of failing requests.
+    """
+
+    def __init__(self, options):
+        self.options = options
+        self.slots = threading.BoundedSemaphore(options['MAX_SIZE'])
+        self.lock = threading.Lock()
+        # `(connection, returned)` pairs, the last returned last
+        self.idle = []
+        self.opened = {}
+
+    def getconn(self, connect):
+        """Return an idle connection or one opened by `connect()`."""
+
+        started = perf_counter()
+        if not self.slots.acquire(timeout=self.options['TIMEOUT']):
+            count_pool_connection('timeout')
+            raise psycopg2.OperationalError('No database connection was '
+                f'returned to the pool in {self.options["TIMEOUT"]}s.')
+        observe_pool_checkout(perf_counter() - started)
+
+        try:
+            while True:
+                with self.lock:
+                    if not self.idle:
+                        break
+                    connection, returned = self.idle.pop()
+                reason = self.get_close_reason(connection, returned)
+                if reason is None:
+                    return connection
+                self.close(connection, reason)
+
+            connection = connect()
+            self.opened[id(connection)] = monotonic()
+            count_pool_connection('opened')
+            return connection
+        except BaseException:
+            self.slots.release()
+            raise
+
+    def putconn(self, connection):
+        """Return a connection to the pool."""
+
+        try:
+            reason = self.reset(connection)
+            if reason is not None:
+                self.close(connection, reason)
+                return
+
+            now = monotonic()
+            with self.lock:
+                self.idle.append((connection, now))
+                expired = []
+                while self.idle and \
+                        now - self.idle[0][1] > self.options['MAX_IDLE']:
+                    expired.append(self.idle.pop(0)[0])
+            for connection in expired:
+                self.close(connection, 'idle')
+        finally:
+            self.slots.release()
+
+    def reset(self, connection):
+        """Roll back a returned connection. Return a reason to close it, if
+        it can't be reused.
+        """
+
+        if connection.closed:
+            return 'broken'
+        status = connection.info.transaction_status
+        if status == extensions.TRANSACTION_STATUS_IDLE:
+            return None
+        if status not in (extensions.TRANSACTION_STATUS_INTRANS,
+                extensions.TRANSACTION_STATUS_INERROR):
+            return 'broken'
+        try:
+            connection.rollback()
+        except psycopg2.Error:
+            return 'broken'
+        return None
+
+    def get_close_reason(self, connection, returned):
+        """Return a reason to close an idle connection instead of reusing
+        it, otherwise `None`.
+        """
+
+        now = monotonic()
+        if connection.closed:
+            return 'broken'
+        if now - self.opened[id(connection)] > self.options['MAX_LIFETIME']:
+            return 'lifetime'
+        if now - returned > self.options['MAX_IDLE']:
+            return 'idle'
+        if now - returned > self.options['CHECK_AFTER'] and \
+                not self.is_usable(connection):
+            return 'broken'
+        return None
+
+    def is_usable(self, connection):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            if not connection.autocommit:
+                connection.rollback()
+        except psycopg2.Error:
+            return False
+        return True
+
+    def close(self, connection, reason):
+        self.opened.pop(id(connection), None)
+        count_pool_connection('closed', reason)
+        try:
+            connection.close()
+        except psycopg2.Error:
+            pass
+
+    def close_all(self):
+        """Close idle connections."""
+
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for connection, _ in idle:
+            self.close(connection, 'idle')
+
+
+pools = {}
+pools_lock = threading.Lock()
+
+
+def get_pool(conn_params, options):
+    """Return the pool of connection parameters in the current process.
+    Pools of a parent process aren't reused after a fork (e.g. by gunicorn
+    with `--preload`).
+    """
+
+    key = (os.getpid(), tuple(sorted(
+        (name, str(value)) for name, value in conn_params.items())))
+    with pools_lock:
+        if key not in pools:
+            pools[key] = ConnectionPool(options)
+        return pools[key]
+
+
+def close_pools():
+    """Close idle connections of all pools of the current process."""
+
+    with pools_lock:
+        current = [pool for (pid, _), pool in pools.items()
+            if pid == os.getpid()]
+    for pool in current:
+        pool.close_all()
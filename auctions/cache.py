@@ -0,0 +1,173 @@
+import time
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from .instrumentation import record_cache
+from .routers import read_database
+
+
+LISTINGS_VERSION_KEY = 'auctions:version:listings'
+LISTING_VERSION_KEY = 'auctions:version:listing:{slug}'
+BUMPED_KEY = 'auctions:version_bumped:{key}'
+PAGE_KEY = 'auctions:page:{name}:{versions}:{digest}'
+STATS_KEY = 'auctions:page_cache:{stat}'
+
+
+def incr(key, delta=1):
+    """Atomically increment a counter kept in the cache without expiry."""
+
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        return cache.incr(key, delta)
+
+
+def get_replica_lag_window():
+    """Return seconds a replica read may lag behind the primary: the most
+    lag of a healthy replica and the interval of lag checks (see
+    `AUCTION_DB_ROUTING`), `None` without replicas.
+    """
+
+    options = settings.AUCTION_DB_ROUTING
+    if not options['REPLICAS']:
+        return None
+    return options['MAX_LAG'] + options['CHECK_INTERVAL']
+
+
+def get_versions(keys):
+    """Return values of version keys. A missing (new or evicted) version
+    starts from the current time, so a version is never reused.
+    Return `None` if the request reads from a replica and a version was
+    bumped within the replica's lag window: data read for the version may
+    be older than the bump, so it mustn't be cached or validated by it.
+    """
+
+    bumped = [BUMPED_KEY.format(key=key) for key in keys] \
+        if read_database.get() is not None else []
+    versions = cache.get_many(keys + bumped)
+    if any(key in versions for key in bumped):
+        return None
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_version(key):
+    """Increment a version key. With replicas, the bump is remembered for
+    the replica lag window (see `get_versions`).
+    """
+
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+    window = get_replica_lag_window()
+    if window:
+        cache.set(BUMPED_KEY.format(key=key), True, window)
+
+
+def invalidate_listings():
+    """Bump the version of all listing pages. Stale pages are never read
+    again and expire.
+    """
+
+    bump_version(LISTINGS_VERSION_KEY)
+
+
+def invalidate_listing(slug):
+    """Bump the version of a listing's detail page."""
+
+    bump_version(LISTING_VERSION_KEY.format(slug=slug))
+
+
+def get_page_cache_stats():
+    """Return page cache `hits` and `misses` counters."""
+
+    keys = {STATS_KEY.format(stat=stat): stat for stat in ('hits', 'misses')}
+    values = cache.get_many(keys)
+    return {stat: values.get(key, 0) for key, stat in keys.items()}
+
+
+class AnonymousPageCacheMixin:
+    """Mixin for views that render public pages. Cache whole `GET`
+    responses for anonymous users keyed on the path, the whitelisted query
+    parameters, and version keys bumped by writes (see `signals`).
+    Validators of cached pages (`ETag`, `Last-Modified`) are cached with
+    them and answer conditional requests. Pages read from a replica that
+    may lag behind a bump of their versions aren't cached.
+    """
+
+    cached_headers = ('Content-Type', 'Cache-Control', 'ETag',
+        'Last-Modified')
+
+    cache_timeout = 60
+    cache_query_params = ('bid_filter', 'lst_sort', 'page', 'cursor')
+
+    def get_cache_version_keys(self):
+        """Return version keys the page depends on."""
+
+        return [LISTINGS_VERSION_KEY]
+
+    def get_page_cache_key(self):
+        """Return a cache key of the requested page, or `None` if the page
+        can't be cached (see `get_versions`).
+        """
+
+        versions = get_versions(self.get_cache_version_keys())
+        if versions is None:
+            return None
+        versions = '.'.join(map(str, versions))
+        params = '&'.join(f'{param}={self.request.GET.get(param)}'
+            for param in self.cache_query_params
+            if param in self.request.GET)
+        digest = md5(f'{self.request.path}?{params}'.encode(),
+            usedforsecurity=False).hexdigest()
+        return PAGE_KEY.format(name=type(self).__name__, versions=versions,
+            digest=digest)
+
+    def dispatch(self, request, *args, **kwargs):
+        """Return a cached page for anonymous `GET` requests, or render and
+        cache it.
+        """
+
+        if request.method != 'GET' or request.user.is_authenticated:
+            return super().dispatch(request, *args, **kwargs)
+
+        key = self.get_page_cache_key()
+        if key is None:
+            return super().dispatch(request, *args, **kwargs)
+        cached = cache.get(key)
+        record_cache(hit=cached is not None)
+        if cached is not None:
+            incr(STATS_KEY.format(stat='hits'))
+            content, headers = cached
+            response = HttpResponse(content, headers=headers)
+            return get_conditional_response(request,
+                etag=headers.get('ETag'),
+                last_modified=parse_http_date_safe(
+                    headers.get('Last-Modified')),
+                response=response) or response
+
+        incr(STATS_KEY.format(stat='misses'))
+        response = super().dispatch(request, *args, **kwargs)
+
+        def cache_response(response):
+            if response.status_code == 200 and not response.cookies:
+                headers = {header: response[header]
+                    for header in self.cached_headers if header in response}
+                cache.set(key, (response.content, headers),
+                    self.cache_timeout)
+
+        if hasattr(response, 'add_post_render_callback'):
+            response.add_post_render_callback(cache_response)
+        else:
+            cache_response(response)
+        return response
@@ -0,0 +1,77 @@
+from hashlib import md5
+
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+    quote_etag)
+from django.utils.http import http_date
+
+
+def make_etag(*parts):
+    """Return a quoted ETag of parts the response depends on."""
+
+    digest = md5('|'.join(map(str, parts)).encode(), usedforsecurity=False)
+    return quote_etag(digest.hexdigest())
+
+
+def get_last_modified(*dates):
+    """Return the latest of dates, ignoring missing ones."""
+
+    return max((date for date in dates if date is not None), default=None)
+
+
+def get_listing_validators(listing, *parts):
+    """Return an ETag and a last modified date of a listing annotated by
+    comment stats (see `ListingQuerySet.with_comment_stats`), from its own,
+    bid and comment update dates and counts. `parts` are added to the ETag.
+    """
+
+    etag = make_etag(listing.pk, listing.date_updated, listing.last_bid_at,
+        listing.bid_count, listing.comments_updated, listing.comment_count,
+        *parts)
+    return etag, get_last_modified(listing.date_updated, listing.last_bid_at,
+        listing.comments_updated)
+
+
+def get_not_modified_response(request, etag, last_modified):
+    """Return a `304 Not Modified` (or `412`) response if the request's
+    conditions match the validators, otherwise `None`.
+    """
+
+    if last_modified is not None:
+        last_modified = int(last_modified.timestamp())
+    return get_conditional_response(request, etag=etag,
+        last_modified=last_modified)
+
+
+def set_validators(response, etag, last_modified):
+    """Set validators on a response and make clients revalidate it."""
+
+    if etag and not response.has_header('ETag'):
+        response['ETag'] = etag
+    if last_modified and not response.has_header('Last-Modified'):
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+class ConditionalPageMixin:
+    """Mixin for views that answer conditional `GET` requests. Validators
+    returned by `get_validators` are computed before rendering, a matching
+    request gets `304 Not Modified` without rendering the page.
+    """
+
+    def get_validators(self):
+        """Return an ETag and a last modified date (either can be `None`)."""
+
+        return None, None
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+
+        etag, last_modified = self.get_validators()
+        response = get_not_modified_response(request, etag, last_modified)
+        if response is None:
+            response = super().dispatch(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        return set_validators(response, etag, last_modified)
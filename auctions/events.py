@@ -0,0 +1,246 @@
+import asyncio
+import json
+import logging
+import re
+import threading
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from functools import lru_cache
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+LISTING_CHANNEL = 'auctions:events:listing:{slug}'
+
+
+class InProcessBroker:
+    """Broadcast messages to subscribers of the current process. Suitable
+    for development, tests and a single worker.
+    """
+
+    def __init__(self, **options):
+        self.subscribers = defaultdict(set)
+        self.lock = threading.Lock()
+
+    def publish(self, channel, message):
+        """Publish a message to a channel. Safe to call from any thread."""
+
+        with self.lock:
+            subscribers = list(self.subscribers.get(channel, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, message)
+            except RuntimeError:
+                # the subscriber's loop is closed
+                pass
+
+    @asynccontextmanager
+    async def subscribe(self, channel):
+        """Subscribe to a channel. Yield a subscription whose `get`
+        coroutine returns the next message.
+        """
+
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue())
+        with self.lock:
+            self.subscribers[channel].add(subscriber)
+        try:
+            yield subscriber[1]
+        finally:
+            with self.lock:
+                self.subscribers[channel].discard(subscriber)
+                if not self.subscribers[channel]:
+                    del self.subscribers[channel]
+
+
+class RedisSubscription:
+    """A subscription to a Redis pub/sub channel."""
+
+    def __init__(self, pubsub):
+        self.pubsub = pubsub
+
+    async def get(self):
+        """Return the next message of the channel."""
+
+        while True:
+            message = await self.pubsub.get_message(
+                ignore_subscribe_messages=True, timeout=None)
+            if message is not None:
+                return message['data'].decode()
+
+
+class RedisBroker:
+    """Broadcast messages through Redis pub/sub, so subscribers of every
+    worker receive them.
+    """
+
+    def __init__(self, location, **options):
+        import redis
+
+        self.location = location
+        self.client = redis.Redis.from_url(location)
+
+    def publish(self, channel, message):
+        """Publish a message to a channel."""
+
+        self.client.publish(channel, message)
+
+    @asynccontextmanager
+    async def subscribe(self, channel):
+        """Subscribe to a channel. Yield a `RedisSubscription`."""
+
+        from redis import asyncio as aioredis
+
+        client = aioredis.Redis.from_url(self.location)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(channel)
+        try:
+            yield RedisSubscription(pubsub)
+        finally:
+            await pubsub.unsubscribe(channel)
+            await pubsub.close()
+            await client.close()
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    """Return the broker configured by the `AUCTION_EVENTS` setting."""
+
+    options = dict(settings.AUCTION_EVENTS)
+    backend = import_string(options.pop('BACKEND'))
+    return backend(**{key.lower(): value for key, value in options.items()})
+
+
+def publish_listing_event(slug, event, data):
+    """Publish an event to subscribers of a listing. Delivery is best
+    effort: a broker failure is logged and doesn't fail the caller.
+    """
+
+    message = json.dumps({'event': event, 'data': data},
+        cls=DjangoJSONEncoder)
+    try:
+        get_broker().publish(LISTING_CHANNEL.format(slug=slug), message)
+    except Exception:
+        logger.exception('Failed to publish %s event of %s.', event, slug)
+
+
+def get_listing_state(listing):
+    """Return public bid data of a listing sent to subscribers."""
+
+    return {
+        'is_active': listing.is_active,
+        'current_bid': listing.current_bid,
+        'bid_count': listing.bid_count,
+        'last_bid_at': listing.last_bid_at,
+    }
+
+
+class ListingEventsApplication:
+    """ASGI application streaming listing events as Server-Sent Events
+    from `/<cat_slug>/<listing_slug>/events`. Other requests are passed to
+    the wrapped application.
+    Events: `listing` (the state on connect), `bid` and `closed`.
+    """
+
+    path_regex = re.compile(r'^/(?P<cat_slug>[-\w]+)/(?P<listing_slug>[-\w]+)/events$')
+    keepalive_interval = 15
+
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        match = None
+        if scope['type'] == 'http' and scope['method'] == 'GET':
+            match = self.path_regex.match(scope['path'])
+        if match is None:
+            return await self.application(scope, receive, send)
+
+        await self.stream(receive, send, **match.groupdict())
+
+    def get_listing(self, cat_slug, listing_slug):
+        """Return a listing by its slugs, or `None`. It's read outside of
+        Django's request cycle, so unusable connections of the thread are
+        closed before, and connections are returned to the pool after, like
+        a request does.
+        """
+
+        from .models import Listing
+
+        close_old_connections()
+        try:
+            return Listing.objects.filter(slug=listing_slug,
+                category__slug=cat_slug).only(*Listing.BID_STATS_FIELDS,
+                'is_active').first()
+        finally:
+            close_old_connections()
+
+    async def send_event(self, send, event, data):
+        """Send an event to the client."""
+
+        body = f'event: {event}\ndata: {data}\n\n'
+        await send({'type': 'http.response.body', 'body': body.encode(),
+            'more_body': True})
+
+    async def wait_disconnect(self, receive):
+        """Return when the client disconnects."""
+
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    async def stream(self, receive, send, cat_slug, listing_slug):
+        """Send the listing state, then its events until the listing
+        closes or the client disconnects.
+        """
+
+        channel = LISTING_CHANNEL.format(slug=listing_slug)
+        # subscribe before reading the state, so no event is missed
+        async with get_broker().subscribe(channel) as subscription:
+            listing = await sync_to_async(self.get_listing)(
+                cat_slug, listing_slug)
+            if listing is None:
+                await send({'type': 'http.response.start', 'status': 404,
+                    'headers': [(b'content-type', b'text/plain')]})
+                await send({'type': 'http.response.body', 'body': b'Not Found'})
+                return
+
+            await send({'type': 'http.response.start', 'status': 200,
+                'headers': [
+                    (b'content-type', b'text/event-stream'),
+                    (b'cache-control', b'no-cache'),
+                    (b'x-accel-buffering', b'no'),
+                ]})
+            state = get_listing_state(listing)
+            await self.send_event(send, 'listing',
+                json.dumps(state, cls=DjangoJSONEncoder))
+
+            disconnect = asyncio.ensure_future(self.wait_disconnect(receive))
+            message = asyncio.ensure_future(subscription.get())
+            try:
+                while state['is_active']:
+                    done, _ = await asyncio.wait({disconnect, message},
+                        timeout=self.keepalive_interval,
+                        return_when=asyncio.FIRST_COMPLETED)
+                    if disconnect in done:
+                        return
+                    if message not in done:
+                        await send({'type': 'http.response.body',
+                            'body': b': keepalive\n\n', 'more_body': True})
+                        continue
+
+                    event = json.loads(message.result())
+                    await self.send_event(send, event['event'],
+                        json.dumps(event['data']))
+                    if event['event'] == 'closed':
+                        state['is_active'] = False
+                    else:
+                        message = asyncio.ensure_future(subscription.get())
+            finally:
+                disconnect.cancel()
+                message.cancel()
+
+            await send({'type': 'http.response.body', 'body': b''})
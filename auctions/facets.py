@@ -0,0 +1,99 @@
+from decimal import Decimal
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+
+FACETS_KEY = 'auctions:facets:{digest}'
+FACETS_HITS_KEY = 'auctions:facets:hits:{digest}'
+
+CENT = Decimal('0.01')
+
+
+def get_price_buckets():
+    """Return `(min, max)` prices of buckets split by the edges of
+    `PRICE_BUCKETS`, `None` for an open end. Prices have cents, so a bucket
+    ends a cent below the next one and refines results by
+    `min_price`/`max_price` as they are.
+    """
+
+    edges = [Decimal(edge).quantize(CENT)
+        for edge in settings.AUCTION_SEARCH_FACETS['PRICE_BUCKETS']]
+    return [(low, None if high is None else high - CENT)
+        for low, high in zip([None, *edges], [*edges, None])]
+
+
+def get_price_filter(low, high):
+    """Return a filter of listings by `current_bid` in a price bucket."""
+
+    condition = Q()
+    if low is not None:
+        condition &= Q(current_bid__gte=low)
+    if high is not None:
+        condition &= Q(current_bid__lte=high)
+    return condition or None
+
+
+def compute_facets(queryset):
+    """Return the number of listings of a query set, counts per category
+    and a histogram of `current_bid` by price buckets. Counted by a single
+    query grouped by category, buckets are conditional counts summed over
+    the categories.
+    """
+
+    buckets = get_price_buckets()
+    rows = queryset.order_by().values('category', 'category__name',
+        'category__slug').annotate(count=Count('pk'), **{
+            f'price_{num}': Count('pk', filter=get_price_filter(*bucket))
+            for num, bucket in enumerate(buckets)})
+
+    categories, prices = [], [0] * len(buckets)
+    for row in rows:
+        categories.append({'id': row['category'],
+            'name': row['category__name'], 'slug': row['category__slug'],
+            'count': row['count']})
+        for num in range(len(buckets)):
+            prices[num] += row[f'price_{num}']
+    categories.sort(key=lambda item: (-item['count'], item['name']))
+
+    return {
+        'count': sum(item['count'] for item in categories),
+        'categories': categories,
+        'prices': [{
+            'min': None if low is None else str(low),
+            'max': None if high is None else str(high),
+            'count': count,
+        } for (low, high), count in zip(buckets, prices)],
+    }
+
+
+def get_facets(queryset):
+    """Return facets of a query set (see `compute_facets`). Facets of
+    popular queries, requested `POPULAR_HITS` times within
+    `CACHE_TIMEOUT`, are cached for `CACHE_TIMEOUT` keyed on the SQL of the
+    query, so counts may lag behind writes by that long.
+    """
+
+    options = settings.AUCTION_SEARCH_FACETS
+    sql, params = queryset.order_by().query.sql_with_params()
+    digest = md5(f'{sql}{params!r}'.encode(),
+        usedforsecurity=False).hexdigest()
+
+    key = FACETS_KEY.format(digest=digest)
+    facets = cache.get(key)
+    if facets is not None:
+        return facets
+
+    hits_key = FACETS_HITS_KEY.format(digest=digest)
+    cache.add(hits_key, 0, options['CACHE_TIMEOUT'])
+    try:
+        hits = cache.incr(hits_key)
+    except ValueError:
+        hits = 1
+
+    facets = compute_facets(queryset)
+    if hits >= options['POPULAR_HITS']:
+        cache.set(key, facets, options['CACHE_TIMEOUT'])
+    return facets
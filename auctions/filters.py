@@ -0,0 +1,77 @@
+import re
+
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+    TrigramWordSimilarity)
+from django.db.models import F, Q
+
+
+SEARCH_CONFIG = 'english'
+
+LISTING_ORDERINGS = {
+    '-date_added': ('-date_added', '-id'),
+    'date_added': ('date_added', 'id'),
+    '-current_bid': ('-current_bid', '-id'),
+    'current_bid': ('current_bid', 'id'),
+    'ends_at': ('ends_at', 'id'),
+    'name': ('name', 'id'),
+}
+
+# orderings scanned by an index of listings (`ends_at` is indexed for
+# active listings only), any other one sorts the whole filtered set
+INDEXED_LISTING_ORDERINGS = ('-date_added', 'date_added', '-current_bid',
+    'current_bid', 'ends_at')
+ACTIVE_LISTING_ORDERINGS = ('ends_at',)
+
+
+def filter_listings(query, category=None, user=None, is_active=None,
+        has_bids=None, min_price=None, max_price=None):
+    """Filter a listing query set by the given filters, `None` ones are
+    skipped. Prices are compared with the denormalized `current_bid`.
+    """
+
+    filters = {}
+    if category is not None:
+        filters['category'] = category
+    if user is not None:
+        filters['user'] = user
+    if is_active is not None:
+        filters['is_active'] = is_active
+    if has_bids is not None:
+        filters['max_bid__isnull'] = not has_bids
+    if min_price is not None:
+        filters['current_bid__gte'] = min_price
+    if max_price is not None:
+        filters['current_bid__lte'] = max_price
+    return query.filter(**filters)
+
+
+def order_listings(query, ordering):
+    """Order a listing query set by a name of `LISTING_ORDERINGS`, the
+    primary key breaks ties (read by keyset pagination).
+    """
+
+    return query.order_by(*LISTING_ORDERINGS[ordering])
+
+
+def search_listings(query, search_request, ranked=True):
+    """Filter a listing query set by a search request over the stored
+    `search_vector` (prefix matching of each word) or by trigram word
+    similarity to the listing name (typo tolerance). Annotate `rank` and
+    order by it if `ranked`.
+    """
+
+    words = re.findall(r'\w+', search_request)
+    search_query = SearchQuery(' & '.join(f'{word}:*' for word in words),
+        config=SEARCH_CONFIG, search_type='raw')
+    matches = Q(name__trigram_word_similar=search_request)
+    if words:
+        matches |= Q(search_vector=search_query)
+
+    query = query.filter(matches).annotate(
+        rank=SearchRank(F('search_vector'), search_query)
+            + TrigramWordSimilarity(search_request, 'name'))
+
+    if ranked:
+        query = query.order_by('-rank', '-date_added')
+
+    return query
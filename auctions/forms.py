@@ -1,5 +1,6 @@
 from django import forms
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from .models import Listing, Bid, Comment
@@ -8,7 +9,7 @@ from .models import Listing, Bid, Comment
 class ListingForm(forms.ModelForm):
     """A listing form.
     Contains fields: `category`, `name`, `image`, `start_bid`,
-    and `description`.
+    `ends_at`, and `description`.
     """
 
     class Meta:
@@ -16,13 +17,26 @@ class ListingForm(forms.ModelForm):
         fields = (
             'category', 'name',
             'image', 'start_bid',
-            'description'
+            'ends_at', 'description'
         )
         labels = {
             'name': 'Listing name', 'category': 'Category',
             'description': 'Description', 'start_bid': 'Start bid',
-            'image': 'Image URL'
+            'image': 'Image URL', 'ends_at': 'Auction ends at'
         }
+        widgets = {
+            'ends_at': forms.DateTimeInput(attrs={'type': 'datetime-local'},
+                format='%Y-%m-%dT%H:%M')
+        }
+
+    def clean_ends_at(self):
+        """Validate that an auction ends in the future."""
+
+        ends_at = self.cleaned_data.get('ends_at')
+        if ends_at and ends_at <= timezone.now():
+            raise ValidationError(_('Auction must end in the future.'),
+                code='invalid')
+        return ends_at
 
 class BidForm(forms.ModelForm):
     """A bid form.
@@ -36,15 +50,13 @@ class BidForm(forms.ModelForm):
         widgets = {'listing': forms.HiddenInput()}
 
     def clean(self):
-        """Validate a new bid."""
+        """Validate a new bid against the listing's current bid. The final
+        check is made by `place_bid` under a lock of the listing.
+        """
 
         new_bid = self.cleaned_data.get('bid')
         listing = self.cleaned_data.get('listing')
-        start_bid = listing.start_bid
-        bids = listing.bid_set.order_by('-date_added')
-        current_bid = bids[0].bid if bids else start_bid
-
-        if new_bid <= current_bid:
+        if new_bid <= listing.current_bid:
             self._errors['bid'] = self.error_class([
                 'Bid must be higher than current.'])
             raise ValidationError(
@@ -63,3 +75,14 @@ class CommentForm(forms.ModelForm):
         model = Comment
         fields = ('text',)
         labels = {'text': 'Comment'}
+
+class SearchFilterForm(forms.Form):
+    """A form of search refinements by facets (see `auctions.facets`).
+    Contains fields: `category`, `min_price`, `max_price`.
+    """
+
+    category = forms.IntegerField(required=False)
+    min_price = forms.DecimalField(max_digits=19, decimal_places=2,
+        min_value=0, required=False)
+    max_price = forms.DecimalField(max_digits=19, decimal_places=2,
+        min_value=0, required=False)
@@ -0,0 +1,214 @@
+import json
+import logging
+import random
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from .async_views import AsyncCapableMiddleware
+
+
+logger = logging.getLogger(__name__)
+
+# metrics of the sampled request being handled, `None` otherwise
+request_metrics = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Costs of a request: SQL queries with their durations, timings of
+    stages (`render`, `serialize`) in seconds, and counters (`cache_hits`,
+    `cache_misses`). Up to `max_statements` statements are kept to report
+    requests over budget.
+    """
+
+    max_statements = 500
+
+    def __init__(self):
+        self.started = perf_counter()
+        self.queries = 0
+        self.sql_time = 0
+        self.statements = []
+        self.timings = defaultdict(float)
+        self.counters = Counter()
+
+    def add_query(self, sql, duration):
+        self.queries += 1
+        self.sql_time += duration
+        if len(self.statements) < self.max_statements:
+            self.statements.append((sql, duration))
+
+    def add_time(self, stage, duration):
+        self.timings[stage] += duration
+
+    def incr(self, counter):
+        self.counters[counter] += 1
+
+    def get_summary(self):
+        """Return metrics of the request with durations in milliseconds."""
+
+        summary = {
+            'total_ms': round((perf_counter() - self.started) * 1000, 2),
+            'queries': self.queries,
+            'sql_ms': round(self.sql_time * 1000, 2),
+        }
+        for stage, duration in self.timings.items():
+            summary[f'{stage}_ms'] = round(duration * 1000, 2)
+        summary.update(self.counters)
+        return summary
+
+    def get_offending_sql(self, limit=5):
+        """Return the slowest statements and the most repeated ones (N+1
+        queries), parameters aren't included.
+        """
+
+        slowest = sorted(self.statements, key=lambda item: -item[1])[:limit]
+        repeated = Counter(sql for sql, _ in self.statements).most_common(
+            limit)
+        return {
+            'slowest': [{'sql': sql, 'ms': round(duration * 1000, 2)}
+                for sql, duration in slowest],
+            'repeated': [{'sql': sql, 'count': count}
+                for sql, count in repeated if count > 1],
+        }
+
+
+def get_request_metrics():
+    """Return metrics of the current request if it's sampled, otherwise
+    `None`.
+    """
+
+    return request_metrics.get()
+
+
+def record_cache(hit):
+    """Count a cache hit or miss of the current request."""
+
+    metrics = request_metrics.get()
+    if metrics is not None:
+        metrics.incr('cache_hits' if hit else 'cache_misses')
+
+
+def record_sql(execute, sql, params, many, context):
+    """A database execute wrapper timing queries of sampled requests."""
+
+    metrics = request_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add_query(sql, perf_counter() - started)
+
+
+def install_sql_wrapper(connection, **kwargs):
+    if record_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_sql)
+
+
+class RequestMetricsMiddleware(AsyncCapableMiddleware):
+    """Measure a sample of requests: SQL queries and their time, template
+    render time, serializer time (see `auctions_api.serializers`) and cache
+    hits and misses. Metrics are sent in a `Server-Timing` header and logged
+    as a JSON line; requests over the query or time budget are logged as
+    warnings with their slowest and repeated SQL.
+    Options are set by the `AUCTION_REQUEST_METRICS` setting:
+    `SAMPLE_RATE`, `QUERY_BUDGET`, `TIME_BUDGET` (ms) and `HEADER`.
+    Place it first in `MIDDLEWARE`, so rendering is timed last.
+    """
+
+    async_hooks = ('process_template_response',)
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        for connection in connections.all():
+            install_sql_wrapper(connection)
+        connection_created.connect(install_sql_wrapper)
+
+    def call(self, request):
+        options = settings.AUCTION_REQUEST_METRICS
+        if random.random() >= options['SAMPLE_RATE']:
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = request_metrics.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_metrics.reset(token)
+        return self.report(request, response, metrics, options)
+
+    async def __acall__(self, request):
+        options = settings.AUCTION_REQUEST_METRICS
+        if random.random() >= options['SAMPLE_RATE']:
+            return await self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = request_metrics.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            request_metrics.reset(token)
+        return self.report(request, response, metrics, options)
+
+    def report(self, request, response, metrics, options):
+        """Send and log metrics of a request, return the response."""
+
+        summary = metrics.get_summary()
+        if options['HEADER']:
+            response['Server-Timing'] = self.get_server_timing(summary)
+        self.log(request, response, metrics, summary, options)
+        return response
+
+    def time_render(self, response):
+        """Time rendering of a template response, done after all
+        middleware. Return the response.
+        """
+
+        metrics = request_metrics.get()
+        if metrics is not None:
+            started = perf_counter()
+            response.add_post_render_callback(lambda response:
+                metrics.add_time('render', perf_counter() - started))
+        return response
+
+    def process_template_response(self, request, response):
+        return self.time_render(response)
+
+    # replaces `process_template_response` under ASGI, so it doesn't call it
+    async def aprocess_template_response(self, request, response):
+        return self.time_render(response)
+
+    def get_server_timing(self, summary):
+        """Return a `Server-Timing` header value of metrics."""
+
+        timings = [f'db;dur={summary["sql_ms"]};'
+            f'desc="{summary["queries"]} queries"']
+        for stage in ('render', 'serialize'):
+            if f'{stage}_ms' in summary:
+                timings.append(f'{stage};dur={summary[f"{stage}_ms"]}')
+        if 'cache_hits' in summary or 'cache_misses' in summary:
+            timings.append(f'cache;desc="{summary.get("cache_hits", 0)} hits '
+                f'{summary.get("cache_misses", 0)} misses"')
+        timings.append(f'total;dur={summary["total_ms"]}')
+        return ', '.join(timings)
+
+    def log(self, request, response, metrics, summary, options):
+        """Log metrics of a request, as a warning if it's over budget."""
+
+        record = {'method': request.method, 'path': request.path,
+            'status': response.status_code, **summary}
+        over_budget = summary['queries'] > options['QUERY_BUDGET'] \
+            or summary['total_ms'] > options['TIME_BUDGET']
+        if not over_budget:
+            logger.info(json.dumps(record))
+            return
+
+        record['over_budget'] = True
+        record['sql'] = metrics.get_offending_sql()
+        logger.warning(json.dumps(record))
@@ -0,0 +1,143 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from .load_test import compare
+
+
+READ_MIX = ('index=20,search=10,detail=40,api_listings=15,api_listing=10,'
+    'api_bids=5')
+
+SERVERS = {
+    'wsgi': ['commerce.wsgi:application'],
+    'asgi': ['commerce.asgi:application', '-k',
+        'uvicorn.workers.UvicornWorker'],
+}
+
+
+def count_worker_threads(pid):
+    """Return the most threads of a worker process of a gunicorn master
+    (Linux only), or `None` if they can't be read.
+    """
+
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as file:
+            workers = file.read().split()
+        return max((len(os.listdir(f'/proc/{worker}/task'))
+            for worker in workers), default=None)
+    except OSError:
+        return None
+
+
+class ThreadSampler(threading.Thread):
+    """Sample threads of workers of a gunicorn master until stopped, and
+    keep the peak.
+    """
+
+    interval = 0.1
+
+    def __init__(self, pid):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.peak = None
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            count = count_worker_threads(self.pid)
+            if count is not None:
+                self.peak = max(self.peak or 0, count)
+
+
+class Command(BaseCommand):
+    """Benchmark read traffic of the sync WSGI deployment against the ASGI
+    one with async read views (see `auctions.async_views`): start each
+    server by gunicorn with the same number of workers, run `load_test`
+    with a read mix at high concurrency, and compare throughput and tail
+    latency of the ASGI server to the WSGI one. The peak number of threads
+    of a worker is reported too, an ASGI worker runs at most
+    `AUCTION_ASYNC_READ_THREADS` threads of views.
+    """
+
+    help = 'Compare read throughput and latency of WSGI and ASGI servers.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4,
+            help='Number of gunicorn workers of each server.')
+        parser.add_argument('--port', type=int, default=8100)
+        parser.add_argument('--concurrency', type=int, default=200)
+        parser.add_argument('--duration', type=float, default=30)
+        parser.add_argument('--warmup', type=float, default=5)
+        parser.add_argument('--mix', default=READ_MIX)
+        parser.add_argument('--threshold', type=float, default=0.1,
+            help='Share of a change reported as a regression.')
+
+    def wait_ready(self, server, url, timeout=30):
+        """Wait until the server answers, fail if it exits."""
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(
+                    f'The server exited with {server.returncode}.')
+            try:
+                requests.get(url, timeout=1)
+                return
+            except requests.RequestException:
+                time.sleep(0.2)
+        raise CommandError(f'The server at {url} did not start in {timeout}s.')
+
+    def run_server(self, name, options, output):
+        """Start a server, load test it and store results to `output`.
+        Return the peak number of threads of a worker.
+        """
+
+        bind = f'127.0.0.1:{options["port"]}'
+        url = f'http://{bind}'
+        server = subprocess.Popen([sys.executable, '-m', 'gunicorn',
+            *SERVERS[name], '--workers', str(options['workers']),
+            '--bind', bind, '--log-level', 'warning'],
+            env={**os.environ, 'METRICS_SAMPLE_RATE': '0'})
+        sampler = ThreadSampler(server.pid)
+        try:
+            self.wait_ready(server, url)
+            self.stdout.write(self.style.MIGRATE_HEADING(name.upper()))
+            sampler.start()
+            call_command('load_test', url=url, mix=options['mix'],
+                concurrency=options['concurrency'],
+                duration=options['duration'], warmup=options['warmup'],
+                output=output, stdout=self.stdout)
+        finally:
+            sampler.stopped.set()
+            server.terminate()
+            server.wait()
+        return sampler.peak
+
+    def handle(self, *args, **options):
+        results, threads = {}, {}
+        with tempfile.TemporaryDirectory() as directory:
+            for name in SERVERS:
+                output = os.path.join(directory, f'{name}.json')
+                threads[name] = self.run_server(name, options, output)
+                with open(output) as file:
+                    results[name] = json.load(file)
+
+        self.stdout.write(self.style.MIGRATE_HEADING('ASGI compared to WSGI'))
+        for name, stat, base, current, change, regressed in compare(
+                results['asgi'], results['wsgi'], options['threshold']):
+            line = (f'{name:<14}{stat:>5}: {base:>10.1f} -> {current:>10.1f}'
+                f' ({change:+.1%})')
+            self.stdout.write(self.style.ERROR(line + ' regression')
+                if regressed else line)
+
+        for name, peak in threads.items():
+            self.stdout.write(f'{name.upper()} peak threads per worker: '
+                f'{"unknown" if peak is None else peak}')
@@ -0,0 +1,77 @@
+import threading
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.utils import load_backend
+
+from auctions.backends.postgresql.pool import close_pools
+from .load_test import percentile
+
+
+BACKENDS = {
+    'direct': 'django.db.backends.postgresql',
+    'pooled': 'auctions.backends.postgresql',
+}
+
+
+class Command(BaseCommand):
+    """Benchmark the connection overhead of a request: opening a
+    connection, a `SELECT 1` and closing it at the end of the request, with
+    a connection per request (`CONN_MAX_AGE` 0 of the stock backend)
+    against pooled connections. Threads simulate concurrent requests of a
+    worker, each with its own connection like Django's.
+    """
+
+    help = 'Benchmark database connection overhead per request.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000,
+            help='Number of requests per thread.')
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument('--database', default='default')
+
+    def run_requests(self, engine, count, timings):
+        settings_dict = {**settings.DATABASES[self.alias], 'ENGINE': engine,
+            'CONN_MAX_AGE': 0}
+        wrapper = load_backend(engine).DatabaseWrapper(settings_dict,
+            self.alias)
+        for _ in range(count):
+            started = perf_counter()
+            with wrapper.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            wrapper.close()
+            timings.append((perf_counter() - started) * 1000)
+
+    def benchmark(self, engine, options):
+        """Run requests in threads. Return sorted timings in milliseconds
+        and the elapsed time in seconds.
+        """
+
+        timings = []
+        threads = [threading.Thread(target=self.run_requests,
+            args=(engine, options['requests'], timings))
+            for _ in range(options['threads'])]
+        started = perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return sorted(timings), perf_counter() - started
+
+    def handle(self, *args, **options):
+        self.alias = options['database']
+        if self.alias not in settings.DATABASES:
+            raise CommandError(f'Unknown database {self.alias!r}.')
+
+        self.stdout.write(f'{options["threads"]} threads, '
+            f'{options["requests"]} requests each, ms per request:')
+        self.stdout.write(f'{"backend":>8}{"mean":>10}{"p50":>10}{"p95":>10}'
+            f'{"p99":>10}{"req/s":>10}')
+        for label, engine in BACKENDS.items():
+            timings, elapsed = self.benchmark(engine, options)
+            self.stdout.write(f'{label:>8}{sum(timings) / len(timings):>10.3f}'
+                + ''.join(f'{percentile(timings, percent):>10.3f}'
+                    for percent in (50, 95, 99))
+                + f'{len(timings) / elapsed:>10.0f}')
+        close_pools()
@@ -0,0 +1,94 @@
+from statistics import median
+from time import perf_counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import RequestFactory, override_settings
+
+from auctions.facets import (compute_facets, get_facets, get_price_buckets,
+    get_price_filter)
+from auctions.models import Category, Listing
+from auctions.views import SearchView
+from .benchmark_search import Command as SearchCommand
+
+
+SPREAD_SQL = """
+UPDATE auctions_listing
+SET category_id = (%(categories)s::int[])[1 + id %% %(num)s]
+WHERE slug LIKE 'bench-%%'
+"""
+
+
+class Command(SearchCommand):
+    """Benchmark facets of search results on the listings of
+    `benchmark_search` spread over categories: a count per category and
+    per price bucket against `compute_facets`' single grouped query, and
+    facets of a popular query read from the cache by `get_facets`.
+    """
+
+    help = 'Benchmark facets of listing search results.'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--categories', type=int, default=20,
+            help='Categories to spread the benchmark listings over.')
+
+    def spread(self, num):
+        """Spread the benchmark listings over `num` categories."""
+
+        categories = [Category.objects.get_or_create(
+            slug=f'benchmark-{index}',
+            defaults={'name': f'Benchmark {index}'})[0].pk
+            for index in range(num)]
+        if not Listing.objects.filter(slug__startswith='bench-',
+                category__slug='benchmark').exists():
+            return
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(SPREAD_SQL, {'categories': categories,
+                'num': num})
+            cursor.execute('ANALYZE auctions_listing')
+        self.stdout.write(f'Spread listings over {num} categories.')
+
+    def count_facets(self, query):
+        """Count facets by a query per category and per price bucket."""
+
+        query = query.order_by()
+        categories = query.values_list('category', flat=True).distinct()
+        return ([query.filter(category=category).count()
+                for category in categories],
+            [query.filter(get_price_filter(*bucket)).count()
+                for bucket in get_price_buckets()])
+
+    def time(self, func, query, repeat):
+        """Return the median and the maximum milliseconds of calls."""
+
+        timings = []
+        for _ in range(repeat):
+            start = perf_counter()
+            func(query)
+            timings.append((perf_counter() - start) * 1000)
+        return median(timings), max(timings)
+
+    def handle(self, *args, **options):
+        self.populate(options['listings'], options['batch_size'])
+        self.spread(options['categories'])
+        queries = options['queries'] or ['vintage camera', 'guitar', 'vint']
+
+        self.stdout.write(f'{Listing.objects.count()} listings, '
+            f'{options["repeat"]} runs per query, median / max ms:')
+        for search_request in queries:
+            view = SearchView()
+            view.setup(RequestFactory().get('/search/', {'q': search_request}))
+            query = view.get_queryset()
+
+            cache.clear()
+            with override_settings(AUCTION_SEARCH_FACETS={
+                    **settings.AUCTION_SEARCH_FACETS, 'POPULAR_HITS': 1}):
+                for label, func in (('per facet', self.count_facets),
+                        ('grouped', compute_facets), ('cached', get_facets)):
+                    med, top = self.time(func, query, options['repeat'])
+                    self.stdout.write(
+                        f'{search_request!r:>18} {label:>10}: '
+                        f'{med:9.2f} / {top:9.2f}')
@@ -0,0 +1,118 @@
+from statistics import median
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVector
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+
+from auctions.models import Category, Listing
+from auctions.views import SearchView
+
+
+User = get_user_model()
+
+WORDS = (
+    'vintage', 'camera', 'guitar', 'acoustic', 'lamp', 'antique', 'chair',
+    'leather', 'watch', 'golden', 'silver', 'ring', 'bicycle', 'road',
+    'vinyl', 'record', 'poster', 'signed', 'painting', 'oil', 'table',
+    'wooden', 'phone', 'retro', 'console', 'game', 'book', 'first',
+    'edition', 'coin', 'rare', 'stamp', 'jacket', 'denim', 'boots', 'mirror',
+)
+
+POPULATE_SQL = """
+INSERT INTO auctions_listing (category_id, user_id, name, slug, description,
+    start_bid, image, is_active, date_added, date_updated, current_bid,
+    bid_count)
+SELECT %(category)s, %(user)s, name, 'bench-' || g, description,
+    start_bid, '', true, now() - g * interval '1 second', now(), start_bid, 0
+FROM (
+    SELECT g,
+        w[1 + floor(random() * n)::int] || ' ' ||
+            w[1 + floor(random() * n)::int] AS name,
+        w[1 + floor(random() * n)::int] || ' ' ||
+            w[1 + floor(random() * n)::int] || ' ' ||
+            w[1 + floor(random() * n)::int] || ' in good condition.'
+            AS description,
+        (1 + floor(random() * 1000))::numeric AS start_bid
+    FROM generate_series(%(start)s, %(stop)s) AS g,
+        (SELECT %(words)s::text[] AS w, %(word_num)s AS n) AS words
+) AS rows
+"""
+
+
+class Command(BaseCommand):
+    """Benchmark the listing search: the former on-the-fly `SearchVector`
+    query against `SearchView`'s ranked query over the stored vector.
+    """
+
+    help = 'Benchmark listing search latency.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--listings', type=int, default=1_000_000,
+            help='Populate the listings table up to this number of rows.')
+        parser.add_argument('--batch-size', type=int, default=100_000)
+        parser.add_argument('--repeat', type=int, default=10)
+        parser.add_argument('--query', action='append', dest='queries',
+            help='A search request to benchmark (repeatable).')
+
+    def populate(self, count, batch_size):
+        """Insert synthetic listings until the table has `count` rows."""
+
+        existing = Listing.objects.count()
+        if existing >= count:
+            return
+
+        category, _ = Category.objects.get_or_create(
+            slug='benchmark', defaults={'name': 'Benchmark'})
+        user, _ = User.objects.get_or_create(username='benchmark')
+
+        for start in range(existing, count, batch_size):
+            stop = min(start + batch_size, count)
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute('SELECT setseed(%s)', [start / count])
+                cursor.execute(POPULATE_SQL, {
+                    'category': category.pk, 'user': user.pk,
+                    'start': start + 1, 'stop': stop,
+                    'words': list(WORDS), 'word_num': len(WORDS),
+                })
+            self.stdout.write(f'Populated {stop}/{count} listings.')
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE auctions_listing')
+
+    def time_page(self, query, repeat):
+        """Time a search results page: a count and the first 15 rows.
+        Return the median and the maximum in milliseconds.
+        """
+
+        timings = []
+        for _ in range(repeat):
+            start = perf_counter()
+            query.count()
+            list(query[:15])
+            timings.append((perf_counter() - start) * 1000)
+        return median(timings), max(timings)
+
+    def handle(self, *args, **options):
+        self.populate(options['listings'], options['batch_size'])
+        queries = options['queries'] or ['vintage camera', 'guitar', 'vint',
+            'camra']
+
+        self.stdout.write(f'{Listing.objects.count()} listings, '
+            f'{options["repeat"]} runs per query, median / max ms:')
+        for search_request in queries:
+            legacy = Listing.objects.annotate(search=SearchVector(
+                'name', 'description', 'user__username'
+            )).filter(search=search_request).order_by('-date_added')
+
+            view = SearchView()
+            view.setup(RequestFactory().get('/search/', {'q': search_request}))
+
+            for label, query in (('on-the-fly', legacy),
+                    ('stored', view.get_queryset())):
+                med, top = self.time_page(query, options['repeat'])
+                self.stdout.write(
+                    f'{search_request!r:>18} {label:>10}: '
+                    f'{med:9.2f} / {top:9.2f}')
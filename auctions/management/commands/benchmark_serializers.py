@@ -0,0 +1,81 @@
+import tracemalloc
+from statistics import median
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from auctions.models import Listing, Bid, Comment
+from auctions_api.renderers import ORJSONRenderer
+from auctions_api.serializers import (BidSerializer, CommentSerializer,
+    ListingSerializer, ValuesSerializer)
+
+
+SERIALIZERS = {
+    'bids': (Bid, BidSerializer),
+    'comments': (Comment, CommentSerializer),
+    'listings': (Listing, ListingSerializer),
+}
+
+
+class Command(BaseCommand):
+    """Benchmark a list page of the API: fetching rows, serializing and
+    rendering them as JSON by model instances, `ModelSerializer` and the
+    stock renderer, against `.values()` rows, `ValuesSerializer` and
+    `ORJSONRenderer`. Reports the median time and the peak of memory
+    allocated per page (by `tracemalloc`, so times are of traced runs).
+    """
+
+    help = 'Benchmark serialization of API list pages.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000,
+            help='Rows per page, 5000 is the largest page of bids.')
+        parser.add_argument('--repeat', type=int, default=10)
+        parser.add_argument('--model', action='append', dest='models',
+            choices=SERIALIZERS, help='A model to benchmark (repeatable).')
+
+    def model_page(self, queryset, serializer_class, context):
+        data = serializer_class(queryset, many=True, context=context).data
+        return JSONRenderer().render(data)
+
+    def values_page(self, queryset, serializer_class, context):
+        values = ValuesSerializer(serializer_class, context=context)
+        data = values.to_representation(values.get_queryset(queryset))
+        return ORJSONRenderer().render(data)
+
+    def measure(self, page, queryset, serializer_class, repeat):
+        """Return the median milliseconds, the median peak of allocated
+        KiB and the size of the rendered page.
+        """
+
+        context = {'request': APIRequestFactory().get('/')}
+        timings, peaks = [], []
+        for _ in range(repeat):
+            tracemalloc.start()
+            started = perf_counter()
+            content = page(queryset.all(), serializer_class, context)
+            timings.append((perf_counter() - started) * 1000)
+            peaks.append(tracemalloc.get_traced_memory()[1] / 1024)
+            tracemalloc.stop()
+        return median(timings), median(peaks), len(content)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'{options["rows"]} rows per page, median of '
+            f'{options["repeat"]} runs:')
+        self.stdout.write(f'{"model":>10}{"mode":>8}{"ms":>10}{"peak KiB":>12}'
+            f'{"bytes":>12}')
+        for name in options['models'] or SERIALIZERS:
+            model, serializer_class = SERIALIZERS[name]
+            queryset = model.objects.order_by('-pk')[:options['rows']]
+            if not queryset.exists():
+                raise CommandError(f'No {name}, seed some with '
+                    'seed_auctions.')
+
+            for mode, page in (('model', self.model_page),
+                    ('values', self.values_page)):
+                ms, peak, size = self.measure(page, queryset,
+                    serializer_class, options['repeat'])
+                self.stdout.write(f'{name:>10}{mode:>8}{ms:>10.1f}'
+                    f'{peak:>12.0f}{size:>12}')
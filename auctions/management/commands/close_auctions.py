@@ -0,0 +1,64 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections
+
+from auctions.services import close_expired_listings
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """Close ended auctions in batches. Runs as a polling worker, or drains
+    ended auctions once with `--once` (e.g. from cron). Several workers may
+    run concurrently, locked listings are skipped.
+    The worker closes unusable connections before each pass, like a request
+    does, and a database error of a pass is logged and retried after the
+    interval.
+    """
+
+    help = 'Close listings whose auctions have ended and record winners.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+            help='Number of listings closed per transaction.')
+        parser.add_argument('--interval', type=float, default=5,
+            help='Seconds to wait when no auctions have ended.')
+        parser.add_argument('--once', action='store_true',
+            help='Close all ended auctions and exit.')
+
+    def close_ended(self, batch_size):
+        """Close batches of ended auctions until none are left. Return the
+        number of closed listings.
+        """
+
+        total = 0
+        while True:
+            closed = len(close_expired_listings(batch_size))
+            total += closed
+            if closed < batch_size:
+                return total
+
+    def handle(self, *args, **options):
+        if options['once']:
+            closed = self.close_ended(options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Closed {closed} listing(s).'))
+            return
+
+        while True:
+            close_old_connections()
+            try:
+                closed = self.close_ended(options['batch_size'])
+            except DatabaseError:
+                logger.exception('Failed to close ended auctions.')
+                closed = 0
+            if closed:
+                self.stdout.write(self.style.SUCCESS(
+                    f'Closed {closed} listing(s).'))
+            try:
+                time.sleep(options['interval'])
+            except KeyboardInterrupt:
+                return
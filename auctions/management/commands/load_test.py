@@ -0,0 +1,349 @@
+import json
+import math
+import random
+import subprocess
+import threading
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from decimal import Decimal
+from time import perf_counter
+
+import requests
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.utils.crypto import get_random_string
+from rest_framework.authtoken.models import Token
+
+from auctions.models import Listing
+from .benchmark_search import WORDS
+
+
+User = get_user_model()
+
+ENDPOINTS = ('index', 'search', 'detail', 'bid', 'comment', 'api_listings',
+    'api_listing', 'api_bids', 'api_bid')
+DEFAULT_MIX = ('index=20,search=10,detail=30,bid=10,comment=5,'
+    'api_listings=10,api_listing=5,api_bids=5,api_bid=5')
+
+
+def parse_mix(mix):
+    """Parse a mix like `index=3,bid=1` into weights of endpoints."""
+
+    weights = {}
+    for item in mix.split(','):
+        name, _, weight = item.partition('=')
+        if name not in ENDPOINTS:
+            raise CommandError(f'Unknown endpoint {name!r}, choose from '
+                f'{", ".join(ENDPOINTS)}.')
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def percentile(values, percent):
+    """Return a nearest-rank percentile of sorted values."""
+
+    if not values:
+        return None
+    rank = max(math.ceil(percent / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+def summarize(latencies, statuses, duration):
+    """Return stats of an endpoint: requests, requests/s, latency
+    percentiles in milliseconds and counts of statuses.
+    """
+
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'rps': round(len(latencies) / duration, 2),
+        'p50': percentile(latencies, 50),
+        'p95': percentile(latencies, 95),
+        'p99': percentile(latencies, 99),
+        'max': latencies[-1] if latencies else None,
+        'statuses': dict(statuses),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Compare stats of endpoints to a baseline run. Return rows of
+    `(endpoint, stat, baseline, current, change, regressed)`; a regression
+    is p95 latency up or requests/s down by more than `threshold`.
+    """
+
+    rows = []
+    for name, stats in results['endpoints'].items():
+        base = baseline['endpoints'].get(name)
+        if not base or not base['requests'] or not stats['requests']:
+            continue
+        for stat, worse in (('p95', 1), ('rps', -1)):
+            change = (stats[stat] - base[stat]) / base[stat] \
+                if base[stat] else 0
+            rows.append((name, stat, base[stat], stats[stat], change,
+                change * worse > threshold))
+    return rows
+
+
+class Worker:
+    """A simulated client: an anonymous and a logged in HTTP session with
+    an API token. Requests endpoints by weights until the deadline.
+    """
+
+    def __init__(self, command, user, seed):
+        self.command = command
+        self.base_url = command.url
+        self.random = random.Random(seed)
+        self.anonymous = requests.Session()
+        self.authenticated = requests.Session()
+        self.authenticated.cookies.update(command.get_cookies(user))
+        self.authenticated.headers['X-CSRFToken'] = \
+            self.authenticated.cookies['csrftoken']
+        self.token = command.get_token(user)
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+
+    def session(self):
+        """Return a session for a page read."""
+
+        if self.random.random() < self.command.auth_ratio:
+            return self.authenticated
+        return self.anonymous
+
+    def listing(self):
+        """Return a listing drawn by popularity."""
+
+        return self.random.choices(self.command.listings,
+            cum_weights=self.command.listing_weights)[0]
+
+    def bid_amount(self, listing):
+        """Return a bid above the last one sent to the listing."""
+
+        with self.command.lock:
+            listing['bid'] += Decimal(self.random.randint(1, 5))
+            return listing['bid']
+
+    def request(self, name):
+        """Send a request to an endpoint. Return its status."""
+
+        listing = self.listing()
+        page = f'{self.base_url}/{listing["cat_slug"]}/{listing["slug"]}/'
+        api = f'{self.base_url}/api/v1'
+        token = {'Authorization': f'Token {self.token}'}
+
+        if name == 'index':
+            response = self.session().get(f'{self.base_url}/')
+        elif name == 'search':
+            response = self.session().get(f'{self.base_url}/search/',
+                params={'q': self.random.choice(WORDS)})
+        elif name == 'detail':
+            response = self.session().get(page)
+        elif name == 'bid':
+            response = self.authenticated.post(page, allow_redirects=False,
+                data={'bid': self.bid_amount(listing), 'bid_submit': 'bid'})
+        elif name == 'comment':
+            response = self.authenticated.post(page, allow_redirects=False,
+                data={'text': 'A load test comment.',
+                    'comment_submit': 'comment'})
+        elif name == 'api_listings':
+            response = self.anonymous.get(f'{api}/listings/')
+        elif name == 'api_listing':
+            response = self.anonymous.get(f'{api}/listings/{listing["pk"]}/')
+        elif name == 'api_bids':
+            response = self.anonymous.get(
+                f'{api}/listings/{listing["pk"]}/bids/')
+        elif name == 'api_bid':
+            response = self.anonymous.post(f'{api}/my-bids/', headers=token,
+                json={'listing': listing['pk'],
+                    'bid': str(self.bid_amount(listing))})
+        return response.status_code
+
+    def run(self, weights, warmup_until, deadline):
+        names, weights = list(weights), list(weights.values())
+        while True:
+            name = self.random.choices(names, weights)[0]
+            started = perf_counter()
+            if started >= deadline:
+                return
+            try:
+                status = str(self.request(name))
+            except requests.RequestException as exc:
+                status = type(exc).__name__
+            if started >= warmup_until:
+                self.latencies[name].append(
+                    round((perf_counter() - started) * 1000, 3))
+                self.statuses[name][status] += 1
+
+
+class Command(BaseCommand):
+    """Load test a running server (e.g. gunicorn with uvicorn workers) with
+    mixed read, bid and comment traffic of concurrent clients, and report
+    latency percentiles and throughput per endpoint.
+
+    The command prepares clients in the server's database: load test users
+    logged in by sessions and API tokens, and the most bid listings, drawn
+    by a power law of popularity (see `seed_auctions` for a dataset).
+    Rejected and throttled writes are counted by their statuses.
+    Results are stored as JSON by `--output`, and a run can be compared to
+    a stored one by `--compare`: a regression beyond `--threshold` fails
+    the command.
+    """
+
+    help = 'Load test the web pages and the API of a running server.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000',
+            help='Base URL of the server.')
+        parser.add_argument('--concurrency', type=int, default=10,
+            help='Number of concurrent clients.')
+        parser.add_argument('--duration', type=float, default=30,
+            help='Seconds of measured traffic.')
+        parser.add_argument('--warmup', type=float, default=5,
+            help='Seconds of traffic before measuring.')
+        parser.add_argument('--mix', default=DEFAULT_MIX,
+            help='Weights of endpoints, e.g. "detail=3,bid=1". Endpoints: '
+            f'{", ".join(ENDPOINTS)}.')
+        parser.add_argument('--auth-ratio', type=float, default=0.5,
+            help='Share of page reads by logged in users.')
+        parser.add_argument('--listings', type=int, default=500,
+            help='Number of the most bid active listings requested.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Store results to a JSON file.')
+        parser.add_argument('--compare', help='Compare results to a JSON '
+            'file of a previous run.')
+        parser.add_argument('--threshold', type=float, default=0.1,
+            help='Share of p95 or requests/s change that is a regression.')
+
+    def get_cookies(self, user):
+        """Return cookies of a logged in session of a user and a CSRF
+        secret sent back in the `X-CSRFToken` header.
+        """
+
+        client = Client()
+        client.force_login(user)
+        cookies = {name: morsel.value
+            for name, morsel in client.cookies.items()}
+        cookies['csrftoken'] = get_random_string(32)
+        return cookies
+
+    def get_token(self, user):
+        """Return an API token of a user."""
+
+        return Token.objects.get_or_create(user=user)[0].key
+
+    def get_listings(self, count):
+        """Return the most bid active listings and cumulative weights of
+        their popularity.
+        """
+
+        listings = [{'pk': pk, 'slug': slug, 'cat_slug': cat_slug,
+                'bid': current_bid}
+            for pk, slug, cat_slug, current_bid in Listing.objects
+            .filter(is_active=True).order_by('-bid_count', 'pk')
+            .values_list('pk', 'slug', 'category__slug', 'current_bid')
+            [:count]]
+        if not listings:
+            raise CommandError('No active listings, seed some with '
+                'seed_auctions.')
+
+        weights, total = [], 0
+        for rank in range(1, len(listings) + 1):
+            total += 1 / rank
+            weights.append(total)
+        return listings, weights
+
+    def get_commit(self):
+        """Return the current git commit, if any."""
+
+        try:
+            return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def run_workers(self, workers, weights, warmup, duration):
+        """Run workers in threads for the warmup and the duration."""
+
+        started = perf_counter()
+        threads = [threading.Thread(target=worker.run, args=(weights,
+            started + warmup, started + warmup + duration))
+            for worker in workers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def write_results(self, results):
+        self.stdout.write(f'{"endpoint":<14}{"requests":>10}{"rps":>10}'
+            f'{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}  statuses')
+        for name, stats in results['endpoints'].items():
+            latencies = ''.join(f'{stats[stat]:>10.1f}'
+                if stats[stat] is not None else f'{"-":>10}'
+                for stat in ('p50', 'p95', 'p99'))
+            statuses = ', '.join(f'{status}: {count}'
+                for status, count in sorted(stats['statuses'].items()))
+            self.stdout.write(f'{name:<14}{stats["requests"]:>10}'
+                f'{stats["rps"]:>10.1f}{latencies}  {statuses}')
+
+    def write_comparison(self, rows):
+        regressions = []
+        for name, stat, base, current, change, regressed in rows:
+            line = (f'{name:<14}{stat:>5}: {base:>10.1f} -> {current:>10.1f}'
+                f' ({change:+.1%})')
+            if regressed:
+                regressions.append(name)
+                line = self.style.ERROR(line + ' regression')
+            self.stdout.write(line)
+        return regressions
+
+    def handle(self, *args, **options):
+        weights = parse_mix(options['mix'])
+        self.url = options['url'].rstrip('/')
+        self.auth_ratio = options['auth_ratio']
+        self.lock = threading.Lock()
+        self.listings, self.listing_weights = self.get_listings(
+            options['listings'])
+
+        workers = []
+        for num in range(options['concurrency']):
+            user = User.objects.get_or_create(username=f'loadtest-{num}')[0]
+            workers.append(Worker(self, user, options['seed'] + num))
+
+        self.stdout.write(f'Running {options["concurrency"]} clients against '
+            f'{self.url} for {options["warmup"]}s + {options["duration"]}s.')
+        self.run_workers(workers, weights, options['warmup'],
+            options['duration'])
+
+        endpoints = {}
+        for name in weights:
+            latencies = [latency for worker in workers
+                for latency in worker.latencies[name]]
+            statuses = sum((worker.statuses[name] for worker in workers),
+                Counter())
+            endpoints[name] = summarize(latencies, statuses,
+                options['duration'])
+
+        results = {
+            'commit': self.get_commit(),
+            'date': datetime.now(timezone.utc).isoformat(),
+            'options': {key: options[key] for key in ('url', 'concurrency',
+                'duration', 'warmup', 'mix', 'auth_ratio', 'listings',
+                'seed')},
+            'endpoints': endpoints,
+        }
+        self.write_results(results)
+
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(results, file, indent=2)
+            self.stdout.write(f'Stored results to {options["output"]}.')
+
+        if options['compare']:
+            with open(options['compare']) as file:
+                baseline = json.load(file)
+            self.stdout.write(f'Compared to {baseline.get("commit")}:')
+            regressions = self.write_comparison(compare(results, baseline,
+                options['threshold']))
+            if regressions:
+                raise CommandError('Regressed endpoints: '
+                    f'{", ".join(sorted(set(regressions)))}.')
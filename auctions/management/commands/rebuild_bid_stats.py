@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from auctions.models import Listing
+
+
+class Command(BaseCommand):
+    """Rebuild denormalized bid stats of listings from the `Bid` table or
+    verify them for drift.
+    """
+
+    help = 'Rebuild bid stats of listings from the Bid table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+            help='Only report listings with drifted bid stats.')
+        parser.add_argument('--listing', type=int, action='append',
+            dest='listings', help='Limit to a listing id (repeatable).')
+
+    def get_drifted(self, query):
+        """Return ids of listings whose stored bid stats differ from the
+        `Bid` table.
+        """
+
+        drifted = []
+        rows = query.with_actual_bid_stats().values_list(
+            'pk', 'max_bid', 'bid_count', 'last_bid_at',
+            'actual_max_bid', 'actual_bid_count', 'actual_last_bid_at')
+        for pk, *stats in rows.iterator():
+            if stats[:3] != stats[3:]:
+                drifted.append(pk)
+        return drifted
+
+    def handle(self, *args, **options):
+        query = Listing.objects.order_by('pk')
+        if options['listings']:
+            query = query.filter(pk__in=options['listings'])
+
+        drifted = self.get_drifted(query)
+        for pk in drifted:
+            self.stdout.write(f'Listing {pk}: bid stats drifted.')
+
+        if options['check']:
+            if drifted:
+                raise CommandError(f'{len(drifted)} listing(s) drifted.')
+            self.stdout.write(self.style.SUCCESS('No drift found.'))
+            return
+
+        with transaction.atomic():
+            updated = query.rebuild_bid_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt bid stats of {updated} listing(s).'))
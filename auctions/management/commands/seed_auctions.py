@@ -0,0 +1,292 @@
+import io
+import random
+from datetime import timedelta
+from decimal import Decimal
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from auctions.cache import invalidate_listings
+from auctions.models import Category, Listing, Bid, Comment, Watchlist
+from .benchmark_search import WORDS
+
+
+User = get_user_model()
+
+CENT = Decimal('0.01')
+
+# shares of listings: closed auctions, and active ones without an end time
+CLOSED_RATIO = 0.1
+OPEN_ENDED_RATIO = 0.2
+
+
+class CopyWriter:
+    """Buffer rows of a table and write them by Postgres `COPY` once
+    `batch_size` rows are buffered.
+    """
+
+    def __init__(self, model, columns, batch_size):
+        self.table = model._meta.db_table
+        self.columns = columns
+        self.batch_size = batch_size
+        self.buffer = io.StringIO()
+        self.buffered = 0
+        self.written = 0
+
+    def format(self, value):
+        if value is None:
+            return r'\N'
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        return str(value).replace('\\', '\\\\').replace('\t', ' ')\
+            .replace('\n', ' ')
+
+    def write(self, *row):
+        self.buffer.write('\t'.join(map(self.format, row)) + '\n')
+        self.buffered += 1
+        if self.buffered >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.buffered:
+            return
+        self.buffer.seek(0)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(f'COPY {self.table} '
+                f'({", ".join(self.columns)}) FROM STDIN', self.buffer)
+        self.written += self.buffered
+        self.buffer = io.StringIO()
+        self.buffered = 0
+
+
+class Command(BaseCommand):
+    """Generate a synthetic dataset for benchmarks: users, categories,
+    listings, bids, comments and watchlists. Listing popularity follows a
+    power law (a listing of popularity rank `r` gets bids, comments and
+    watchers in proportion to `r ** -skew`), bids of a listing rise from its
+    start bid over time, and denormalized bid stats and closing results are
+    written consistently with the bids. Large tables are written by `COPY`
+    in batches of listings, a transaction each.
+
+    The data is deterministic by `--seed`; dates are relative to the current
+    time. Names are prefixed by `--prefix`, so datasets may be added to a
+    database that already has one.
+    """
+
+    help = 'Seed the database with a synthetic auctions dataset.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--listings', type=int, default=10_000)
+        parser.add_argument('--bids', type=int, default=200_000)
+        parser.add_argument('--comments', type=int, default=20_000)
+        parser.add_argument('--watchlists', type=int, default=20_000,
+            help='Number of watchlist rows, at most a row per user and '
+            'listing.')
+        parser.add_argument('--skew', type=float, default=1.0,
+            help='Exponent of the power law of listing popularity.')
+        parser.add_argument('--days', type=int, default=90,
+            help='Listings are added over this number of last days.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--prefix', default='seed',
+            help='Prefix of generated usernames and category slugs.')
+        parser.add_argument('--batch-size', type=int, default=10_000,
+            help='Number of rows per bulk insert or COPY.')
+
+    def report(self, label, rows, started):
+        """Write a number of inserted rows and the throughput."""
+
+        elapsed = perf_counter() - started
+        self.stdout.write(f'{label}: {rows:,} rows in {elapsed:.1f}s '
+            f'({rows / max(elapsed, 1e-6):,.0f} rows/s)')
+
+    def distribute(self, total, weights):
+        """Split `total` by weights into integers summing up to `total`."""
+
+        weight_sum = sum(weights)
+        counts = [int(total * weight / weight_sum) for weight in weights]
+        for index in range(total - sum(counts)):
+            counts[index % len(counts)] += 1
+        return counts
+
+    def get_popularity(self, options):
+        """Return counts of bids, comments and watchers of listings by
+        their position, drawn by popularity ranks of listings.
+        """
+
+        weights = [rank ** -options['skew']
+            for rank in range(1, options['listings'] + 1)]
+        self.random.shuffle(weights)
+        return (self.distribute(options['bids'], weights),
+            self.distribute(options['comments'], weights),
+            self.distribute(options['watchlists'], weights))
+
+    def create_users(self, options):
+        """Create users with unusable passwords. Return their ids."""
+
+        started = perf_counter()
+        users = User.objects.bulk_create((User(
+            username=f'{options["prefix"]}-user-{num}',
+            password=UNUSABLE_PASSWORD_PREFIX)
+            for num in range(options['users'])),
+            batch_size=options['batch_size'])
+        self.report('Users', len(users), started)
+        return [user.pk for user in users]
+
+    def create_categories(self, options):
+        """Create categories. Return their ids."""
+
+        categories = Category.objects.bulk_create(Category(
+            name=f'{WORDS[num % len(WORDS)].title()} {num}',
+            slug=f'{options["prefix"]}-category-{num}')
+            for num in range(options['categories']))
+        return [category.pk for category in categories]
+
+    def reserve_listing_ids(self, count):
+        """Return `count` new ids of the listings sequence."""
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"""SELECT nextval(pg_get_serial_sequence(
+                '{Listing._meta.db_table}', 'id'))
+                FROM generate_series(1, %s)""", [count])
+            return [row[0] for row in cursor.fetchall()]
+
+    def get_times(self, count, start, end):
+        """Return `count` ascending random times between start and end."""
+
+        span = (end - start).total_seconds()
+        return [start + timedelta(seconds=offset) for offset in
+            sorted(self.random.uniform(0, span) for _ in range(count))]
+
+    def write_listing(self, writers, listing_id, date_added, bid_count,
+            comment_count, watcher_count):
+        """Write a listing with its bids, comments and watchlist rows."""
+
+        rng = self.random
+        owner = rng.choice(self.user_ids)
+        name = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 4)))
+        start_bid = max(Decimal(rng.lognormvariate(3, 1.2)), Decimal(1))\
+            .quantize(CENT)
+
+        closed = rng.random() < CLOSED_RATIO
+        if closed:
+            ends_at = date_added + (self.now - date_added) * rng.random()
+        elif rng.random() < OPEN_ENDED_RATIO:
+            ends_at = None
+        else:
+            ends_at = self.now + timedelta(hours=rng.uniform(1, 14 * 24))
+        last_time = ends_at if closed else self.now
+
+        # bids rise from the start bid to about a final price in steps of
+        # random size, at least a cent each
+        amount = start_bid
+        final_price = start_bid * Decimal(1 + rng.lognormvariate(0, 0.8))
+        step = (final_price - start_bid) / max(bid_count, 1)
+        bidder = None
+        bid_times = self.get_times(bid_count, date_added, last_time)
+        for placed_at in bid_times:
+            amount += max((step * Decimal(rng.uniform(0.5, 1.5)))
+                .quantize(CENT), CENT)
+            bidder = rng.choice(self.user_ids)
+            while bidder == owner:
+                bidder = rng.choice(self.user_ids)
+            writers['bids'].write(bidder, listing_id, amount, placed_at,
+                placed_at)
+
+        max_bid = amount if bid_times else None
+        last_bid_at = bid_times[-1] if bid_times else None
+        writers['listings'].write(listing_id,
+            rng.choice(self.category_ids), owner, name.capitalize(),
+            f'{slugify(name)}-{listing_id}',
+            f'{name.capitalize()} in good condition.', start_bid, '',
+            not closed, date_added, ends_at if closed else date_added,
+            amount, max_bid, bid_count, last_bid_at, ends_at,
+            ends_at if closed else None, bidder if closed else None)
+
+        for added_at in self.get_times(comment_count, date_added, last_time):
+            writers['comments'].write(rng.choice(self.user_ids), listing_id,
+                ' '.join(rng.choice(WORDS) for _ in range(8)) + '.',
+                added_at, added_at)
+
+        watchers = rng.sample(range(len(self.user_ids)),
+            min(watcher_count, len(self.user_ids)))
+        for index in watchers:
+            added_at = date_added + (last_time - date_added) * rng.random()
+            writers['watchlists'].write(self.user_ids[index], listing_id,
+                added_at, added_at)
+
+    def handle(self, *args, **options):
+        if options['users'] < 2 or min(options['categories'],
+                options['listings']) < 1:
+            raise CommandError('At least 2 users, a category and a listing '
+                'are needed.')
+        if User.objects.filter(
+                username__startswith=f'{options["prefix"]}-user-').exists():
+            raise CommandError(f'A dataset with the prefix '
+                f'{options["prefix"]!r} exists, choose another --prefix.')
+
+        self.random = random.Random(options['seed'])
+        self.now = timezone.now()
+        started = perf_counter()
+
+        self.user_ids = self.create_users(options)
+        self.category_ids = self.create_categories(options)
+        bid_counts, comment_counts, watcher_counts = \
+            self.get_popularity(options)
+
+        batch_size = options['batch_size']
+        writers = {
+            'listings': CopyWriter(Listing, ('id', 'category_id', 'user_id',
+                'name', 'slug', 'description', 'start_bid', 'image',
+                'is_active', 'date_added', 'date_updated', 'current_bid',
+                'max_bid', 'bid_count', 'last_bid_at', 'ends_at',
+                'closed_at', 'winner_id'), batch_size),
+            'bids': CopyWriter(Bid, ('user_id', 'listing_id', 'bid',
+                'date_added', 'date_updated'), batch_size),
+            'comments': CopyWriter(Comment, ('user_id', 'listing_id', 'text',
+                'date_added', 'date_updated'), batch_size),
+            'watchlists': CopyWriter(Watchlist, ('user_id', 'listing_id',
+                'date_added', 'date_updated'), batch_size),
+        }
+
+        total = options['listings']
+        period = timedelta(days=options['days'])
+        listings_started = perf_counter()
+        for start in range(0, total, batch_size):
+            stop = min(start + batch_size, total)
+            # foreign keys are checked on commit, after all rows of a batch
+            with transaction.atomic():
+                for num, listing_id in zip(range(start, stop),
+                        self.reserve_listing_ids(stop - start)):
+                    date_added = self.now - period * (1 - num / total) \
+                        + timedelta(seconds=self.random.uniform(0, 60))
+                    self.write_listing(writers, listing_id,
+                        min(date_added, self.now), bid_counts[num],
+                        comment_counts[num], watcher_counts[num])
+                for writer in writers.values():
+                    writer.flush()
+
+            rows = sum(writer.written for writer in writers.values())
+            elapsed = perf_counter() - listings_started
+            self.stdout.write(f'Listings {stop:,}/{total:,}: '
+                f'{writers["bids"].written:,} bids, {rows:,} rows '
+                f'({rows / max(elapsed, 1e-6):,.0f} rows/s)')
+
+        for label, writer in writers.items():
+            self.stdout.write(f'{label.capitalize()}: {writer.written:,} rows')
+
+        with connection.cursor() as cursor:
+            for writer in writers.values():
+                cursor.execute(f'ANALYZE {writer.table}')
+        invalidate_listings()
+
+        rows = len(self.user_ids) + len(self.category_ids) + sum(
+            writer.written for writer in writers.values())
+        self.report('Total', rows, started)
+        self.stdout.write(self.style.SUCCESS('Seeded the dataset.'))
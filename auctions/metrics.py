@@ -0,0 +1,299 @@
+import threading
+from functools import lru_cache
+from time import monotonic, perf_counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse, HttpResponseForbidden
+from django.urls import URLResolver, get_resolver
+from django.utils.crypto import constant_time_compare
+
+from .async_views import AsyncCapableMiddleware
+from .cache import STATS_KEY, incr
+
+
+METRIC_KEY = 'auctions:metrics:{name}:{labels}'
+
+# upper bounds of request duration buckets, in seconds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+    float('inf'))
+STATUS_CLASSES = ('1xx', '2xx', '3xx', '4xx', '5xx')
+BID_RESULTS = ('accepted', 'rejected')
+POOL_CLOSE_REASONS = ('broken', 'idle', 'lifetime')
+
+# durations are summed in microseconds, counters of the cache are integers
+MICROSECONDS = 1_000_000
+
+
+def format_labels(labels):
+    return ','.join(f'{name}="{value}"' for name, value in labels)
+
+
+def get_metric_key(name, labels=()):
+    return METRIC_KEY.format(name=name, labels=format_labels(labels))
+
+
+class MetricsBuffer:
+    """Counters of the process, added to counters in the shared cache at
+    most every `flush_interval` seconds, so the hot path only updates a
+    dictionary and every worker process adds to the same totals.
+    """
+
+    flush_interval = 1
+
+    def __init__(self):
+        self.counts = {}
+        self.lock = threading.Lock()
+        self.flushed = monotonic()
+
+    def add(self, key, value=1):
+        with self.lock:
+            self.counts[key] = self.counts.get(key, 0) + value
+        if monotonic() - self.flushed >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Add buffered counts to the shared counters."""
+
+        with self.lock:
+            counts, self.counts = self.counts, {}
+            self.flushed = monotonic()
+        for key, value in counts.items():
+            incr(key, value)
+
+
+buffer = MetricsBuffer()
+
+
+def count_bid(accepted):
+    """Count a placed bid by its result."""
+
+    buffer.add(get_metric_key('bids_total',
+        [('result', BID_RESULTS[not accepted])]))
+
+
+def count_pool_connection(event, reason=None):
+    """Count a pooled database connection `opened`, `closed` by a reason,
+    or a checkout `timeout`.
+    """
+
+    buffer.add(get_metric_key(f'db_pool_{event}_total',
+        [('reason', reason)] if reason else []))
+
+
+def observe_pool_checkout(wait):
+    """Count a connection checked out of a pool after waiting for it."""
+
+    buffer.add(get_metric_key('db_pool_checkouts_total'))
+    buffer.add(get_metric_key('db_pool_wait_sum'), round(wait * MICROSECONDS))
+
+
+def observe_request(view, status, duration):
+    """Count a request of a view in a duration bucket and a status class."""
+
+    status_class = STATUS_CLASSES[min(max(status // 100, 1), 5) - 1]
+    buffer.add(get_metric_key('requests_total',
+        [('view', view), ('status', status_class)]))
+    bucket = next(bound for bound in DURATION_BUCKETS if duration <= bound)
+    buffer.add(get_metric_key('request_duration_bucket',
+        [('view', view), ('le', bucket)]))
+    buffer.add(get_metric_key('request_duration_sum', [('view', view)]),
+        round(duration * MICROSECONDS))
+
+
+@lru_cache(maxsize=None)
+def get_view_names(urlconf=None):
+    """Return names of views of the URL configuration, namespaced, e.g.
+    `auctions:index`. Requests are labeled by these names, others by
+    `other`, so the set of series is known when metrics are collected.
+    """
+
+    names = set()
+    resolvers = [(get_resolver(urlconf), '')]
+    while resolvers:
+        resolver, namespace = resolvers.pop()
+        for pattern in resolver.url_patterns:
+            if isinstance(pattern, URLResolver):
+                resolvers.append((pattern, f'{namespace}{pattern.namespace}:'
+                    if pattern.namespace else namespace))
+            elif pattern.name:
+                names.add(f'{namespace}{pattern.name}')
+    return frozenset(names) | {'other'}
+
+
+class MetricsMiddleware(AsyncCapableMiddleware):
+    """Observe durations and statuses of all requests by their view names.
+    Place it first in `MIDDLEWARE`, so the whole request is timed.
+    """
+
+    def call(self, request):
+        started = perf_counter()
+        response = self.get_response(request)
+        self.observe(request, response, started)
+        return response
+
+    async def __acall__(self, request):
+        started = perf_counter()
+        response = await self.get_response(request)
+        self.observe(request, response, started)
+        return response
+
+    def observe(self, request, response, started):
+        match = request.resolver_match
+        view = match.view_name if match else 'other'
+        if view not in get_view_names():
+            view = 'other'
+        observe_request(view, response.status_code, perf_counter() - started)
+
+
+class Exposition:
+    """Lines of metrics in the Prometheus text format."""
+
+    def __init__(self):
+        self.lines = []
+
+    def add(self, name, kind, description, samples):
+        """Add a metric with `(suffix, labels, value)` samples."""
+
+        self.lines.append(f'# HELP auctions_{name} {description}')
+        self.lines.append(f'# TYPE auctions_{name} {kind}')
+        for suffix, labels, value in samples:
+            labels = f'{{{format_labels(labels)}}}' if labels else ''
+            self.lines.append(f'auctions_{name}{suffix}{labels} {value}')
+
+    def render(self):
+        return '\n'.join(self.lines) + '\n'
+
+
+def get_counters(keys):
+    """Return values of shared counters, missing ones are zero."""
+
+    values = cache.get_many(keys)
+    return [values.get(key, 0) for key in keys]
+
+
+def collect_request_metrics(exposition):
+    """Add request counters and duration histograms of views."""
+
+    views = sorted(get_view_names())
+    keys = {}
+    for view in views:
+        for status in STATUS_CLASSES:
+            keys['total', view, status] = get_metric_key('requests_total',
+                [('view', view), ('status', status)])
+        for bucket in DURATION_BUCKETS:
+            keys['bucket', view, bucket] = get_metric_key(
+                'request_duration_bucket', [('view', view), ('le', bucket)])
+        keys['sum', view] = get_metric_key('request_duration_sum',
+            [('view', view)])
+    values = dict(zip(keys, get_counters(list(keys.values()))))
+
+    totals, histograms = [], []
+    for view in views:
+        totals.extend(('', [('view', view), ('status', status)],
+            values['total', view, status]) for status in STATUS_CLASSES
+            if values['total', view, status])
+
+        cumulative = 0
+        buckets = []
+        for bucket in DURATION_BUCKETS:
+            cumulative += values['bucket', view, bucket]
+            buckets.append(('_bucket', [('view', view),
+                ('le', '+Inf' if bucket == float('inf') else bucket)],
+                cumulative))
+        if not cumulative:
+            continue
+        histograms.extend(buckets)
+        histograms.append(('_sum', [('view', view)],
+            values['sum', view] / MICROSECONDS))
+        histograms.append(('_count', [('view', view)], cumulative))
+
+    exposition.add('requests_total', 'counter',
+        'Requests by view name and status class.', totals)
+    exposition.add('request_duration_seconds', 'histogram',
+        'Request durations by view name.', histograms)
+
+
+def collect_pool_metrics(exposition):
+    """Add counters of pooled database connections of all processes, see
+    `auctions.backends.postgresql`. Open connections are counted by
+    `db_connections`.
+    """
+
+    opened, timeouts, checkouts, wait, *closed = get_counters([
+        get_metric_key('db_pool_opened_total'),
+        get_metric_key('db_pool_timeout_total'),
+        get_metric_key('db_pool_checkouts_total'),
+        get_metric_key('db_pool_wait_sum'),
+        *(get_metric_key('db_pool_closed_total', [('reason', reason)])
+            for reason in POOL_CLOSE_REASONS)])
+    exposition.add('db_pool_opened_total', 'counter',
+        'Database connections opened by pools.', [('', [], opened)])
+    exposition.add('db_pool_closed_total', 'counter',
+        'Database connections closed by pools by reason.',
+        [('', [('reason', reason)], value)
+            for reason, value in zip(POOL_CLOSE_REASONS, closed)])
+    exposition.add('db_pool_timeouts_total', 'counter',
+        'Checkouts failed waiting for a pooled connection.',
+        [('', [], timeouts)])
+    exposition.add('db_pool_wait_seconds', 'summary',
+        'Waits for a pooled database connection.',
+        [('_sum', [], wait / MICROSECONDS), ('_count', [], checkouts)])
+
+
+def collect_metrics():
+    """Return all metrics in the Prometheus text format."""
+
+    from .models import Listing
+
+    buffer.flush()
+    exposition = Exposition()
+
+    bids = get_counters([get_metric_key('bids_total', [('result', result)])
+        for result in BID_RESULTS])
+    exposition.add('bids_total', 'counter', 'Placed bids by result.',
+        [('', [('result', result)], value)
+            for result, value in zip(BID_RESULTS, bids)])
+
+    hits, misses = get_counters([STATS_KEY.format(stat='hits'),
+        STATS_KEY.format(stat='misses')])
+    exposition.add('page_cache_requests_total', 'counter',
+        'Anonymous page cache lookups by result.',
+        [('', [('result', 'hit')], hits), ('', [('result', 'miss')], misses)])
+
+    collect_request_metrics(exposition)
+    collect_pool_metrics(exposition)
+
+    exposition.add('active_listings', 'gauge', 'Active listings.',
+        [('', [], Listing.objects.filter(is_active=True).count())])
+
+    with connection.cursor() as cursor:
+        cursor.execute("""SELECT coalesce(state, 'unknown'), count(*)
+            FROM pg_stat_activity WHERE datname = current_database()
+            GROUP BY 1 ORDER BY 1""")
+        states = cursor.fetchall()
+    exposition.add('db_connections', 'gauge',
+        'Connections to the database by state.',
+        [('', [('state', state)], count) for state, count in states])
+
+    return exposition.render()
+
+
+def metrics_view(request):
+    """Return metrics for Prometheus. With the `AUCTION_METRICS_TOKEN`
+    setting the token is required as a bearer token, otherwise metrics are
+    shown to staff only.
+    """
+
+    token = settings.AUCTION_METRICS_TOKEN
+    if token:
+        allowed = constant_time_compare(
+            request.headers.get('Authorization', ''), f'Bearer {token}')
+    else:
+        allowed = request.user.is_staff
+    if not allowed:
+        return HttpResponseForbidden()
+
+    return HttpResponse(collect_metrics(),
+        content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,59 @@
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+
+def fill_bid_stats(apps, schema_editor):
+    """Fill bid stats of existing listings from the `Bid` table."""
+
+    Listing = apps.get_model('auctions', 'Listing')
+    Bid = apps.get_model('auctions', 'Bid')
+
+    bids = Bid.objects.filter(listing=OuterRef('pk')).order_by()\
+        .values('listing')
+    max_bid = Subquery(bids.annotate(value=Max('bid')).values('value'))
+
+    Listing.objects.update(
+        max_bid=max_bid,
+        current_bid=Greatest('start_bid', Coalesce(max_bid, 'start_bid')),
+        bid_count=Coalesce(Subquery(
+            bids.annotate(value=Count('pk')).values('value')), 0),
+        last_bid_at=Subquery(
+            bids.annotate(value=Max('date_added')).values('value')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listing',
+            name='bid_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='listing',
+            name='current_bid',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=19),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='listing',
+            name='last_bid_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='listing',
+            name='max_bid',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=19, null=True),
+        ),
+        migrations.RunPython(fill_bid_stats, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['is_active', 'current_bid'], name='listing_active_cur_bid_idx'),
+        ),
+    ]
@@ -0,0 +1,71 @@
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+LISTING_SEARCH_VECTOR_SQL = """
+CREATE FUNCTION auctions_listing_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('pg_catalog.english', coalesce(NEW.name, '')), 'A') ||
+        setweight(to_tsvector('pg_catalog.english', coalesce(NEW.description, '')), 'B') ||
+        setweight(to_tsvector('pg_catalog.english', coalesce(
+            (SELECT username FROM account_user WHERE id = NEW.user_id), '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER auctions_listing_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, description, user_id, search_vector
+    ON auctions_listing
+    FOR EACH ROW EXECUTE FUNCTION auctions_listing_search_vector_update();
+
+CREATE FUNCTION auctions_user_username_update() RETURNS trigger AS $$
+BEGIN
+    UPDATE auctions_listing SET search_vector = NULL WHERE user_id = NEW.id;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER auctions_user_username_trigger
+    AFTER UPDATE OF username ON account_user
+    FOR EACH ROW WHEN (OLD.username IS DISTINCT FROM NEW.username)
+    EXECUTE FUNCTION auctions_user_username_update();
+
+UPDATE auctions_listing SET search_vector = NULL;
+"""
+
+DROP_LISTING_SEARCH_VECTOR_SQL = """
+DROP TRIGGER auctions_user_username_trigger ON account_user;
+DROP FUNCTION auctions_user_username_update();
+DROP TRIGGER auctions_listing_search_vector_trigger ON auctions_listing;
+DROP FUNCTION auctions_listing_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0001_initial'),
+        ('auctions', '0002_listing_bid_stats'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='listing',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(LISTING_SEARCH_VECTOR_SQL,
+            DROP_LISTING_SEARCH_VECTOR_SQL),
+        migrations.AddIndex(
+            model_name='listing',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='listing_search_vector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='listing_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
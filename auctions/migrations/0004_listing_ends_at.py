@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+
+def fill_winners(apps, schema_editor):
+    """Record top bidders of already closed listings as winners."""
+
+    Listing = apps.get_model('auctions', 'Listing')
+    Bid = apps.get_model('auctions', 'Bid')
+
+    winner = Bid.objects.filter(listing=OuterRef('pk'))\
+        .order_by('-bid', 'date_added').values('user')[:1]
+
+    Listing.objects.filter(is_active=False).update(winner=Subquery(winner))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('auctions', '0003_listing_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listing',
+            name='closed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='listing',
+            name='ends_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='listing',
+            name='winner',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='won_listings', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['ends_at'], name='listing_active_ends_at_idx'),
+        ),
+        migrations.RunPython(fill_winners, migrations.RunPython.noop),
+    ]
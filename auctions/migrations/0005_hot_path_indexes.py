@@ -0,0 +1,73 @@
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+import django.db.models.deletion
+
+
+def delete_duplicate_watchlists(apps, schema_editor):
+    """Keep the first watchlist entry of each user and listing."""
+
+    Watchlist = apps.get_model('auctions', 'Watchlist')
+
+    earlier = Watchlist.objects.filter(user=OuterRef('user'),
+        listing=OuterRef('listing'), pk__lt=OuterRef('pk'))
+    Watchlist.objects.filter(Exists(earlier)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('auctions', '0004_listing_ends_at'),
+    ]
+
+    # composite indexes are created before the foreign key indexes they
+    # replace are dropped
+    operations = [
+        migrations.RunPython(delete_duplicate_watchlists,
+            migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['listing', '-bid'], name='bid_listing_bid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['user', '-date_added', '-id'], name='bid_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['listing', '-date_added'], name='comment_listing_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-date_added', '-id'], name='listing_active_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['category', '-date_added', '-id'], name='listing_cat_active_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='watchlist',
+            constraint=models.UniqueConstraint(fields=('user', 'listing'), name='watchlist_user_listing_uniq'),
+        ),
+        migrations.AlterField(
+            model_name='bid',
+            name='listing',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='auctions.listing'),
+        ),
+        migrations.AlterField(
+            model_name='bid',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='listing',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='auctions.listing'),
+        ),
+        migrations.AlterField(
+            model_name='watchlist',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+    ]
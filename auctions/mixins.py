@@ -1,8 +1,9 @@
-from django.db.models.functions import Greatest
-from django.db.models import F, Q
-from django.db.models import Max
+from django.http import Http404
 
+from .filters import filter_listings, order_listings, search_listings
 from .models import Listing
+from .pagination import (EstimatedCountPaginator, InvalidCursor,
+                         InvalidOrdering, KeysetPaginator)
 
 
 class GetListingsQuerySetMixin:
@@ -11,38 +12,88 @@ class GetListingsQuerySetMixin:
     """
 
     lst_orderings = {
-    'date_desc': '-date_added', 'date_asc': 'date_added',
-    'name': 'name', 'bid_desc': '-current_bid',
-    'bid_asc': 'current_bid'
-}
+        'date_desc': '-date_added', 'date_asc': 'date_added',
+        'name': 'name', 'bid_desc': '-current_bid',
+        'bid_asc': 'current_bid', 'ends_soon': 'ends_at'
+    }
+    bid_filters = {'all': None, 'no_bids': False, 'bids': True}
 
     def filter_listings(self, query):
-        """Filter and order a query by request."""
-
-        bid_filter = self.request.GET.get('bid_filter')
-        lst_ordering = self.request.GET.get('lst_sort')
+        """Filter and order a query by request, the same way as the API
+        (see `auctions.filters`). Unknown values are ignored.
+        """
 
-        if bid_filter == 'all':
-            pass
-        elif bid_filter == 'no_bids':
-            query = query.filter(max_bid=None)
-        elif bid_filter == 'bids':
-            query = query.filter(Q(current_bid=F('max_bid')))
+        query = filter_listings(query,
+            has_bids=self.bid_filters.get(self.request.GET.get('bid_filter')))
 
+        lst_ordering = self.lst_orderings.get(self.request.GET.get('lst_sort'))
         if lst_ordering:
-            query = query.order_by(self.lst_orderings[lst_ordering])
+            query = order_listings(query, lst_ordering)
 
         return query
 
+    def search_listings(self, query, search_request):
+        """Filter a query by a search request (see `auctions.filters`),
+        ranked by relevance unless an ordering is requested.
+        """
+
+        return search_listings(query, search_request,
+            ranked=not self.request.GET.get('lst_sort'))
+
     def get_listingset(self):
-        """Get a query set of listings annotated by `max_bid` and
-        `current_bid` ordered by descending `date_added`.
+        """Get a query set of listings with their categories (used by
+        `get_absolute_url`) ordered by descending `date_added`.
+        Bid stats (`max_bid`, `current_bid`) are read from the listing's
+        own columns.
         Call the `filter_listings` function.
         """
 
-        query = Listing.objects.annotate(
-            max_bid=Max('bid__bid'), current_bid=Greatest('start_bid', 'max_bid')
-        ).order_by('-date_added')
+        query = Listing.objects.select_related('category')\
+            .order_by('-date_added')
         query = self.filter_listings(query)
 
         return query
+
+
+class KeysetPaginationMixin:
+    """Mixin for list views. Paginate by a keyset, so deep pages are as
+    fast as the first one and no total count is run; pages link to the
+    next and the previous cursors. Requests of a `page` number (old links)
+    and orderings a keyset can't follow (e.g. search ranking) are paginated
+    by page numbers, counted by `EstimatedCountPaginator`.
+    """
+
+    cursor_kwarg = 'cursor'
+    paginator_class = EstimatedCountPaginator
+
+    def get_cursor_query(self, cursor):
+        """Return a query string of the request with the cursor replaced."""
+
+        if cursor is None:
+            return None
+        query = self.request.GET.copy()
+        query.pop(self.page_kwarg, None)
+        query[self.cursor_kwarg] = cursor
+        return query.urlencode()
+
+    def paginate_queryset(self, queryset, page_size):
+        """Paginate the query set by a keyset unless a page number is
+        requested or the ordering doesn't allow it.
+        """
+
+        if self.page_kwarg in self.request.GET:
+            return super().paginate_queryset(queryset, page_size)
+
+        try:
+            paginator = KeysetPaginator(queryset, page_size)
+        except InvalidOrdering:
+            return super().paginate_queryset(queryset, page_size)
+
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        except InvalidCursor as e:
+            raise Http404(str(e))
+
+        page.next_query = self.get_cursor_query(page.next_cursor)
+        page.previous_query = self.get_cursor_query(page.previous_cursor)
+        return (paginator, page, page.object_list, page.has_other_pages())
@@ -1,6 +1,10 @@
 from decimal import Decimal
 
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
+from django.db.models import Count, Max, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
 from django.urls import reverse
 from django.core.validators import MinValueValidator
 
@@ -23,8 +27,107 @@ class Category(models.Model):
     def get_absolute_url(self):
         return reverse('auctions:listings', args=[self.slug])
 
+class ListingQuerySet(models.QuerySet):
+    """A listing query set. Maintains denormalized bid stats of listings:
+    `current_bid`, `max_bid`, `bid_count`, and `last_bid_at`, closes
+    listings, and annotates comment stats.
+    """
+
+    def record_bid(self, bid, placed_at):
+        """Update bid stats of listings by a new bid with a single atomic
+        `UPDATE`. Return the number of updated listings.
+        """
+
+        bid = Value(bid, output_field=models.DecimalField(
+            max_digits=19, decimal_places=2))
+
+        return self.update(
+            max_bid=Greatest(Coalesce('max_bid', bid), bid),
+            current_bid=Greatest('current_bid', bid),
+            bid_count=models.F('bid_count') + 1,
+            last_bid_at=placed_at,
+        )
+
+    def with_actual_bid_stats(self):
+        """Annotate listings by bid stats computed from the `Bid` table:
+        `actual_max_bid`, `actual_bid_count`, and `actual_last_bid_at`.
+        """
+
+        bids = Bid.objects.filter(listing=OuterRef('pk')).order_by()\
+            .values('listing')
+
+        return self.annotate(
+            actual_max_bid=Subquery(
+                bids.annotate(value=Max('bid')).values('value')),
+            actual_bid_count=Coalesce(Subquery(
+                bids.annotate(value=Count('pk')).values('value')), 0),
+            actual_last_bid_at=Subquery(
+                bids.annotate(value=Max('date_added')).values('value')),
+        )
+
+    def rebuild_bid_stats(self):
+        """Recompute bid stats of listings from the `Bid` table in one
+        set-based `UPDATE`. Return the number of updated listings.
+        """
+
+        bids = Bid.objects.filter(listing=OuterRef('pk')).order_by()\
+            .values('listing')
+        max_bid = Subquery(bids.annotate(value=Max('bid')).values('value'))
+
+        return self.update(
+            max_bid=max_bid,
+            current_bid=Greatest('start_bid', Coalesce(max_bid, 'start_bid')),
+            bid_count=Coalesce(Subquery(
+                bids.annotate(value=Count('pk')).values('value')), 0),
+            last_bid_at=Subquery(
+                bids.annotate(value=Max('date_added')).values('value')),
+        )
+
+    def with_comment_stats(self):
+        """Annotate listings by `comment_count` and `comments_updated` (the
+        latest `date_updated` of their comments).
+        """
+
+        comments = Comment.objects.filter(listing=OuterRef('pk')).order_by()\
+            .values('listing')
+
+        return self.annotate(
+            comment_count=Coalesce(Subquery(
+                comments.annotate(value=Count('pk')).values('value')), 0),
+            comments_updated=Subquery(
+                comments.annotate(value=Max('date_updated')).values('value')),
+        )
+
+    def close(self, closed_at):
+        """Close active listings and record the top bidder of each as the
+        winner in one set-based `UPDATE`. Return the number of closed
+        listings.
+        """
+
+        winner = Bid.objects.filter(listing=OuterRef('pk'))\
+            .order_by('-bid', 'date_added').values('user')[:1]
+
+        return self.filter(is_active=True).update(
+            is_active=False,
+            closed_at=closed_at,
+            date_updated=closed_at,
+            winner=Subquery(winner),
+        )
+
 class Listing(models.Model):
-    """A listing model."""
+    """A listing model.
+    Bid stats fields (`current_bid`, `max_bid`, `bid_count`, `last_bid_at`)
+    are denormalized from the `Bid` table and updated on each new bid.
+    `search_vector` is maintained by a database trigger from `name`,
+    `description`, and the owner's username (weighted A, B, C).
+    Auctions end at `ends_at` if set; `winner` and `closed_at` are recorded
+    when a listing is closed.
+    """
+
+    BID_STATS_FIELDS = ('current_bid', 'max_bid', 'bid_count', 'last_bid_at')
+    CLOSING_FIELDS = ('winner', 'closed_at')
+    DB_MAINTAINED_FIELDS = BID_STATS_FIELDS + CLOSING_FIELDS \
+        + ('search_vector',)
 
     category = models.ForeignKey(Category, on_delete=models.CASCADE)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -37,6 +140,43 @@ class Listing(models.Model):
     is_active = models.BooleanField(default=True)
     date_added = models.DateTimeField(auto_now_add=True)
     date_updated = models.DateTimeField(auto_now=True)
+    current_bid = models.DecimalField(max_digits=19, decimal_places=2)
+    max_bid = models.DecimalField(max_digits=19, decimal_places=2,
+        null=True, blank=True)
+    bid_count = models.PositiveIntegerField(default=0)
+    last_bid_at = models.DateTimeField(null=True, blank=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+    ends_at = models.DateTimeField(null=True, blank=True)
+    closed_at = models.DateTimeField(null=True, blank=True, editable=False)
+    winner = models.ForeignKey(User, on_delete=models.SET_NULL, null=True,
+        blank=True, editable=False, related_name='won_listings')
+
+    objects = ListingQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_active', 'current_bid'],
+                name='listing_active_cur_bid_idx'),
+            GinIndex(fields=['search_vector'],
+                name='listing_search_vector_idx'),
+            GinIndex(fields=['name'], opclasses=['gin_trgm_ops'],
+                name='listing_name_trgm_idx'),
+            models.Index(fields=['ends_at'], condition=Q(is_active=True),
+                name='listing_active_ends_at_idx'),
+            # listings pages: active listings, newest first, `pk` breaks
+            # ties of keyset pagination
+            models.Index(fields=['-date_added', '-id'],
+                condition=Q(is_active=True), name='listing_active_date_idx'),
+            models.Index(fields=['category', '-date_added', '-id'],
+                condition=Q(is_active=True),
+                name='listing_cat_active_date_idx'),
+            # orderings of the API over all listings (see
+            # `auctions.filters`), price ranges scan the bid index
+            models.Index(fields=['-date_added', '-id'],
+                name='listing_date_idx'),
+            models.Index(fields=['current_bid', 'id'],
+                name='listing_cur_bid_idx'),
+        ]
 
     def __str__(self) -> str:
         return self.name
@@ -46,29 +186,101 @@ class Listing(models.Model):
             'cat_slug': self.category.slug, 'listing_slug': self.slug
         })
 
+    def save(self, *args, **kwargs):
+        """Save the listing. Bid stats, closing results and the search
+        vector are never written from a possibly stale instance of an
+        existing listing, `current_bid` follows `start_bid` in the database
+        instead.
+        """
+
+        if self._state.adding:
+            self.current_bid = self.start_bid
+            return super().save(*args, **kwargs)
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            update_fields = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.DB_MAINTAINED_FIELDS
+            ]
+            kwargs['update_fields'] = update_fields
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if 'start_bid' in update_fields:
+                type(self).objects.filter(pk=self.pk).update(
+                    current_bid=Greatest('start_bid', 'max_bid'))
+
 class Bid(models.Model):
-    """A bid model."""
+    """A bid model.
+    Foreign keys are indexed by the composite indexes they lead.
+    """
 
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
-    listing = models.ForeignKey(Listing, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
+    listing = models.ForeignKey(Listing, on_delete=models.CASCADE,
+        db_index=False)
     bid = models.DecimalField(max_digits=19, decimal_places=2)
     date_added = models.DateTimeField(auto_now_add=True)
     date_updated = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # top bids of a listing
+            models.Index(fields=['listing', '-bid'],
+                name='bid_listing_bid_idx'),
+            # bids of a user, newest first
+            models.Index(fields=['user', '-date_added', '-id'],
+                name='bid_user_date_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        """Save the bid. Update bid stats of the listing in the same
+        transaction: by the bid if it's new, otherwise (e.g. edited in the
+        admin) rebuild stats of its listing and of a listing it's moved
+        from. Stats are rebuilt on deletes by `signals`.
+        """
+
+        adding = self._state.adding
+        with transaction.atomic():
+            if not adding:
+                listings = {self.listing_id, *type(self).objects.filter(
+                    pk=self.pk).values_list('listing', flat=True)}
+            super().save(*args, **kwargs)
+            if adding:
+                Listing.objects.filter(pk=self.listing_id).record_bid(
+                    self.bid, self.date_added)
+            else:
+                Listing.objects.filter(pk__in=listings).rebuild_bid_stats()
+
 class Comment(models.Model):
     """A comment model."""
 
     user = models.ForeignKey(User, on_delete=models.CASCADE)
-    listing = models.ForeignKey(Listing, on_delete=models.CASCADE)
+    listing = models.ForeignKey(Listing, on_delete=models.CASCADE,
+        db_index=False)
     text = models.TextField(max_length=3000)
     date_added = models.DateTimeField(auto_now_add=True)
     date_updated = models.DateTimeField(auto_now=True)
     # is_active = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # comments of a listing, newest first
+            models.Index(fields=['listing', '-date_added'],
+                name='comment_listing_date_idx'),
+        ]
+
 class Watchlist(models.Model):
-    """A watchlist model."""
+    """A watchlist model. A listing is watched by a user once."""
 
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
     listing = models.ForeignKey(Listing, on_delete=models.CASCADE)
     date_added = models.DateTimeField(auto_now_add=True)
     date_updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'listing'],
+                name='watchlist_user_listing_uniq'),
+        ]
@@ -0,0 +1,206 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections.abc import Sequence
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+class InvalidCursor(ValueError):
+    """A cursor can't be decoded or doesn't match the ordering."""
+
+class InvalidOrdering(ValueError):
+    """A query set's ordering can't be paginated by a keyset."""
+
+
+def estimate_count(query):
+    """Return the number of rows of a query set estimated by the query
+    planner without running the query.
+    """
+
+    sql, params = query.query.sql_with_params()
+    with connections[query.db].cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """A page number paginator that counts rows exactly only if the planner
+    estimates no more than `exact_count_limit` rows. Bigger counts are
+    estimated, so deep result sets don't run a `COUNT(*)` per page.
+    """
+
+    exact_count_limit = 10000
+
+    @cached_property
+    def count(self):
+        """Return the exact or the estimated number of objects."""
+
+        if not hasattr(self.object_list, 'query'):
+            return super().count
+        estimate = estimate_count(self.object_list)
+        if estimate <= self.exact_count_limit:
+            return super().count
+        return estimate
+
+
+class KeysetPage(Sequence):
+    """A page of a keyset paginator.
+    Contains `object_list`, `next_cursor`, and `previous_cursor`.
+    """
+
+    is_keyset = True
+
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<Keyset page of {len(self)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """Paginate a query set by a cursor instead of an offset.
+    A cursor keeps values of the ordering fields and the primary key of an
+    edge row of a page, so any page is fetched by an index range scan over
+    the ordering, e.g. (`date_added`, `id`) or (`current_bid`, `id`), without
+    counting rows.
+    """
+
+    def __init__(self, object_list, per_page):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.fields = self.get_fields()
+
+    def get_fields(self):
+        """Return the ordering as a list of (field, descending) pairs ended
+        by the primary key. Raise `InvalidOrdering` if the ordering isn't by
+        plain non-null model fields.
+        """
+
+        opts = self.object_list.model._meta
+        query = self.object_list.query
+        ordering = query.order_by or opts.ordering or ['pk']
+
+        fields = []
+        for name in ordering:
+            if not isinstance(name, str) or name.lstrip('-') == '?':
+                raise InvalidOrdering(f'Unsupported ordering: {name!r}.')
+            descending = name.startswith('-')
+            name = name.lstrip('-')
+            if name in ('pk', opts.pk.name):
+                fields.append(('pk', descending))
+                return fields
+            try:
+                field = opts.get_field(name)
+            except FieldDoesNotExist:
+                raise InvalidOrdering(f'Unsupported ordering: {name!r}.')
+            if not field.concrete or field.null:
+                raise InvalidOrdering(f'Unsupported ordering: {name!r}.')
+            fields.append((field.attname, descending))
+
+        fields.append(('pk', fields[0][1]))
+        return fields
+
+    def get_value(self, obj, name):
+        """Return a field value of an object or a row of `.values()`."""
+
+        if not isinstance(obj, dict):
+            return getattr(obj, name)
+        if name == 'pk':
+            name = self.object_list.model._meta.pk.attname
+        return obj[name]
+
+    def encode_cursor(self, obj, reverse):
+        """Encode a cursor pointing at an object."""
+
+        values = [self.get_value(obj, name) for name, _ in self.fields]
+        data = json.dumps({'v': values, 'r': reverse}, default=str)
+        return urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Decode a cursor into field values and a direction. Raise
+        `InvalidCursor` if the cursor is malformed.
+        """
+
+        opts = self.object_list.model._meta
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            data = json.loads(urlsafe_b64decode(padded.encode()))
+            values, reverse = data['v'], bool(data['r'])
+            if len(values) != len(self.fields):
+                raise ValueError
+            values = [
+                (opts.pk if name == 'pk' else opts.get_field(name))
+                .to_python(value)
+                for (name, _), value in zip(self.fields, values)
+            ]
+        except Exception:
+            raise InvalidCursor('Invalid cursor.')
+        return values, reverse
+
+    def get_keyset_filter(self, values, reverse):
+        """Return a filter of rows after the cursor values in the ordering
+        (or before them if `reverse`). The bound on the first field lets the
+        database use an index range.
+        """
+
+        condition = Q(pk__in=[])
+        for index, (name, descending) in enumerate(self.fields):
+            lookup = 'lt' if descending != reverse else 'gt'
+            equal = {prev: value for (prev, _), value
+                in zip(self.fields[:index], values)}
+            condition |= Q(**equal, **{f'{name}__{lookup}': values[index]})
+
+        name, descending = self.fields[0]
+        bound = 'lte' if descending != reverse else 'gte'
+        return Q(**{f'{name}__{bound}': values[0]}) & condition
+
+    def page(self, cursor=None):
+        """Return a `KeysetPage` after the cursor (the first page if the
+        cursor is empty).
+        """
+
+        values, reverse = self.decode_cursor(cursor) if cursor else (None, False)
+
+        ordering = [('-' if descending != reverse else '') + name
+            for name, descending in self.fields]
+        query = self.object_list.order_by(*ordering)
+        if values is not None:
+            query = query.filter(self.get_keyset_filter(values, reverse))
+
+        rows = list(query[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if reverse:
+            rows.reverse()
+
+        next_cursor = previous_cursor = None
+        if rows and (has_more if not reverse else values is not None):
+            next_cursor = self.encode_cursor(rows[-1], reverse=False)
+        if rows and (has_more if reverse else values is not None):
+            previous_cursor = self.encode_cursor(rows[0], reverse=True)
+
+        return KeysetPage(rows, next_cursor, previous_cursor)
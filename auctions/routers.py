@@ -0,0 +1,173 @@
+import hashlib
+import random
+from contextvars import ContextVar
+from time import monotonic
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+from .async_views import AsyncCapableMiddleware, get_read_executor
+
+
+PIN_KEY = 'auctions:db:primary_pin:{ident}'
+
+# a replica the current request reads from, `None` reads from the primary
+read_database = ContextVar('read_database', default=None)
+
+LAG_SQL = """
+SELECT CASE WHEN NOT pg_is_in_recovery()
+        OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp())
+END
+"""
+
+
+class ReplicaHealth:
+    """Replication lag checks of replicas, cached in the process for
+    `CHECK_INTERVAL` seconds.
+    """
+
+    def __init__(self):
+        self.checks = {}
+
+    def get_lag(self, alias):
+        """Return the replication lag of a replica in seconds, or `None` if
+        it's unavailable.
+        """
+
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute(LAG_SQL)
+                return float(cursor.fetchone()[0] or 0)
+        except DatabaseError:
+            return None
+
+    def is_healthy(self, alias, options):
+        healthy, checked = self.checks.get(alias, (None, None))
+        if checked is None or monotonic() - checked >= options['CHECK_INTERVAL']:
+            lag = self.get_lag(alias)
+            healthy = lag is not None and lag <= options['MAX_LAG']
+            self.checks[alias] = (healthy, monotonic())
+        return healthy
+
+    def get_replicas(self, options):
+        """Return aliases of replicas lagging less than `MAX_LAG`."""
+
+        return [alias for alias in options['REPLICAS']
+            if self.is_healthy(alias, options)]
+
+
+health = ReplicaHealth()
+
+
+class ReplicaRouter:
+    """Route reads of read-only requests to a replica chosen by
+    `ReplicaMiddleware`; other reads, reads in transactions and all writes
+    go to the primary (`default`). Migrations run on the primary only.
+    """
+
+    def db_for_read(self, model, **hints):
+        replica = read_database.get()
+        if replica is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return replica
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def get_pin_ident(request):
+    """Return an identity of the requester pinned to the primary after a
+    write: an API token or a logged in user, otherwise `None`.
+    """
+
+    authorization = request.headers.get('Authorization')
+    if authorization:
+        return hashlib.md5(authorization.encode(),
+            usedforsecurity=False).hexdigest()
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    return None
+
+
+class ReplicaMiddleware(AsyncCapableMiddleware):
+    """Choose a database of a request's reads. Safe requests read from a
+    healthy replica, unless their view sets `use_primary` (e.g. it writes
+    on `GET`) or the requester wrote within the last `PIN_SECONDS`, so
+    users see their own bids and comments.
+    Options are set by the `AUCTION_DB_ROUTING` setting: `REPLICAS`,
+    `MAX_LAG` and `CHECK_INTERVAL` (seconds), and `PIN_SECONDS`.
+    Place it after `AuthenticationMiddleware`. Under ASGI the replica is
+    chosen in a thread of `auctions.async_views`, and set in the context
+    of the request's task, which views run in.
+    """
+
+    async_hooks = ('process_view',)
+
+    def call(self, request):
+        token = read_database.set(None)
+        try:
+            response = self.get_response(request)
+        finally:
+            read_database.reset(token)
+        self.pin(request, response)
+        return response
+
+    async def __acall__(self, request):
+        token = read_database.set(None)
+        try:
+            response = await self.get_response(request)
+        finally:
+            read_database.reset(token)
+        self.pin(request, response)
+        return response
+
+    def pin(self, request, response):
+        """Pin a requester to the primary after a successful write."""
+
+        if self.is_write(request) and response.status_code < 400:
+            ident = get_pin_ident(request)
+            if ident is not None:
+                cache.set(PIN_KEY.format(ident=ident), True,
+                    settings.AUCTION_DB_ROUTING['PIN_SECONDS'])
+
+    def is_write(self, request):
+        return request.method not in ('GET', 'HEAD', 'OPTIONS') or \
+            getattr(request, 'use_primary', False)
+
+    def get_read_database(self, request, view_func):
+        """Return a replica the request reads from, or `None` for the
+        primary.
+        """
+
+        options = settings.AUCTION_DB_ROUTING
+        view_class = getattr(view_func, 'view_class',
+            getattr(view_func, 'cls', None))
+        request.use_primary = getattr(view_class, 'use_primary', False)
+        if not options['REPLICAS'] or self.is_write(request):
+            return None
+
+        ident = get_pin_ident(request)
+        if ident is not None and cache.get(PIN_KEY.format(ident=ident)):
+            return None
+
+        replicas = health.get_replicas(options)
+        return random.choice(replicas) if replicas else None
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        read_database.set(self.get_read_database(request, view_func))
+        return None
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        read_database.set(await sync_to_async(self.get_read_database,
+            thread_sensitive=False, executor=get_read_executor())(
+            request, view_func))
+        return None
@@ -0,0 +1,186 @@
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+from django.utils.text import slugify
+
+from .cache import invalidate_listing, invalidate_listings
+from .events import publish_listing_event, get_listing_state
+from .metrics import count_bid
+from .models import Listing, Bid
+from .signals import listings_created
+
+
+SLUG_SUFFIX_LENGTH = 8
+SLUG_SUFFIX_CHARS = 'abcdefghijklmnopqrstuvwxyz0123456789'
+SLUG_ATTEMPTS = 5
+
+
+@dataclass(frozen=True)
+class BidResult:
+    """A result of a bid placement.
+    Fields: `accepted`, `reason` (a rejection message), `bid` (the created
+    bid if accepted), and `current_bid` (the listing's current bid after
+    the placement).
+    """
+
+    accepted: bool
+    current_bid: Decimal
+    bid: Bid | None = None
+    reason: str = ''
+
+
+def place_bid(listing, user, amount):
+    """Place a bid on a listing. The check and the insert are done in one
+    transaction under a row lock of the listing, so concurrent bids on the
+    same listing are serialized and only strictly increasing bids are
+    accepted. Subscribers of the listing are notified after commit.
+    Return a `BidResult`.
+    """
+
+    with transaction.atomic():
+        locked = Listing.objects.select_for_update().only(
+            'user', 'slug', 'is_active', 'ends_at', *Listing.BID_STATS_FIELDS
+        ).get(pk=listing.pk)
+
+        def reject(reason):
+            count_bid(accepted=False)
+            return BidResult(accepted=False, reason=reason,
+                current_bid=locked.current_bid)
+
+        if not locked.is_active or (locked.ends_at
+                and locked.ends_at <= timezone.now()):
+            return reject('Listing is closed.')
+        if locked.user_id == user.pk:
+            return reject('User cannot bid own listings.')
+        if amount <= locked.current_bid:
+            return reject('Bid must be higher than current.')
+
+        bid = Bid.objects.create(listing=locked, user=user, bid=amount)
+        locked.current_bid = amount
+        locked.max_bid = amount
+        locked.bid_count += 1
+        locked.last_bid_at = bid.date_added
+        state = get_listing_state(locked)
+        transaction.on_commit(
+            lambda: publish_listing_event(locked.slug, 'bid', state))
+
+    count_bid(accepted=True)
+    return BidResult(accepted=True, bid=bid, current_bid=bid.bid)
+
+
+def notify_closed(listings):
+    """Invalidate cached pages of closed listings and publish `closed`
+    events to their subscribers after commit. Closing is done by a bulk
+    `UPDATE`, which doesn't send model signals.
+    """
+
+    transaction.on_commit(invalidate_listings)
+    for listing in listings:
+        state = get_listing_state(listing)
+
+        def notify(slug=listing.slug, state=state):
+            invalidate_listing(slug)
+            publish_listing_event(slug, 'closed', state)
+
+        transaction.on_commit(notify)
+
+
+def close_listing(listing):
+    """Close a listing, record its winner and notify its subscribers after
+    commit. Return the listing.
+    """
+
+    with transaction.atomic():
+        Listing.objects.filter(pk=listing.pk).close(timezone.now())
+        listing.refresh_from_db(fields=('is_active', *Listing.CLOSING_FIELDS))
+        notify_closed([listing])
+
+    return listing
+
+
+def close_expired_listings(batch_size=500, now=None):
+    """Close a batch of active listings whose auctions have ended. Winners
+    are determined from the `Bid` table by the same `UPDATE`. Listings
+    locked by a bid in progress or by another worker are skipped until the
+    next batch. Return the closed listings.
+    """
+
+    now = now or timezone.now()
+    with transaction.atomic():
+        ids = list(Listing.objects
+            .filter(is_active=True, ends_at__lte=now)
+            .order_by('ends_at')
+            .select_for_update(skip_locked=True)
+            .values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return []
+
+        Listing.objects.filter(pk__in=ids).close(now)
+        closed = list(Listing.objects.filter(pk__in=ids)
+            .order_by('ends_at')
+            .only('slug', 'is_active', *Listing.BID_STATS_FIELDS))
+        notify_closed(closed)
+
+    return closed
+
+
+def generate_listing_slug(name):
+    """Return a slug of a listing name with a random suffix. Collisions of
+    36^8 suffixes are improbable, so no query is made to check them.
+    """
+
+    suffix = get_random_string(SLUG_SUFFIX_LENGTH, SLUG_SUFFIX_CHARS)
+    max_length = Listing._meta.get_field('slug').max_length - len(suffix) - 1
+    name = slugify(name)[:max_length].strip('-_') or 'listing'
+    return f'{name}-{suffix}'
+
+
+def create_listing(listing):
+    """Save a new listing with a generated unique slug in one `INSERT`. On
+    a slug collision the insert is retried with a new slug. Return the
+    listing.
+    """
+
+    for attempt in range(1, SLUG_ATTEMPTS + 1):
+        listing.slug = generate_listing_slug(listing.name)
+        try:
+            with transaction.atomic():
+                listing.save(force_insert=True)
+            return listing
+        except IntegrityError:
+            if attempt == SLUG_ATTEMPTS or not Listing.objects.filter(
+                    slug=listing.slug).exists():
+                raise
+
+
+def bulk_create_listings(listings, batch_size=None):
+    """Create new listings with generated unique slugs by `bulk_create`.
+    On a slug collision all of them are retried with new slugs. No
+    `post_save` is sent, so listing pages are invalidated after commit and
+    `listings_created` is sent explicitly. Return the created listings.
+    """
+
+    for listing in listings:
+        listing.current_bid = listing.start_bid
+
+    for attempt in range(1, SLUG_ATTEMPTS + 1):
+        slugs = set()
+        for listing in listings:
+            listing.slug = generate_listing_slug(listing.name)
+            while listing.slug in slugs:
+                listing.slug = generate_listing_slug(listing.name)
+            slugs.add(listing.slug)
+        try:
+            with transaction.atomic():
+                created = Listing.objects.bulk_create(listings,
+                    batch_size=batch_size)
+                transaction.on_commit(invalidate_listings)
+                listings_created.send(sender=Listing, listings=created)
+            return created
+        except IntegrityError:
+            if attempt == SLUG_ATTEMPTS or not Listing.objects.filter(
+                    slug__in=slugs).exists():
+                raise
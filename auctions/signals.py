@@ -0,0 +1,123 @@
+import threading
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import Signal, receiver
+
+from .cache import invalidate_listing, invalidate_listings
+from .models import Category, Listing, Bid, Comment
+
+
+# Sent with `listings` created by `bulk_create`, which sends no `post_save`
+# (see `services.bulk_create_listings`).
+listings_created = Signal()
+
+
+# Pages are invalidated after commit, so a concurrent request can't cache
+# a page rendered from data before the write.
+
+
+def get_listing_slug(instance):
+    """Return the slug of a bid's or a comment's listing, without a query
+    if the listing is already loaded.
+    """
+
+    if type(instance).listing.is_cached(instance):
+        return instance.listing.slug
+    return Listing.objects.filter(pk=instance.listing_id)\
+        .values_list('slug', flat=True).first()
+
+
+@receiver(post_save, sender=Listing)
+@receiver(post_delete, sender=Listing)
+def invalidate_listing_pages(sender, instance, **kwargs):
+    """Invalidate cached listing pages on listing changes."""
+
+    slug = instance.slug
+    transaction.on_commit(invalidate_listings)
+    transaction.on_commit(lambda: invalidate_listing(slug))
+
+
+class BidDeletions(threading.local):
+    """Bids a thread is deleting, mapped to their listings, and listings
+    deleted with them, per database.
+    A delete sends `pre_delete` of all its objects (bids before their
+    listings), then deletes each model's rows and sends their
+    `post_delete`: the first deleted bid rebuilds stats of all listings
+    left at once, in the deleting transaction.
+    """
+
+    def __init__(self):
+        self.bids = defaultdict(dict)
+        self.listings = defaultdict(set)
+
+
+bid_deletions = BidDeletions()
+
+
+@receiver(pre_delete, sender=Bid)
+def collect_deleted_bid(sender, instance, using, **kwargs):
+    if bid_deletions.listings[using]:
+        # left by a failed delete, bids precede listings of a new one
+        bid_deletions.bids[using].clear()
+        bid_deletions.listings[using].clear()
+    bid_deletions.bids[using][instance.pk] = instance.listing_id
+
+
+@receiver(pre_delete, sender=Listing)
+def collect_deleted_listing(sender, instance, using, **kwargs):
+    bid_deletions.listings[using].add(instance.pk)
+
+
+@receiver(post_delete, sender=Listing)
+def forget_deleted_listing(sender, instance, using, **kwargs):
+    bid_deletions.listings[using].discard(instance.pk)
+
+
+@receiver(post_delete, sender=Bid)
+def rebuild_listing_bid_stats(sender, instance, using, **kwargs):
+    """Recompute bid stats of listings of deleted bids in one set-based
+    `UPDATE` of the deleting transaction (bids are deleted by the admin or
+    with their users too). Listings deleted with the bids are skipped.
+    """
+
+    bids = bid_deletions.bids[using]
+    if instance.pk not in bids:
+        # rebuilt by an earlier bid of the delete
+        return
+
+    listing_ids = set(bids.values()) - bid_deletions.listings[using]
+    bids.clear()
+    if listing_ids:
+        Listing.objects.using(using).filter(pk__in=listing_ids)\
+            .rebuild_bid_stats()
+
+
+@receiver(post_save, sender=Bid)
+@receiver(post_delete, sender=Bid)
+def invalidate_bid_pages(sender, instance, **kwargs):
+    """Invalidate cached listing pages on bids, which change current bids
+    shown on every listing page.
+    """
+
+    slug = get_listing_slug(instance)
+    transaction.on_commit(invalidate_listings)
+    transaction.on_commit(lambda: invalidate_listing(slug))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_pages(sender, instance, **kwargs):
+    """Invalidate the cached detail page of a commented listing."""
+
+    slug = get_listing_slug(instance)
+    transaction.on_commit(lambda: invalidate_listing(slug))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_pages(sender, **kwargs):
+    """Invalidate cached listing pages on category changes."""
+
+    transaction.on_commit(invalidate_listings)
@@ -0,0 +1,214 @@
+import asyncio
+import json
+import threading
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from auctions_api.mixins import RelatedListMixin
+from .. import async_views
+from ..models import Bid, Category, Listing
+
+User = get_user_model()
+
+
+class AsyncReadViewTest(TransactionTestCase):
+    """A test case for reads served by async views in shared threads under
+    ASGI, writes run in the request's thread.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username='owner')
+        self.customer = User.objects.create_user(username='customer')
+        category = Category.objects.create(name='Cat', slug='cat')
+        self.listing = Listing.objects.create(
+            category = category,
+            user = self.owner,
+            name = 'Listing',
+            slug = 'listing',
+            description = 'A description for test listing.',
+            start_bid = 10)
+
+        self.threads = []
+        run_view = async_views.run_view
+
+        def record_thread(*args, **kwargs):
+            self.threads.append(threading.current_thread().name)
+            return run_view(*args, **kwargs)
+
+        patcher = mock.patch.object(async_views, 'run_view', record_thread)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_pages_read_in_shared_threads(self):
+        for url in (reverse('auctions:index'), reverse('auctions:categories'),
+                reverse('auctions:listings', args=['cat']),
+                reverse('auctions:search_listing') + '?q=listing',
+                self.listing.get_absolute_url()):
+            resp = await self.async_client.get(url)
+            self.assertEqual(resp.status_code, 200)
+        self.assertContains(resp, 'Listing')
+        self.assertEqual(len(self.threads), 5)
+        self.assertTrue(all(name.startswith('async-read')
+            for name in self.threads))
+
+    async def test_concurrent_reads(self):
+        responses = await asyncio.gather(*(self.async_client.get(
+            f'/api/v1/listings/{self.listing.pk}/') for _ in range(10)))
+        self.assertEqual({resp.status_code for resp in responses}, {200})
+        self.assertEqual(responses[0].json()['name'], 'Listing')
+        self.assertEqual(len(self.threads), 10)
+
+    async def test_api_lists(self):
+        for url in ('/api/v1/listings/', '/api/v1/categories/',
+                f'/api/v1/listings/{self.listing.pk}/bids/',
+                f'/api/v1/listings/{self.listing.pk}/comments/'):
+            resp = await self.async_client.get(url)
+            self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(self.threads), 4)
+
+    async def test_writes_in_shared_threads(self):
+        await sync_to_async(self.async_client.force_login)(self.customer)
+        resp = await self.async_client.post(self.listing.get_absolute_url(),
+            'bid=15&bid_submit=bid',
+            content_type='application/x-www-form-urlencoded')
+        self.assertEqual(resp.status_code, 302)
+        self.assertEqual(len(self.threads), 1)
+        self.assertTrue(self.threads[0].startswith('async-read'))
+        self.assertTrue(await sync_to_async(
+            Bid.objects.filter(listing=self.listing, bid=15).exists)())
+
+
+class ASGIRequestMixin:
+    """A mixin requesting paths from the ASGI handler of the project."""
+
+    async def request(self, path, query_string=b''):
+        """Request a path from the ASGI handler, return sent messages."""
+
+        messages = []
+        received = asyncio.Queue()
+        received.put_nowait({'type': 'http.request'})
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {'type': 'http', 'method': 'GET', 'path': path,
+            'query_string': query_string, 'headers': [],
+            'server': ('testserver', 80)}
+        await async_views.ASGIHandler()(scope, received.get, send)
+        return messages
+
+
+class ASGIHandlerTest(ASGIRequestMixin, TransactionTestCase):
+    """A test case for threads of requests served by the ASGI handler:
+    views run in the shared threads, middleware in the event loop.
+    """
+
+    def setUp(self):
+        owner = User.objects.create_user(username='owner')
+        category = Category.objects.create(name='Cat', slug='cat')
+        self.listing = Listing.objects.create(
+            category = category,
+            user = owner,
+            name = 'Listing',
+            slug = 'listing',
+            description = 'A description for test listing.',
+            start_bid = 1)
+
+    async def test_threads_are_bounded(self):
+        threads = threading.active_count()
+        counts = []
+        run_view = async_views.run_view
+
+        def count_threads(*args, **kwargs):
+            counts.append(threading.active_count())
+            return run_view(*args, **kwargs)
+
+        with mock.patch.object(async_views, 'run_view', count_threads):
+            responses = await asyncio.gather(*(self.request(path)
+                for path in ['/api/v1/listings/', '/', '/categories/'] * 20))
+
+        self.assertEqual({start['status'] for start, *_ in responses}, {200})
+        self.assertEqual(len(counts), 60)
+        self.assertLessEqual(max(counts) - threads,
+            settings.AUCTION_ASYNC_READ_THREADS + 1)
+
+    @override_settings(AUCTION_REQUEST_METRICS={
+        **settings.AUCTION_REQUEST_METRICS, 'SAMPLE_RATE': 1})
+    async def test_template_responses_are_timed(self):
+        cache.clear()
+        start, *_ = await self.request('/categories/')
+        self.assertEqual(start['status'], 200)
+        self.assertIn(b'render;dur=', dict(start['headers'])[b'Server-Timing'])
+
+    async def test_sync_views_run_in_shared_threads(self):
+        names = []
+        run_view = async_views.run_view
+
+        def record_thread(*args, **kwargs):
+            names.append(threading.current_thread().name)
+            return run_view(*args, **kwargs)
+
+        with mock.patch.object(async_views, 'run_view', record_thread):
+            start, *_ = await self.request('/account/login')
+        self.assertEqual(start['status'], 200)
+        self.assertEqual(len(names), 1)
+        self.assertTrue(names[0].startswith('async-read'))
+
+
+class AsyncStreamTest(ASGIRequestMixin, TransactionTestCase):
+    """A test case for NDJSON streams served by the ASGI handler: parts
+    are read by a query of their own in shared threads, off the event
+    loop.
+    """
+
+    def setUp(self):
+        owner = User.objects.create_user(username='owner')
+        customer = User.objects.create_user(username='customer')
+        category = Category.objects.create(name='Cat', slug='cat')
+        self.listing = Listing.objects.create(
+            category = category,
+            user = owner,
+            name = 'Listing',
+            slug = 'listing',
+            description = 'A description for test listing.',
+            start_bid = 1)
+        for num in range(12):
+            Bid.objects.create(user=customer, listing=self.listing,
+                bid=num + 2)
+
+        self.threads = []
+        read_part = async_views.read_part
+
+        def record_thread(parts):
+            self.threads.append(threading.current_thread().name)
+            return read_part(parts)
+
+        for patcher in (
+                mock.patch.object(async_views, 'read_part', record_thread),
+                mock.patch.object(RelatedListMixin, 'stream_chunk_size', 5)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_bids_are_streamed_in_chunks(self):
+        start, *bodies = await self.request(
+            f'/api/v1/listings/{self.listing.pk}/bids/', b'format=ndjson')
+        self.assertEqual(start['status'], 200)
+        self.assertIn((b'Content-Type', b'application/x-ndjson'),
+            start['headers'])
+
+        self.assertEqual(len(bodies), 4)
+        self.assertFalse(bodies[-1].get('more_body', False))
+        lines = b''.join(body['body'] for body in bodies).decode()\
+            .splitlines()
+        self.assertEqual([json.loads(line)['bid'] for line in lines],
+            [f'{num + 2}.00' for num in reversed(range(12))])
+        self.assertEqual(len(self.threads), 4)
+        self.assertTrue(all(name.startswith('async-read')
+            for name in self.threads))
@@ -0,0 +1,82 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from ..cache import get_page_cache_stats
+from ..models import Category, Listing, Bid, Comment
+
+User = get_user_model()
+
+
+class AnonymousPageCacheTest(TestCase):
+    """A test case for the anonymous page cache."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username='owner')
+        cls.customer = User.objects.create_user(username='customer')
+        cls.category = Category.objects.create(name='Cat', slug='cat')
+        cls.listing = Listing.objects.create(
+            category = cls.category,
+            user = cls.owner,
+            name = 'Listing',
+            slug = 'listing',
+            description = 'A description for test listing.',
+            start_bid = 10)
+
+    def setUp(self):
+        cache.clear()
+        self.index = reverse('auctions:index')
+        self.detail = reverse('auctions:listing',
+            args=[self.category.slug, self.listing.slug])
+
+    def test_anonymous_page_is_served_from_cache(self):
+        self.client.get(self.index)
+        with self.assertNumQueries(0):
+            resp = self.client.get(self.index)
+        self.assertContains(resp, 'Listing')
+        self.assertEqual(get_page_cache_stats(), {'hits': 1, 'misses': 1})
+
+    def test_cache_key_depends_on_whitelisted_params_only(self):
+        self.client.get(self.index, {'lst_sort': 'name'})
+        with self.assertNumQueries(0):
+            self.client.get(self.index, {'lst_sort': 'name', 'utm': 'x'})
+        # one keyset page query, no count
+        with self.assertNumQueries(1):
+            self.client.get(self.index, {'lst_sort': 'bid_desc'})
+
+    def test_authenticated_page_is_not_cached(self):
+        self.client.force_login(self.customer)
+        self.client.get(self.index)
+        resp = self.client.get(self.index)
+        self.assertIsNotNone(resp.context)
+        self.assertEqual(get_page_cache_stats(), {'hits': 0, 'misses': 0})
+
+    def test_bid_invalidates_listing_pages(self):
+        self.client.get(self.index)
+        self.client.get(self.detail)
+        with self.captureOnCommitCallbacks(execute=True):
+            Bid.objects.create(
+                user=self.customer, listing=self.listing, bid=42)
+        self.assertContains(self.client.get(self.index), '42')
+        self.assertContains(self.client.get(self.detail), '42')
+
+    def test_comment_invalidates_detail_page_only(self):
+        self.client.get(self.index)
+        self.client.get(self.detail)
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(user=self.customer, listing=self.listing,
+                text='Fresh comment.')
+        self.assertContains(self.client.get(self.detail), 'Fresh comment.')
+        with self.assertNumQueries(0):
+            self.client.get(self.index)
+
+    def test_stats_are_staff_only(self):
+        resp = self.client.get(reverse('auctions:cache_stats'))
+        self.assertEqual(resp.status_code, 302)
+
+        self.client.force_login(
+            User.objects.create_user(username='staff', is_staff=True))
+        resp = self.client.get(reverse('auctions:cache_stats'))
+        self.assertEqual(resp.json(), {'hits': 0, 'misses': 0})
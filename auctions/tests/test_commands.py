@@ -0,0 +1,203 @@
+import json
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import DatabaseError
+from django.test import LiveServerTestCase, SimpleTestCase, TestCase
+from django.utils import timezone
+
+from account.models import User
+from ..management.commands.load_test import parse_mix, percentile
+from ..models import Category, Listing, Bid, Comment, Watchlist
+
+
+class RebuildBidStatsCommandTest(TestCase):
+    """A test case for the `rebuild_bid_stats` command."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create(username='Owner')
+        cls.customer = User.objects.create(username='Customer')
+        cls.category = Category.objects.create(name='Cat', slug='cat')
+        cls.listing = Listing.objects.create(
+            category=cls.category, user=cls.owner, name='Listing',
+            slug='listing', description='Description', start_bid=10)
+        for bid in (11, 15, 12):
+            Bid.objects.create(
+                user=cls.customer, listing=cls.listing, bid=bid)
+
+    def test_check_passes_without_drift(self):
+        out = StringIO()
+        call_command('rebuild_bid_stats', '--check', stdout=out)
+        self.assertIn('No drift found.', out.getvalue())
+
+    def test_check_fails_on_drift(self):
+        Listing.objects.update(bid_count=0, max_bid=None)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_bid_stats', '--check', stdout=StringIO())
+
+    def test_rebuild_fixes_drift(self):
+        Listing.objects.update(bid_count=0, max_bid=None, current_bid=10)
+        call_command('rebuild_bid_stats', stdout=StringIO())
+        listing = Listing.objects.get(pk=self.listing.pk)
+        self.assertEqual(listing.bid_count, 3)
+        self.assertEqual(listing.max_bid, 15)
+        self.assertEqual(listing.current_bid, 15)
+        call_command('rebuild_bid_stats', '--check', stdout=StringIO())
+
+
+class CloseAuctionsCommandTest(TestCase):
+    """A test case for the `close_auctions` command."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create(username='Owner')
+        cls.category = Category.objects.create(name='Cat', slug='cat')
+        for num, minutes in enumerate((-2, -1, -1, 1)):
+            Listing.objects.create(
+                category=cls.category, user=cls.owner, name='Listing',
+                slug=f'listing-{num}', description='Description',
+                start_bid=10,
+                ends_at=timezone.now() + timedelta(minutes=minutes))
+
+    def test_once_closes_all_ended_auctions_in_batches(self):
+        out = StringIO()
+        call_command('close_auctions', '--once', '--batch-size', '2',
+            stdout=out)
+        self.assertIn('Closed 3 listing(s).', out.getvalue())
+        self.assertEqual(Listing.objects.filter(is_active=True).count(), 1)
+
+
+class CloseAuctionsWorkerTest(SimpleTestCase):
+    """A test case for the polling worker of the `close_auctions` command."""
+
+    command = 'auctions.management.commands.close_auctions'
+
+    def test_worker_survives_database_errors(self):
+        out = StringIO()
+        with mock.patch(f'{self.command}.close_old_connections') as close, \
+                mock.patch(f'{self.command}.close_expired_listings',
+                    side_effect=[DatabaseError, [1], []]), \
+                mock.patch(f'{self.command}.time.sleep',
+                    side_effect=[None, None, KeyboardInterrupt]), \
+                self.assertLogs(self.command, 'ERROR'):
+            call_command('close_auctions', stdout=out)
+        self.assertEqual(close.call_count, 3)
+        self.assertIn('Closed 1 listing(s).', out.getvalue())
+
+
+class SeedAuctionsCommandTest(TestCase):
+    """A test case for the `seed_auctions` command."""
+
+    options = ('--users', '10', '--categories', '2', '--listings', '30',
+        '--bids', '300', '--comments', '40', '--watchlists', '30',
+        '--batch-size', '7')
+
+    def seed(self, *args):
+        out = StringIO()
+        call_command('seed_auctions', *self.options, *args, stdout=out)
+        return out.getvalue()
+
+    def test_dataset_is_consistent(self):
+        out = self.seed()
+        self.assertIn('Seeded the dataset.', out)
+        self.assertIn('rows/s', out)
+
+        self.assertEqual(User.objects.count(), 10)
+        self.assertEqual(Listing.objects.count(), 30)
+        self.assertEqual(Bid.objects.count(), 300)
+        self.assertEqual(Comment.objects.count(), 40)
+        self.assertEqual(Watchlist.objects.count(), 30)
+
+        # denormalized bid stats match the bids
+        call_command('rebuild_bid_stats', '--check', stdout=StringIO())
+
+        for listing in Listing.objects.filter(bid_count__gt=1):
+            bids = list(listing.bid_set.order_by('date_added', 'pk'))
+            self.assertEqual(bids, sorted(bids, key=lambda bid: bid.bid))
+            self.assertNotIn(listing.user_id, {bid.user_id for bid in bids})
+
+        for listing in Listing.objects.filter(is_active=False):
+            top_bid = listing.bid_set.order_by('-bid').first()
+            self.assertEqual(listing.winner_id,
+                top_bid.user_id if top_bid else None)
+            self.assertLessEqual(listing.closed_at, timezone.now())
+
+    def test_dataset_is_deterministic_by_seed(self):
+        self.seed('--prefix', 'first')
+        self.seed('--prefix', 'second')
+        first, second = (list(Bid.objects.filter(
+            user__username__startswith=prefix).order_by('pk')
+            .values_list('bid', flat=True)) for prefix in ('first', 'second'))
+        self.assertEqual(first, second)
+
+    def test_existing_prefix_is_rejected(self):
+        self.seed()
+        with self.assertRaises(CommandError):
+            self.seed()
+
+
+class LoadTestCommandTest(LiveServerTestCase):
+    """A test case for the `load_test` command run against a live server."""
+
+    def setUp(self):
+        owner = User.objects.create(username='Owner')
+        category = Category.objects.create(name='Cat', slug='cat')
+        Listing.objects.create(category=category, user=owner,
+            name='Listing', slug='listing', description='Description',
+            start_bid=10)
+        self.output = tempfile.NamedTemporaryFile(suffix='.json')
+
+    def tearDown(self):
+        self.output.close()
+
+    def load_test(self, *args):
+        call_command('load_test', '--url', self.live_server_url,
+            '--concurrency', '2', '--warmup', '0', '--duration', '1',
+            '--output', self.output.name, *args, stdout=StringIO())
+        with open(self.output.name) as file:
+            return json.load(file)
+
+    def test_results_of_endpoints(self):
+        results = self.load_test('--mix', 'detail=2,bid=1,api_bids=1')
+        self.assertEqual(set(results['endpoints']),
+            {'detail', 'bid', 'api_bids'})
+        for stats in results['endpoints'].values():
+            self.assertGreater(stats['requests'], 0)
+            self.assertLessEqual(stats['p50'], stats['p99'])
+        self.assertEqual(set(results['endpoints']['detail']['statuses']),
+            {'200'})
+        # accepted bids redirect, rejected and throttled ones are rerendered
+        statuses = results['endpoints']['bid']['statuses']
+        self.assertIn('302', statuses)
+        self.assertLessEqual(set(statuses), {'200', '302', '429'})
+        self.assertTrue(Bid.objects.exists())
+
+    def test_regression_fails(self):
+        results = self.load_test('--mix', 'api_listings=1')
+        results['endpoints']['api_listings']['rps'] *= 10
+        with tempfile.NamedTemporaryFile('w', suffix='.json') as baseline:
+            json.dump(results, baseline)
+            baseline.flush()
+            with self.assertRaisesMessage(CommandError, 'api_listings'):
+                self.load_test('--mix', 'api_listings=1',
+                    '--compare', baseline.name)
+
+
+class LoadTestStatsTest(SimpleTestCase):
+    """A test case for stats of the `load_test` command."""
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 95), 7)
+        self.assertIsNone(percentile([], 50))
+
+    def test_unknown_endpoint(self):
+        with self.assertRaises(CommandError):
+            parse_mix('index=1,unknown=1')
@@ -0,0 +1,92 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from ..models import Category, Listing, Bid, Comment
+
+User = get_user_model()
+
+
+class DetailedListingConditionalGetTest(TestCase):
+    """A test case for conditional requests of Detailed Listing View."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username='owner')
+        cls.customer = User.objects.create_user(username='customer')
+        cls.category = Category.objects.create(name='Cat', slug='cat')
+        cls.listing = Listing.objects.create(
+            category = cls.category,
+            user = cls.owner,
+            name = 'Listing',
+            slug = 'listing',
+            description = 'A description for test listing.',
+            start_bid = 10)
+
+    def setUp(self):
+        cache.clear()
+        self.location = reverse('auctions:listing',
+            args=[self.category.slug, self.listing.slug])
+
+    def test_validators_are_set(self):
+        resp = self.client.get(self.location)
+        self.assertTrue(resp.has_header('ETag'))
+        self.assertTrue(resp.has_header('Last-Modified'))
+        self.assertIn('no-cache', resp['Cache-Control'])
+
+    def get_etag(self):
+        """Return an ETag of the page once the CSRF cookie is set."""
+
+        self.client.get(self.location)
+        return self.client.get(self.location)['ETag']
+
+    def test_not_modified_without_rendering(self):
+        self.client.force_login(self.customer)
+        etag = self.get_etag()
+
+        # session, user, listing with validators
+        with self.assertNumQueries(3):
+            resp = self.client.get(self.location, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+        self.assertIsNone(resp.context)
+
+    def test_anonymous_cached_page_is_not_modified(self):
+        resp = self.client.get(self.location)
+        with self.assertNumQueries(0):
+            resp = self.client.get(self.location,
+                HTTP_IF_NONE_MATCH=resp['ETag'])
+        self.assertEqual(resp.status_code, 304)
+
+        with self.assertNumQueries(0):
+            resp = self.client.get(self.location,
+                HTTP_IF_MODIFIED_SINCE=resp['Last-Modified'])
+        self.assertEqual(resp.status_code, 304)
+
+    def test_bids_and_comments_change_etag(self):
+        self.client.force_login(self.customer)
+        etags = [self.get_etag()]
+
+        Bid.objects.create(user=self.customer, listing=self.listing, bid=11)
+        etags.append(self.client.get(self.location,
+            HTTP_IF_NONE_MATCH=etags[-1])['ETag'])
+
+        comment = Comment.objects.create(user=self.customer,
+            listing=self.listing, text='A comment.')
+        etags.append(self.client.get(self.location,
+            HTTP_IF_NONE_MATCH=etags[-1])['ETag'])
+
+        self.assertEqual(len(set(etags)), 3)
+
+        # the page is the same as before the comment
+        comment.delete()
+        resp = self.client.get(self.location, HTTP_IF_NONE_MATCH=etags[1])
+        self.assertEqual(resp.status_code, 304)
+
+    def test_etag_depends_on_user(self):
+        self.client.force_login(self.customer)
+        etag = self.get_etag()
+
+        self.client.force_login(self.owner)
+        resp = self.client.get(self.location, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
@@ -0,0 +1,200 @@
+import asyncio
+import json
+from contextlib import contextmanager
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from asgiref.timeout import timeout as async_timeout
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+
+from ..events import (InProcessBroker, ListingEventsApplication,
+    LISTING_CHANNEL, get_broker, publish_listing_event)
+from ..models import Category, Listing
+from ..services import place_bid, close_listing
+
+User = get_user_model()
+
+
+@contextmanager
+def listen(channel):
+    """Subscribe to a channel of the configured broker on a private event
+    loop. Yield a function returning messages received so far.
+    """
+
+    loop = asyncio.new_event_loop()
+    subscription = get_broker().subscribe(channel)
+    queue = loop.run_until_complete(subscription.__aenter__())
+
+    def get_messages():
+        loop.run_until_complete(asyncio.sleep(0))
+        messages = []
+        while not queue.empty():
+            messages.append(json.loads(queue.get_nowait()))
+        return messages
+
+    try:
+        yield get_messages
+    finally:
+        loop.run_until_complete(subscription.__aexit__(None, None, None))
+        loop.close()
+
+
+class InProcessBrokerTest(SimpleTestCase):
+    """A test case for the in-process broker."""
+
+    async def test_publish_to_subscribers_of_channel(self):
+        broker = InProcessBroker()
+        async with broker.subscribe('a') as first, \
+                broker.subscribe('a') as second, \
+                broker.subscribe('b') as other:
+            await sync_to_async(broker.publish, thread_sensitive=False)(
+                'a', 'message')
+            self.assertEqual(await asyncio.wait_for(first.get(), 1),
+                'message')
+            self.assertEqual(await asyncio.wait_for(second.get(), 1),
+                'message')
+            self.assertTrue(other.empty())
+        self.assertEqual(dict(broker.subscribers), {})
+
+
+class ListingEventsTestMixin:
+    """A mixin creating a listing with an owner and a customer."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username='owner')
+        cls.customer = User.objects.create_user(username='customer')
+        cls.category = Category.objects.create(name='Cat', slug='cat')
+        cls.listing = Listing.objects.create(
+            category = cls.category,
+            user = cls.owner,
+            name = 'Listing',
+            slug = 'listing',
+            description = 'A description for test listing.',
+            start_bid = 10)
+        cls.channel = LISTING_CHANNEL.format(slug=cls.listing.slug)
+
+
+class PublishListingEventsTest(ListingEventsTestMixin, TestCase):
+    """A test case for events published by bid services."""
+
+    def test_accepted_bid_is_published_after_commit(self):
+        with listen(self.channel) as get_messages:
+            with self.captureOnCommitCallbacks() as callbacks:
+                place_bid(self.listing, self.customer, Decimal('15'))
+            self.assertEqual(get_messages(), [])
+
+            for callback in callbacks:
+                callback()
+            messages = get_messages()
+
+        self.assertEqual(len(messages), 1)
+        self.assertEqual(messages[0]['event'], 'bid')
+        self.assertEqual(messages[0]['data']['current_bid'], '15')
+        self.assertEqual(messages[0]['data']['bid_count'], 1)
+
+    def test_rejected_bid_is_not_published(self):
+        with listen(self.channel) as get_messages:
+            with self.captureOnCommitCallbacks(execute=True):
+                place_bid(self.listing, self.customer, Decimal('5'))
+            self.assertEqual(get_messages(), [])
+
+    def test_closed_listing_is_published(self):
+        with listen(self.channel) as get_messages:
+            with self.captureOnCommitCallbacks(execute=True):
+                close_listing(self.listing)
+            messages = get_messages()
+
+        self.assertEqual([message['event'] for message in messages],
+            ['closed'])
+        self.assertFalse(messages[0]['data']['is_active'])
+
+
+class ListingEventsApplicationTest(ListingEventsTestMixin,
+                                   TransactionTestCase):
+    """A test case for the listing events stream. The application returns
+    its connections like a request, so data is committed.
+    """
+
+    def setUp(self):
+        self.setUpTestData()
+
+    async def request(self, path='/cat/listing/events', respond=None):
+        """Request a path and return messages sent by the application.
+        `respond` is called with each streamed body and the input queue.
+        """
+
+        async def application(scope, receive, send):
+            await send({'type': 'http.response.start', 'status': 204,
+                'headers': []})
+            await send({'type': 'http.response.body', 'body': b''})
+
+        messages = []
+        received = asyncio.Queue()
+        received.put_nowait({'type': 'http.request'})
+
+        async def send(message):
+            messages.append(message)
+            if respond and message.get('more_body'):
+                respond(message['body'].decode(), received)
+
+        scope = {'type': 'http', 'method': 'GET', 'path': path,
+            'headers': []}
+        async with async_timeout(1):
+            await ListingEventsApplication(application)(
+                scope, received.get, send)
+        return messages
+
+    async def test_other_requests_are_passed(self):
+        messages = await self.request('/cat/listing/')
+        self.assertEqual(messages[0]['status'], 204)
+
+    async def test_unknown_listing(self):
+        messages = await self.request('/cat/unknown/events')
+        self.assertEqual(messages[0]['status'], 404)
+
+    async def test_stream_until_listing_closes(self):
+        def respond(body, received):
+            if body.startswith('event: listing'):
+                publish_listing_event(self.listing.slug, 'bid',
+                    {'current_bid': Decimal('15'), 'bid_count': 1})
+            elif body.startswith('event: bid'):
+                publish_listing_event(self.listing.slug, 'closed',
+                    {'is_active': False})
+
+        start, *bodies, last = await self.request(respond=respond)
+        self.assertEqual(start['status'], 200)
+        self.assertIn((b'content-type', b'text/event-stream'),
+            start['headers'])
+
+        bodies = [message['body'].decode() for message in bodies]
+        self.assertEqual(len(bodies), 3)
+        self.assertTrue(bodies[0].startswith('event: listing\n'))
+        self.assertIn('"current_bid": "10.00"', bodies[0])
+        self.assertEqual(bodies[1],
+            'event: bid\ndata: {"current_bid": "15", "bid_count": 1}\n\n')
+        self.assertTrue(bodies[2].startswith('event: closed\n'))
+        self.assertFalse(last.get('more_body', False))
+
+    async def test_stream_ends_on_disconnect(self):
+        def respond(body, received):
+            received.put_nowait({'type': 'http.disconnect'})
+
+        messages = await self.request(respond=respond)
+        self.assertEqual(len(messages), 2)
+        self.assertNotIn(self.channel, get_broker().subscribers)
+
+    async def test_connection_is_returned(self):
+        await self.request('/cat/unknown/events')
+        self.assertIsNone(await sync_to_async(
+            lambda: connection.connection)())
+
+    async def test_closed_listing_sends_state_only(self):
+        await sync_to_async(Listing.objects.filter(pk=self.listing.pk)
+            .update)(is_active=False)
+
+        messages = await self.request()
+        self.assertEqual(len(messages), 3)
+        self.assertIn('"is_active": false', messages[1]['body'].decode())
@@ -0,0 +1,98 @@
+from django.core.cache import cache
+from django.utils.html import escape
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from ..facets import compute_facets, get_facets, get_price_buckets
+from ..filters import search_listings
+from ..models import Category, Listing
+
+User = get_user_model()
+
+FACETS = {'PRICE_BUCKETS': [10, 100], 'POPULAR_HITS': 2,
+    'CACHE_TIMEOUT': 60}
+
+
+@override_settings(AUCTION_SEARCH_FACETS=FACETS)
+class SearchFacetsTest(TestCase):
+    """A test case for facets of search results: category counts and
+    a price histogram.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username='owner')
+        cls.cameras = Category.objects.create(name='Cameras', slug='cameras')
+        cls.lamps = Category.objects.create(name='Lamps', slug='lamps')
+        for num, (category, price) in enumerate([(cls.cameras, 5),
+                (cls.cameras, 10), (cls.cameras, 250), (cls.lamps, 99.99),
+                (cls.lamps, 100)]):
+            Listing.objects.create(category=category, user=cls.owner,
+                name=f'Vintage {category.name} {num}', slug=f'listing-{num}',
+                description='A description.', start_bid=price)
+        Listing.objects.create(category=cls.lamps, user=cls.owner,
+            name='Desk lamp', slug='desk-lamp', description='Modern.',
+            start_bid=20)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_price_buckets(self):
+        self.assertEqual([tuple(map(str, bucket))
+            for bucket in get_price_buckets()],
+            [('None', '9.99'), ('10.00', '99.99'), ('100.00', 'None')])
+
+    def test_facets_of_single_query(self):
+        query = search_listings(Listing.objects.all(), 'vintage')
+        with self.assertNumQueries(1):
+            facets = compute_facets(query)
+        self.assertEqual(facets, {
+            'count': 5,
+            'categories': [
+                {'id': self.cameras.pk, 'name': 'Cameras',
+                    'slug': 'cameras', 'count': 3},
+                {'id': self.lamps.pk, 'name': 'Lamps', 'slug': 'lamps',
+                    'count': 2},
+            ],
+            'prices': [
+                {'min': None, 'max': '9.99', 'count': 1},
+                {'min': '10.00', 'max': '99.99', 'count': 2},
+                {'min': '100.00', 'max': None, 'count': 2},
+            ],
+        })
+
+    def test_popular_facets_are_cached(self):
+        query = Listing.objects.filter(category=self.lamps)
+        get_facets(query)
+        get_facets(query)
+        with self.assertNumQueries(0):
+            facets = get_facets(query)
+        self.assertEqual(facets['count'], 3)
+
+        with self.assertNumQueries(1):
+            get_facets(query.filter(current_bid__gte=50))
+
+    def test_search_page_facets(self):
+        url = reverse('auctions:search_listing')
+        resp = self.client.get(url, {'q': 'vintage'})
+        self.assertEqual(resp.context['facets_count'], 5)
+        cameras = resp.context['category_facets'][0]
+        self.assertEqual(cameras['count'], 3)
+        self.assertContains(resp, f'href="?{escape(cameras["query"])}"')
+
+        resp = self.client.get(f'{url}?{cameras["query"]}')
+        self.assertEqual(len(resp.context['listing_search']), 3)
+        price = resp.context['price_facets'][2]
+        self.assertEqual(price['count'], 1)
+
+        resp = self.client.get(f'{url}?{price["query"]}')
+        self.assertEqual([listing.name for listing
+            in resp.context['listing_search']], ['Vintage Cameras 2'])
+        self.assertContains(resp, 'Clear filters')
+
+    def test_invalid_refinements_are_ignored(self):
+        resp = self.client.get(reverse('auctions:search_listing'),
+            {'q': 'vintage', 'category': 'cameras', 'min_price': '-1'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context['facets_count'], 5)
@@ -13,17 +13,22 @@ class ListingFormTest(TestCase):
         self.form = ListingForm()
 
     def test_form_field_list_is_correct(self):
-        fields = ('category', 'name', 'image', 'start_bid', 'description')
+        fields = ('category', 'name', 'image', 'start_bid', 'ends_at',
+            'description')
         self.assertTupleEqual(self.form._meta.fields, fields)
 
     def test_form_field_list_labels_are_correct(self):
         labels = {
             'name': 'Listing name', 'category': 'Category',
             'description': 'Description', 'start_bid': 'Start bid',
-            'image': 'Image URL'
+            'image': 'Image URL', 'ends_at': 'Auction ends at'
         }
         self.assertDictEqual(self.form._meta.labels, labels)
 
+    def test_past_end_time_is_invalid(self):
+        form = ListingForm(data={'ends_at': '2000-01-01T00:00'})
+        self.assertIn('ends_at', form.errors)
+
 class BidFormTest(TestCase):
     """A test case for a Bid Form."""
 
@@ -53,12 +58,12 @@ class BidFormTest(TestCase):
         self.assertEqual(type(self.form._meta.widgets['listing']), widget)
 
     def test_form_bid_validation_lower_bid(self):
-        data = {'listing': Listing.objects.get(id=1), 'bid': 1.25}
+        data = {'listing': Listing.objects.get(name='Test Listing'), 'bid': 1.25}
         form = BidForm(data)
         self.assertFalse(form.is_valid())
 
     def test_form_bid_validation_higher_bid(self):
-        data = {'listing': Listing.objects.get(id=1), 'bid': 11.25}
+        data = {'listing': Listing.objects.get(name='Test Listing'), 'bid': 11.25}
         form = BidForm(data)
         self.assertTrue(form.is_valid())
 
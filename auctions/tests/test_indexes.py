@@ -0,0 +1,145 @@
+import json
+
+from django.contrib.auth.models import AnonymousUser
+from django.db import IntegrityError, connection
+from django.test import RequestFactory, TestCase
+
+from account.models import User
+from ..filters import (INDEXED_LISTING_ORDERINGS, filter_listings,
+    order_listings)
+from ..models import Category, Listing, Bid, Comment, Watchlist
+from ..views import IndexView, ListingsByCatView, BiddingView, WatchlistView
+
+
+INDEX_SCANS = ('Index Scan', 'Index Only Scan', 'Bitmap Index Scan')
+
+
+def get_plan_indexes(queryset):
+    """Return names of indexes scanned by the plan of a query."""
+
+    plans = [json.loads(queryset.explain(format='json'))[0]['Plan']]
+    indexes = set()
+    while plans:
+        plan = plans.pop()
+        if plan['Node Type'] in INDEX_SCANS:
+            indexes.add(plan['Index Name'])
+        plans.extend(plan.get('Plans', ()))
+    return indexes
+
+
+class HotPathIndexesTest(TestCase):
+    """A test case asserting that queries of listing pages are planned with
+    index scans on a seeded dataset. Querysets are taken from the views.
+    The first category is a small one (every 50th listing).
+    """
+
+    users = 20
+    categories = 10
+    listings = 5000
+    bids_per_listing = 4
+    comments_per_listing = 2
+
+    @classmethod
+    def setUpTestData(cls):
+        users = User.objects.bulk_create(
+            User(username=f'user-{num}') for num in range(cls.users))
+        categories = Category.objects.bulk_create(
+            Category(name=f'Category {num}', slug=f'category-{num}')
+            for num in range(cls.categories))
+        listings = Listing.objects.bulk_create(
+            Listing(
+                category=categories[0] if num % 50 == 0
+                    else categories[1 + num % (cls.categories - 1)],
+                user=users[num % cls.users],
+                name=f'Listing {num}', slug=f'listing-{num}',
+                description='Description', start_bid=10, current_bid=10,
+                is_active=num % 2 == 0)
+            for num in range(cls.listings))
+        Bid.objects.bulk_create(
+            Bid(user=users[(num + bid) % cls.users], listing=listing,
+                bid=10 + bid)
+            for num, listing in enumerate(listings)
+            for bid in range(cls.bids_per_listing))
+        Comment.objects.bulk_create(
+            Comment(user=users[0], listing=listing, text='A comment.')
+            for listing in listings
+            for _ in range(cls.comments_per_listing))
+        Watchlist.objects.bulk_create(
+            Watchlist(user=users[num % cls.users], listing=listing)
+            for num, listing in enumerate(listings))
+        # a typical watchlist, a few listings out of all
+        cls.watcher = User.objects.create(username='watcher')
+        Watchlist.objects.bulk_create(
+            Watchlist(user=cls.watcher, listing=listing)
+            for listing in listings[::500])
+
+        with connection.cursor() as cursor:
+            for table in ('auctions_listing', 'auctions_bid',
+                    'auctions_comment'):
+                cursor.execute(f"""UPDATE {table}
+                    SET date_added = now() - id * interval '1 minute'""")
+            cursor.execute('ANALYZE')
+
+        cls.user = users[1]
+        cls.category = categories[0]
+        cls.listing = listings[1]
+
+    def get_view_queryset(self, view_class, user=None, **kwargs):
+        """Return a page of a view's queryset."""
+
+        request = RequestFactory().get('/')
+        request.user = user or AnonymousUser()
+        view = view_class()
+        view.setup(request, **kwargs)
+        return view.get_queryset()[:view.paginate_by]
+
+    def assertUsesIndex(self, queryset, index):
+        self.assertIn(index, get_plan_indexes(queryset))
+
+    def test_index_view(self):
+        self.assertUsesIndex(self.get_view_queryset(IndexView),
+            'listing_active_date_idx')
+
+    def test_listings_by_category_view(self):
+        self.assertUsesIndex(
+            self.get_view_queryset(ListingsByCatView,
+                cat_slug=self.category.slug),
+            'listing_cat_active_date_idx')
+
+    def test_bidding_view(self):
+        self.assertUsesIndex(
+            self.get_view_queryset(BiddingView, user=self.user),
+            'bid_user_date_idx')
+
+    def test_watchlist_view(self):
+        self.assertUsesIndex(
+            self.get_view_queryset(WatchlistView, user=self.watcher),
+            'watchlist_user_listing_uniq')
+
+    def test_detailed_listing_view(self):
+        self.assertUsesIndex(
+            self.listing.bid_set.order_by('-bid')[:1],
+            'bid_listing_bid_idx')
+        self.assertUsesIndex(
+            self.listing.comment_set.order_by('-date_added'),
+            'comment_listing_date_idx')
+
+    def test_indexed_listing_orderings(self):
+        for ordering in INDEXED_LISTING_ORDERINGS:
+            with self.subTest(ordering=ordering):
+                query = order_listings(Listing.objects.filter(
+                    is_active=True), ordering)[:15]
+                self.assertTrue(get_plan_indexes(query))
+
+        self.assertUsesIndex(
+            order_listings(Listing.objects.all(), '-date_added')[:15],
+            'listing_date_idx')
+        self.assertUsesIndex(
+            order_listings(filter_listings(Listing.objects.all(),
+                min_price=11), 'current_bid')[:15],
+            'listing_cur_bid_idx')
+
+    def test_watchlist_is_unique(self):
+        with self.assertRaises(IntegrityError):
+            Watchlist.objects.create(user=self.listing.user,
+                listing=self.listing)
@@ -0,0 +1,94 @@
+import json
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from ..models import Category, Listing, Comment
+
+User = get_user_model()
+
+METRICS = {'SAMPLE_RATE': 1, 'QUERY_BUDGET': 30, 'TIME_BUDGET': 10_000,
+    'HEADER': True}
+
+
+def parse_server_timing(header):
+    """Return metrics of a `Server-Timing` header by names."""
+
+    metrics = {}
+    for metric in header.split(', '):
+        name, *params = metric.split(';')
+        metrics[name] = dict(param.split('=', 1) for param in params)
+    return metrics
+
+
+@override_settings(AUCTION_REQUEST_METRICS=METRICS)
+class RequestMetricsMiddlewareTest(TestCase):
+    """A test case for request metrics and `Server-Timing` headers."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username='owner')
+        cls.category = Category.objects.create(name='Cat', slug='cat')
+        cls.listing = Listing.objects.create(
+            category = cls.category,
+            user = cls.owner,
+            name = 'Listing',
+            slug = 'listing',
+            description = 'A description for test listing.',
+            start_bid = 10)
+        Comment.objects.bulk_create(Comment(user=cls.owner,
+            listing=cls.listing, text=f'Comment {num}') for num in range(3))
+
+    def setUp(self):
+        cache.clear()
+        self.location = reverse('auctions:listing',
+            args=[self.category.slug, self.listing.slug])
+
+    def test_page_metrics(self):
+        self.client.force_login(self.owner)
+        with self.assertLogs('auctions.instrumentation', 'INFO') as logs:
+            with self.assertNumQueries(4):
+                resp = self.client.get(self.location)
+
+        timing = parse_server_timing(resp['Server-Timing'])
+        self.assertEqual(timing['db']['desc'], '"4 queries"')
+        self.assertIn('render', timing)
+        self.assertIn('total', timing)
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['queries'], 4)
+        self.assertEqual(record['status'], 200)
+        self.assertEqual(record['path'], self.location)
+
+    def test_cache_hits_and_misses(self):
+        resp = self.client.get(self.location)
+        self.assertEqual(parse_server_timing(resp['Server-Timing'])['cache'],
+            {'desc': '"0 hits 1 misses"'})
+        resp = self.client.get(self.location)
+        self.assertEqual(parse_server_timing(resp['Server-Timing'])['cache'],
+            {'desc': '"1 hits 0 misses"'})
+
+    def test_serializer_time(self):
+        resp = self.client.get(
+            f'/api/v1/listings/{self.listing.pk}/comments/')
+        self.assertIn('serialize',
+            parse_server_timing(resp['Server-Timing']))
+
+    @override_settings(AUCTION_REQUEST_METRICS={**METRICS,
+        'QUERY_BUDGET': 1})
+    def test_request_over_budget_is_logged_with_sql(self):
+        with self.assertLogs('auctions.instrumentation', 'WARNING') as logs:
+            self.client.get(self.location)
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertTrue(record['over_budget'])
+        self.assertTrue(record['sql']['slowest'])
+        self.assertIn('SELECT', record['sql']['slowest'][0]['sql'])
+
+    @override_settings(AUCTION_REQUEST_METRICS={**METRICS,
+        'SAMPLE_RATE': 0})
+    def test_unsampled_request(self):
+        resp = self.client.get(self.location)
+        self.assertFalse(resp.has_header('Server-Timing'))
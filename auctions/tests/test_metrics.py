@@ -0,0 +1,108 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from ..metrics import buffer, get_view_names
+from ..models import Category, Listing
+from ..services import place_bid
+
+User = get_user_model()
+
+
+def parse_metrics(text):
+    """Return samples of the Prometheus text format by series."""
+
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith('#'):
+            series, value = line.rsplit(' ', 1)
+            samples[series] = float(value)
+    return samples
+
+
+@override_settings(AUCTION_METRICS_TOKEN='secret')
+class MetricsViewTest(TestCase):
+    """A test case for the Prometheus metrics endpoint."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username='owner')
+        cls.customer = User.objects.create_user(username='customer')
+        cls.category = Category.objects.create(name='Cat', slug='cat')
+        cls.listing = Listing.objects.create(
+            category = cls.category,
+            user = cls.owner,
+            name = 'Listing',
+            slug = 'listing',
+            description = 'A description for test listing.',
+            start_bid = 10)
+
+    def setUp(self):
+        cache.clear()
+        buffer.counts.clear()
+
+    def get_metrics(self):
+        resp = self.client.get(reverse('metrics'),
+            HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(resp['Content-Type'],
+            'text/plain; version=0.0.4; charset=utf-8')
+        return parse_metrics(resp.content.decode())
+
+    def test_token_is_required(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        resp = self.client.get(reverse('metrics'),
+            HTTP_AUTHORIZATION='Bearer wrong')
+        self.assertEqual(resp.status_code, 403)
+
+    @override_settings(AUCTION_METRICS_TOKEN='')
+    def test_staff_only_without_token(self):
+        self.client.force_login(self.customer)
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        self.client.force_login(
+            User.objects.create_user(username='staff', is_staff=True))
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 200)
+
+    def test_business_metrics(self):
+        place_bid(self.listing, self.customer, Decimal('15'))
+        place_bid(self.listing, self.customer, Decimal('12'))
+        place_bid(self.listing, self.owner, Decimal('20'))
+
+        metrics = self.get_metrics()
+        self.assertEqual(metrics['auctions_bids_total{result="accepted"}'], 1)
+        self.assertEqual(metrics['auctions_bids_total{result="rejected"}'], 2)
+        self.assertEqual(metrics['auctions_active_listings'], 1)
+        self.assertTrue(any(series.startswith('auctions_db_connections')
+            for series in metrics))
+        self.assertIn('auctions_db_pool_wait_seconds_count', metrics)
+        self.assertIn('auctions_db_pool_closed_total{reason="broken"}',
+            metrics)
+
+    def test_request_histograms(self):
+        self.client.get(reverse('auctions:index'))
+        self.client.get(reverse('auctions:index'))
+        self.client.get('/api/v1/listings/')
+        self.client.get('/api/v1/unknown/')
+
+        metrics = self.get_metrics()
+        index = 'view="auctions:index"'
+        self.assertEqual(
+            metrics[f'auctions_request_duration_seconds_count{{{index}}}'], 2)
+        self.assertEqual(metrics['auctions_request_duration_seconds_bucket'
+            f'{{{index},le="+Inf"}}'], 2)
+        self.assertEqual(
+            metrics[f'auctions_requests_total{{{index},status="2xx"}}'], 2)
+        self.assertEqual(metrics['auctions_requests_total'
+            '{view="listing-list",status="2xx"}'], 1)
+        self.assertEqual(metrics['auctions_requests_total'
+            '{view="other",status="4xx"}'], 1)
+        # the page cache missed, then hit
+        self.assertEqual(
+            metrics['auctions_page_cache_requests_total{result="hit"}'], 1)
+
+    def test_view_names(self):
+        names = get_view_names()
+        self.assertIn('auctions:listing', names)
+        self.assertIn('listing-comments', names)
@@ -1,4 +1,6 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from ..models import Category, Listing, Bid, Comment, Watchlist
 
@@ -147,6 +149,17 @@ class ListingModelTest(TestCase):
         self.assertEqual(self.listing.get_absolute_url(),
             '/test-category/test-listing/')
 
+    def test_new_listing_current_bid_is_start_bid(self):
+        self.assertEqual(float(self.listing.current_bid), 10.95)
+        self.assertIsNone(self.listing.max_bid)
+        self.assertEqual(self.listing.bid_count, 0)
+
+    def test_start_bid_change_updates_current_bid(self):
+        self.listing.start_bid = 15
+        self.listing.save()
+        self.listing.refresh_from_db()
+        self.assertEqual(self.listing.current_bid, 15)
+
 class BidModelTest(TestCase):
     """A test case for a Bid model."""
 
@@ -171,7 +184,7 @@ class BidModelTest(TestCase):
         )
 
     def setUp(self):
-        self.bid = Bid.objects.get(id=1)
+        self.bid = Bid.objects.get()
 
     def test_user_foreign_key(self):
         self.assertEqual(self.bid.user.username, 'Tester')
@@ -195,6 +208,78 @@ class BidModelTest(TestCase):
     def test_date_updated_auto_now(self):
         self.assertTrue(self.bid._meta.get_field('date_updated').auto_now)
 
+    def test_new_bid_updates_listing_bid_stats(self):
+        listing = Listing.objects.get(name='Test Listing')
+        self.assertEqual(listing.bid_count, 1)
+        self.assertEqual(float(listing.max_bid), 11.5)
+        self.assertEqual(float(listing.current_bid), 11.5)
+        self.assertEqual(listing.last_bid_at, self.bid.date_added)
+
+    def test_lower_bid_does_not_lower_current_bid(self):
+        Bid.objects.create(user=User.objects.get(username='Tester'),
+            listing=Listing.objects.get(name='Test Listing'), bid=11)
+        listing = Listing.objects.get(name='Test Listing')
+        self.assertEqual(listing.bid_count, 2)
+        self.assertEqual(float(listing.current_bid), 11.5)
+
+    def test_saving_stale_listing_keeps_bid_stats(self):
+        listing = Listing.objects.get(name='Test Listing')
+        Bid.objects.create(user=User.objects.get(username='Tester'),
+            listing=listing, bid=20)
+        listing.is_active = False
+        listing.save()
+        listing.refresh_from_db()
+        self.assertEqual(listing.bid_count, 2)
+        self.assertEqual(float(listing.current_bid), 20)
+
+    def test_edited_bid_rebuilds_bid_stats(self):
+        self.bid.bid = 11
+        self.bid.save()
+        listing = Listing.objects.get(name='Test Listing')
+        self.assertEqual(listing.bid_count, 1)
+        self.assertEqual(float(listing.current_bid), 11)
+
+    def test_deleted_bids_rebuild_bid_stats(self):
+        tester = User.objects.get(username='Tester')
+        listing = Listing.objects.get(name='Test Listing')
+        Bid.objects.create(user=User.objects.create(username='Other'),
+            listing=listing, bid=12)
+        tester.delete()
+        listing.refresh_from_db()
+        self.assertEqual(listing.bid_count, 1)
+        self.assertEqual(float(listing.current_bid), 12)
+
+        Bid.objects.get().delete()
+        listing.refresh_from_db()
+        self.assertEqual(listing.bid_count, 0)
+        self.assertIsNone(listing.max_bid)
+        self.assertIsNone(listing.last_bid_at)
+        self.assertEqual(float(listing.current_bid), 10.95)
+
+    def get_stats_updates(self, delete):
+        """Run a delete, return its `UPDATE`s of listings."""
+
+        with CaptureQueriesContext(connection) as queries:
+            delete()
+        return [query['sql'] for query in queries
+            if query['sql'].startswith('UPDATE "auctions_listing"')]
+
+    def test_bulk_deleted_bids_rebuild_in_one_update(self):
+        tester = User.objects.get(username='Tester')
+        other = Listing.objects.create(category=Category.objects.get(),
+            user=User.objects.get(username='Owner'), name='Other Listing',
+            slug='other-listing', start_bid=5)
+        for bid in (6, 7):
+            Bid.objects.create(user=tester, listing=other, bid=bid)
+
+        self.assertEqual(len(self.get_stats_updates(
+            Bid.objects.all().delete)), 1)
+        self.assertFalse(Listing.objects.filter(bid_count__gt=0).exists())
+
+    def test_deleted_listing_skips_bid_stats(self):
+        listing = Listing.objects.get(name='Test Listing')
+        self.assertEqual(self.get_stats_updates(listing.delete), [])
+
 class CommentModelTest(TestCase):
     """A test case for a Comment model."""
 
@@ -223,7 +308,7 @@ class CommentModelTest(TestCase):
         )
 
     def setUp(self):
-        self.comment = Comment.objects.get(id=1)
+        self.comment = Comment.objects.get()
 
     def test_user_foreign_key(self):
         self.assertEqual(self.comment.user.username, 'Tester')
@@ -284,7 +369,7 @@ class TestWatchlistModel(TestCase):
         )
 
     def setUp(self):
-        self.watchlist = Watchlist.objects.get(id=1)
+        self.watchlist = Watchlist.objects.get()
 
     def test_user_foreign_key(self):
         self.assertEqual(self.watchlist.user.username, 'Tester')
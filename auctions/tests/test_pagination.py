@@ -0,0 +1,139 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from rest_framework.test import APIClient
+
+from ..mixins import GetListingsQuerySetMixin
+from ..models import Category, Listing, Bid
+from ..pagination import (EstimatedCountPaginator, InvalidCursor,
+    InvalidOrdering, KeysetPaginator)
+
+User = get_user_model()
+
+
+class KeysetPaginatorTest(TestCase):
+    """A test case for the keyset paginator."""
+
+    # orderings by nullable fields fall back to page numbers
+    offset_orderings = ('ends_at',)
+
+    @classmethod
+    def setUpTestData(cls):
+        listing_num = 23
+        cls.owner = User.objects.create_user(username='owner')
+        cls.customer = User.objects.create_user(username='customer')
+        cls.category = Category.objects.create(name='Cat', slug='cat')
+
+        for listing in range(listing_num):
+            Listing.objects.create(
+                category = cls.category,
+                user = cls.owner,
+                name = f'Listing {listing % 5}',
+                slug = f'listing-{listing}',
+                description = f'A description for test {listing}.',
+                start_bid = listing % 7 + 1)
+
+    def walk(self, query, per_page=5):
+        """Return pages walked forward by next cursors and then backward
+        by previous cursors.
+        """
+
+        paginator = KeysetPaginator(query, per_page)
+        forward = [paginator.page()]
+        while forward[-1].has_next():
+            forward.append(paginator.page(forward[-1].next_cursor))
+
+        backward = [forward[-1]]
+        while backward[-1].has_previous():
+            backward.append(paginator.page(backward[-1].previous_cursor))
+        return forward, backward[::-1]
+
+    def test_pages_follow_every_listing_ordering(self):
+        for ordering in GetListingsQuerySetMixin.lst_orderings.values():
+            if ordering in self.offset_orderings:
+                continue
+            query = Listing.objects.order_by(ordering)
+            tiebreaker = '-pk' if ordering.startswith('-') else 'pk'
+            expected = list(query.order_by(ordering, tiebreaker))
+            forward, backward = self.walk(query)
+
+            with self.subTest(ordering=ordering):
+                self.assertEqual(
+                    [obj for page in forward for obj in page], expected)
+                self.assertEqual(
+                    [list(page) for page in backward],
+                    [list(page) for page in forward])
+
+    def test_first_page_has_no_previous_cursor(self):
+        page = KeysetPaginator(Listing.objects.order_by('-date_added'), 5)\
+            .page()
+        self.assertFalse(page.has_previous())
+        self.assertTrue(page.has_next())
+
+    def test_invalid_cursor_is_rejected(self):
+        paginator = KeysetPaginator(Listing.objects.order_by('name'), 5)
+        with self.assertRaises(InvalidCursor):
+            paginator.page('not-a-cursor')
+
+    def test_nullable_ordering_is_rejected(self):
+        with self.assertRaises(InvalidOrdering):
+            KeysetPaginator(Listing.objects.order_by('max_bid'), 5)
+        for ordering in self.offset_orderings:
+            with self.assertRaises(InvalidOrdering):
+                KeysetPaginator(Listing.objects.order_by(ordering), 5)
+
+    def test_estimated_count_of_small_result_is_exact(self):
+        paginator = EstimatedCountPaginator(
+            Listing.objects.order_by('pk'), 5)
+        self.assertEqual(paginator.count, 23)
+
+    def test_big_result_count_is_estimated(self):
+        paginator = EstimatedCountPaginator(
+            Listing.objects.order_by('pk'), 5)
+        paginator.exact_count_limit = -1
+        with self.assertNumQueries(1):
+            self.assertGreater(paginator.count, 0)
+
+    def test_index_view_links_cursors(self):
+        resp = self.client.get(reverse('auctions:index'))
+        page = resp.context['page_obj']
+        self.assertTrue(page.is_keyset)
+        self.assertContains(resp, f'href="?{page.next_query}"')
+        self.assertNotContains(resp, 'href="?page=')
+
+    def test_index_view_page_numbers(self):
+        resp = self.client.get(reverse('auctions:index'), {'page': 2})
+        page = resp.context['page_obj']
+        self.assertEqual(page.number, 2)
+        self.assertEqual(page.paginator.count, 23)
+        self.assertEqual(len(page), 8)
+
+    def test_index_view_cursor_mode(self):
+        resp = self.client.get(reverse('auctions:index'),
+            {'cursor': '', 'lst_sort': 'bid_desc'})
+        page = resp.context['page_obj']
+        self.assertTrue(page.is_keyset)
+        self.assertEqual(len(page), 15)
+        self.assertIn('lst_sort=bid_desc', page.next_query)
+
+        resp = self.client.get(f'{reverse("auctions:index")}'
+            f'?{page.next_query}')
+        self.assertEqual(len(resp.context['active_listings']), 8)
+
+    def test_api_bids_cursor_mode(self):
+        listing = Listing.objects.get(slug='listing-0')
+        for bid in range(2, 8):
+            Bid.objects.create(user=self.customer, listing=listing, bid=bid)
+        client = APIClient()
+        client.force_authenticate(self.customer)
+
+        resp = client.get('/api/v1/my-bids/', {'cursor': '', 'page_size': 4})
+        self.assertNotIn('count', resp.data)
+        self.assertEqual([bid['bid'] for bid in resp.data['results']],
+            ['7.00', '6.00', '5.00', '4.00'])
+
+        resp = client.get(resp.data['next'])
+        self.assertEqual([bid['bid'] for bid in resp.data['results']],
+            ['3.00', '2.00'])
+        self.assertIsNone(resp.data['next'])
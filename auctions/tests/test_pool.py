@@ -0,0 +1,107 @@
+import psycopg2
+from django.db import connections
+from django.db.utils import load_backend
+from django.test import SimpleTestCase
+
+from ..backends.postgresql.base import DEFAULT_POOL_OPTIONS
+from ..backends.postgresql.pool import ConnectionPool
+from ..metrics import buffer, get_metric_key
+
+
+def get_pid(connection):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_backend_pid()')
+        return cursor.fetchone()[0]
+
+
+class ConnectionPoolTest(SimpleTestCase):
+    """A test case for pooled connections of a worker process."""
+
+    databases = {'default'}
+
+    def setUp(self):
+        buffer.counts.clear()
+        self.conn_params = connections['default'].get_connection_params()
+
+    def get_pool(self, **options):
+        pool = ConnectionPool({**DEFAULT_POOL_OPTIONS, **options})
+        self.addCleanup(pool.close_all)
+        return pool
+
+    def connect(self):
+        return psycopg2.connect(**self.conn_params)
+
+    def get_count(self, name, labels=()):
+        return buffer.counts.get(get_metric_key(name, labels), 0)
+
+    def test_connections_are_reused(self):
+        pool = self.get_pool()
+        connection = pool.getconn(self.connect)
+        pid = get_pid(connection)
+        pool.putconn(connection)
+        connection = pool.getconn(self.connect)
+        self.assertEqual(get_pid(connection), pid)
+        pool.putconn(connection)
+        self.assertEqual(self.get_count('db_pool_opened_total'), 1)
+        self.assertEqual(self.get_count('db_pool_checkouts_total'), 2)
+
+    def test_returned_transactions_are_rolled_back(self):
+        pool = self.get_pool()
+        connection = pool.getconn(self.connect)
+        get_pid(connection)
+        self.assertEqual(connection.info.transaction_status,
+            psycopg2.extensions.TRANSACTION_STATUS_INTRANS)
+        pool.putconn(connection)
+        self.assertEqual(connection.info.transaction_status,
+            psycopg2.extensions.TRANSACTION_STATUS_IDLE)
+
+    def test_broken_connections_are_replaced(self):
+        pool = self.get_pool(CHECK_AFTER=0)
+        connection = pool.getconn(self.connect)
+        pid = get_pid(connection)
+        pool.putconn(connection)
+
+        # a failover closes connections on the server
+        with connections['default'].cursor() as cursor:
+            cursor.execute('SELECT pg_terminate_backend(%s)', [pid])
+        connection = pool.getconn(self.connect)
+        self.assertNotEqual(get_pid(connection), pid)
+        pool.putconn(connection)
+        self.assertEqual(self.get_count('db_pool_closed_total',
+            [('reason', 'broken')]), 1)
+
+    def test_old_connections_are_closed(self):
+        pool = self.get_pool(MAX_LIFETIME=0)
+        connection = pool.getconn(self.connect)
+        pool.putconn(connection)
+        pool.putconn(pool.getconn(self.connect))
+        self.assertTrue(connection.closed)
+        self.assertEqual(self.get_count('db_pool_closed_total',
+            [('reason', 'lifetime')]), 1)
+
+    def test_checkout_waits_for_a_connection(self):
+        pool = self.get_pool(MAX_SIZE=1, TIMEOUT=0.05)
+        connection = pool.getconn(self.connect)
+        with self.assertRaises(psycopg2.OperationalError):
+            pool.getconn(self.connect)
+        self.assertEqual(self.get_count('db_pool_timeout_total'), 1)
+        pool.putconn(connection)
+        pool.putconn(pool.getconn(self.connect))
+
+
+class PooledDatabaseWrapperTest(SimpleTestCase):
+    """A test case for the pooled backend returning connections of Django
+    to the pool when they're closed.
+    """
+
+    databases = {'default'}
+
+    def test_connection_returned_on_close(self):
+        settings_dict = connections['default'].settings_dict
+        wrapper = load_backend(settings_dict['ENGINE']).DatabaseWrapper(
+            settings_dict, 'default')
+        pid = get_pid(wrapper)
+        wrapper.close()
+        self.assertIsNone(wrapper.connection)
+        self.assertEqual(get_pid(wrapper), pid)
+        wrapper.close()
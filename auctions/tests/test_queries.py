@@ -0,0 +1,129 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from ..models import Category, Listing, Bid, Comment, Watchlist
+
+User = get_user_model()
+
+
+class QueryCountTestMixin:
+    """A mixin of query count tests for pages that list objects.
+    Requests a page with a few and with many rows and asserts the same
+    `num_queries` for both. The page cache is cleared before each request.
+    Contains functions:
+        - `add_rows`
+        - `test_query_count_is_constant`
+    """
+
+    user = None
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username='owner')
+        cls.customer = User.objects.create_user(username='customer')
+        cls.category = Category.objects.create(name='Cat', slug='cat')
+        cls.listing_num = 0
+
+    @classmethod
+    def create_listing(cls):
+        cls.listing_num += 1
+        return Listing.objects.create(
+            category = cls.category,
+            user = cls.owner,
+            name = f'Listing {cls.listing_num}',
+            slug = f'listing-{cls.listing_num}',
+            description = f'A description for test {cls.listing_num}.',
+            start_bid = cls.listing_num)
+
+    def get_url(self):
+        return self.location
+
+    def test_query_count_is_constant(self):
+        if self.user:
+            self.client.force_login(getattr(self, self.user))
+
+        for rows in (1, 30):
+            self.add_rows(rows)
+            cache.clear()
+            with self.assertNumQueries(self.num_queries):
+                resp = self.client.get(self.get_url())
+            self.assertEqual(resp.status_code, 200)
+
+class TestIndexViewQueries(QueryCountTestMixin, TestCase):
+    """A query count test case for Index View."""
+
+    location = '/'
+    num_queries = 1
+
+    def add_rows(self, rows):
+        for _ in range(rows):
+            Bid.objects.create(user=self.customer,
+                listing=self.create_listing(), bid=self.listing_num + 1)
+
+class TestSearchViewQueries(TestIndexViewQueries):
+    """A query count test case for Search View."""
+
+    location = '/search/?q=listing'
+    num_queries = 2
+
+class TestListingsByCatViewQueries(TestIndexViewQueries):
+    """A query count test case for Listings by Category View."""
+
+    location = '/cat/'
+    num_queries = 2
+
+class TestListingsByOwnerViewQueries(TestIndexViewQueries):
+    """A query count test case for Listings by Owner View."""
+
+    location = '/my-listings'
+    user = 'owner'
+    num_queries = 4
+
+class TestWatchlistViewQueries(QueryCountTestMixin, TestCase):
+    """A query count test case for Watchlist View."""
+
+    location = '/watchlist'
+    user = 'customer'
+    num_queries = 4
+
+    def add_rows(self, rows):
+        for _ in range(rows):
+            Watchlist.objects.create(user=self.customer,
+                listing=self.create_listing())
+
+class TestBiddingViewQueries(QueryCountTestMixin, TestCase):
+    """A query count test case for Bidding View."""
+
+    location = '/bidding'
+    user = 'customer'
+    num_queries = 4
+
+    def add_rows(self, rows):
+        for _ in range(rows):
+            Bid.objects.create(user=self.customer,
+                listing=self.create_listing(), bid=self.listing_num + 1)
+
+class TestDetailedListingViewQueries(QueryCountTestMixin, TestCase):
+    """A query count test case for Detailed Listing View."""
+
+    user = 'customer'
+    num_queries = 5
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.listing = cls.create_listing()
+
+    def get_url(self):
+        return reverse('auctions:listing',
+            args=[self.category.slug, self.listing.slug])
+
+    def add_rows(self, rows):
+        for _ in range(rows):
+            current_bid = Listing.objects.get(pk=self.listing.pk).current_bid
+            Bid.objects.create(user=self.customer, listing=self.listing,
+                bid=current_bid + 1)
+            Comment.objects.create(user=self.customer, listing=self.listing,
+                text='A comment.')
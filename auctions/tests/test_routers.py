@@ -0,0 +1,180 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from rest_framework.authtoken.models import Token
+
+from ..cache import BUMPED_KEY, LISTING_VERSION_KEY, LISTINGS_VERSION_KEY
+from ..models import Category, Listing
+from ..routers import ReplicaRouter, health, read_database
+
+User = get_user_model()
+
+# a mirror of the primary, added to databases before test databases are
+# set up, so settings don't define it
+REPLICA = 'replica'
+connections.settings.setdefault(REPLICA, {**connections.settings['default'],
+    'TEST': {**connections.settings['default']['TEST'], 'MIRROR': 'default'}})
+
+ROUTING = {'REPLICAS': [REPLICA], 'MAX_LAG': 5, 'CHECK_INTERVAL': 5,
+    'PIN_SECONDS': 10}
+
+
+class ReplicaRouterTest(SimpleTestCase):
+    """A test case for routing of reads and writes."""
+
+    databases = {'default', REPLICA}
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+        token = read_database.set(REPLICA)
+        self.addCleanup(read_database.reset, token)
+
+    def test_reads_of_a_chosen_replica(self):
+        self.assertEqual(self.router.db_for_read(Listing), REPLICA)
+        self.assertEqual(self.router.db_for_write(Listing), 'default')
+
+    def test_reads_in_transactions_from_primary(self):
+        with transaction.atomic():
+            self.assertEqual(self.router.db_for_read(Listing), 'default')
+
+    def test_migrations_on_primary(self):
+        self.assertTrue(self.router.allow_migrate('default', 'auctions'))
+        self.assertFalse(self.router.allow_migrate(REPLICA, 'auctions'))
+
+
+@override_settings(AUCTION_DB_ROUTING=ROUTING)
+class ReplicaMiddlewareTest(TransactionTestCase):
+    """A test case for reads of requests from replicas, a user writing is
+    pinned to the primary.
+    """
+
+    databases = {'default', REPLICA}
+
+    def setUp(self):
+        cache.clear()
+        health.checks.clear()
+        self.owner = User.objects.create_user(username='owner')
+        self.customer = User.objects.create_user(username='customer')
+        category = Category.objects.create(name='Cat', slug='cat')
+        self.listing = Listing.objects.create(
+            category = category,
+            user = self.owner,
+            name = 'Listing',
+            slug = 'listing',
+            description = 'A description for test listing.',
+            start_bid = 10)
+
+    def get(self, path, **extra):
+        """Return a response and numbers of queries of the primary and the
+        replica.
+        """
+
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections[REPLICA]) as replica:
+            resp = self.client.get(path, **extra)
+        return resp, len(primary), len(replica)
+
+    def test_reads_from_replica(self):
+        resp, primary, replica = self.get(self.listing.get_absolute_url())
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+    def test_user_reads_own_writes_from_primary(self):
+        self.client.force_login(self.customer)
+        url = self.listing.get_absolute_url()
+        _, primary, replica = self.get(url)
+        self.assertGreater(replica, 0)
+
+        resp = self.client.post(url, {'bid': 15, 'bid_submit': 'bid'})
+        self.assertEqual(resp.status_code, 302)
+        resp, primary, replica = self.get(url)
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+        self.assertEqual(resp.context['listing'].current_bid, 15)
+
+        # other users aren't pinned
+        self.client.force_login(self.owner)
+        _, primary, replica = self.get(url)
+        self.assertGreater(replica, 0)
+
+    def test_view_writing_on_get_uses_primary(self):
+        self.client.force_login(self.customer)
+        watch = self.listing.get_absolute_url() + 'add_to_watchlist'
+        _, primary, replica = self.get(watch)
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+        _, primary, replica = self.get(self.listing.get_absolute_url())
+        self.assertEqual(replica, 0)
+
+    def test_api_token_pinned_after_bid(self):
+        token = Token.objects.create(user=self.customer).key
+        url = f'/api/v1/listings/{self.listing.pk}/bids/'
+        _, primary, replica = self.get(url,
+            HTTP_AUTHORIZATION=f'Token {token}')
+        self.assertGreater(replica, 0)
+
+        resp = self.client.post('/api/v1/my-bids/',
+            {'listing': self.listing.pk, 'bid': '15'},
+            content_type='application/json',
+            HTTP_AUTHORIZATION=f'Token {token}')
+        self.assertEqual(resp.status_code, 201)
+        resp, primary, replica = self.get(url,
+            HTTP_AUTHORIZATION=f'Token {token}')
+        self.assertEqual(replica, 0)
+        self.assertContains(resp, '15.00')
+
+        # anonymous reads aren't pinned
+        _, primary, replica = self.get(url)
+        self.assertGreater(replica, 0)
+
+    def test_lagging_replica_falls_back_to_primary(self):
+        with mock.patch.object(health, 'get_lag', return_value=60):
+            _, primary, replica = self.get(self.listing.get_absolute_url())
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+    def test_unavailable_replica_falls_back_to_primary(self):
+        with mock.patch.object(health, 'get_lag', return_value=None):
+            _, primary, replica = self.get(self.listing.get_absolute_url())
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+    def test_lag_checks_are_cached(self):
+        with mock.patch.object(health, 'get_lag', return_value=0) as get_lag:
+            self.get(self.listing.get_absolute_url())
+            self.get(self.listing.get_absolute_url())
+        get_lag.assert_called_once_with(REPLICA)
+
+    def settle_versions(self):
+        """Forget bumps of versions, as if replicas had replayed them."""
+
+        cache.delete_many([BUMPED_KEY.format(key=key) for key in (
+            LISTINGS_VERSION_KEY,
+            LISTING_VERSION_KEY.format(slug=self.listing.slug))])
+
+    def test_page_read_behind_a_bump_is_not_cached(self):
+        url = self.listing.get_absolute_url()
+        for _ in range(2):
+            resp, primary, replica = self.get(url)
+            self.assertEqual(resp.status_code, 200)
+            self.assertGreater(replica, 0)
+
+        self.settle_versions()
+        self.get(url)
+        _, primary, replica = self.get(url)
+        self.assertEqual(primary + replica, 0)
+
+    def test_listing_set_read_behind_a_bump_has_no_etag(self):
+        resp, primary, replica = self.get('/api/v1/listings/')
+        self.assertGreater(replica, 0)
+        self.assertFalse(resp.has_header('ETag'))
+
+        self.settle_versions()
+        resp, primary, replica = self.get('/api/v1/listings/')
+        self.assertGreater(replica, 0)
+        self.assertTrue(resp.has_header('ETag'))
@@ -0,0 +1,240 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from account.models import User
+from graphs.views import CATEGORY_ANALYTICS_CACHE_KEY
+from ..cache import LISTINGS_VERSION_KEY, get_versions
+from ..models import Category, Listing, Bid
+from ..services import (place_bid, close_listing, close_expired_listings,
+    create_listing, bulk_create_listings)
+
+
+class PlaceBidTest(TestCase):
+    """A test case for the `place_bid` service."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create(username='Owner')
+        cls.customer = User.objects.create(username='Customer')
+        cls.category = Category.objects.create(name='Cat', slug='cat')
+        cls.listing = Listing.objects.create(
+            category=cls.category, user=cls.owner, name='Listing',
+            slug='listing', description='Description', start_bid=10)
+
+    def test_higher_bid_is_accepted(self):
+        result = place_bid(self.listing, self.customer, Decimal('10.50'))
+        self.assertTrue(result.accepted)
+        self.assertEqual(result.bid.bid, Decimal('10.50'))
+        self.assertEqual(result.current_bid, Decimal('10.50'))
+
+    def test_bid_equal_to_start_bid_is_rejected(self):
+        result = place_bid(self.listing, self.customer, Decimal('10'))
+        self.assertFalse(result.accepted)
+        self.assertEqual(result.reason, 'Bid must be higher than current.')
+        self.assertFalse(Bid.objects.exists())
+
+    def test_bid_is_checked_against_max_bid(self):
+        place_bid(self.listing, self.customer, Decimal('20'))
+        Bid.objects.create(user=self.customer, listing=self.listing, bid=15)
+        result = place_bid(self.listing, self.customer, Decimal('18'))
+        self.assertFalse(result.accepted)
+        self.assertEqual(result.current_bid, Decimal('20'))
+
+    def test_owner_bid_is_rejected(self):
+        result = place_bid(self.listing, self.owner, Decimal('11'))
+        self.assertFalse(result.accepted)
+        self.assertEqual(result.reason, 'User cannot bid own listings.')
+
+    def test_closed_listing_bid_is_rejected(self):
+        Listing.objects.filter(pk=self.listing.pk).update(is_active=False)
+        result = place_bid(self.listing, self.customer, Decimal('11'))
+        self.assertFalse(result.accepted)
+        self.assertEqual(result.reason, 'Listing is closed.')
+
+    def test_ended_listing_bid_is_rejected(self):
+        Listing.objects.filter(pk=self.listing.pk).update(
+            ends_at=timezone.now() - timedelta(seconds=1))
+        result = place_bid(self.listing, self.customer, Decimal('11'))
+        self.assertFalse(result.accepted)
+        self.assertEqual(result.reason, 'Listing is closed.')
+
+class CloseListingsTest(TestCase):
+    """A test case for the listing closing services."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create(username='Owner')
+        cls.customers = [User.objects.create(username=f'Customer {num}')
+            for num in range(2)]
+        cls.category = Category.objects.create(name='Cat', slug='cat')
+        cls.now = timezone.now()
+
+    def create_listing(self, num, ends_in=None, bids=()):
+        listing = Listing.objects.create(
+            category=self.category, user=self.owner, name=f'Listing {num}',
+            slug=f'listing-{num}', description='Description', start_bid=10,
+            ends_at=ends_in and self.now + ends_in)
+        for customer, bid in zip(self.customers * len(bids), bids):
+            Bid.objects.create(user=customer, listing=listing, bid=bid)
+        return listing
+
+    def test_close_listing_records_winner(self):
+        listing = self.create_listing(1, bids=(11, 12, 13))
+        close_listing(listing)
+        self.assertFalse(listing.is_active)
+        self.assertEqual(listing.winner, self.customers[0])
+        self.assertIsNotNone(listing.closed_at)
+
+    def test_close_listing_without_bids(self):
+        listing = self.create_listing(1)
+        close_listing(listing)
+        self.assertFalse(listing.is_active)
+        self.assertIsNone(listing.winner)
+
+    def test_only_ended_listings_are_closed(self):
+        ended = [self.create_listing(num, timedelta(minutes=-num), (11, 12))
+            for num in range(1, 4)]
+        self.create_listing(4, timedelta(minutes=1))
+        self.create_listing(5)
+
+        with self.assertNumQueries(5):
+            closed = close_expired_listings(now=self.now)
+
+        self.assertEqual({listing.pk for listing in closed},
+            {listing.pk for listing in ended})
+        self.assertEqual(
+            set(Listing.objects.filter(is_active=False).values_list(
+                'slug', 'winner', 'closed_at')),
+            {(listing.slug, self.customers[1].pk, self.now)
+                for listing in ended})
+
+    def test_batches_start_with_earliest_ended(self):
+        for num in range(1, 4):
+            self.create_listing(num, timedelta(minutes=-num))
+
+        closed = close_expired_listings(batch_size=2, now=self.now)
+        self.assertEqual([listing.slug for listing in closed],
+            ['listing-3', 'listing-2'])
+        closed = close_expired_listings(batch_size=2, now=self.now)
+        self.assertEqual([listing.slug for listing in closed], ['listing-1'])
+        self.assertEqual(close_expired_listings(now=self.now), [])
+
+class CreateListingTest(TestCase):
+    """A test case for the listing creation services."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create(username='Owner')
+        cls.category = Category.objects.create(name='Cat', slug='cat')
+
+    def new_listing(self, name='A Listing'):
+        return Listing(category=self.category, user=self.owner, name=name,
+            description='Description', start_bid=10)
+
+    def test_slug_is_made_in_one_insert(self):
+        with self.assertNumQueries(3):
+            listing = create_listing(self.new_listing())
+        self.assertRegex(listing.slug, r'^a-listing-[a-z0-9]{8}$')
+        self.assertEqual(listing.current_bid, 10)
+
+    def test_same_names_get_different_slugs(self):
+        first = create_listing(self.new_listing())
+        first.delete()
+        slugs = {create_listing(self.new_listing()).slug for _ in range(3)}
+        self.assertEqual(len(slugs | {first.slug}), 4)
+
+    def test_long_name_slug_fits_field(self):
+        listing = create_listing(self.new_listing('x' * 250))
+        self.assertEqual(len(listing.slug), 250)
+
+    def test_bulk_create(self):
+        listings = bulk_create_listings(
+            [self.new_listing() for _ in range(50)])
+        self.assertEqual(Listing.objects.filter(
+            slug__startswith='a-listing-').count(), 50)
+        self.assertEqual(len({listing.slug for listing in listings}), 50)
+        self.assertTrue(all(listing.current_bid == 10
+            for listing in listings))
+
+    def test_bulk_create_invalidates_caches(self):
+        cache.set(CATEGORY_ANALYTICS_CACHE_KEY, 'graphs')
+        version, = get_versions([LISTINGS_VERSION_KEY])
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_create_listings([self.new_listing() for _ in range(2)])
+        self.assertIsNone(cache.get(CATEGORY_ANALYTICS_CACHE_KEY))
+        self.assertNotEqual(get_versions([LISTINGS_VERSION_KEY]), [version])
+
+class CreateListingConcurrencyTest(TransactionTestCase):
+    """A stress test case for concurrent listing creation in one category."""
+
+    listing_num = 200
+    workers = 16
+
+    def setUp(self):
+        self.owner = User.objects.create(username='Owner')
+        self.category = Category.objects.create(name='Cat', slug='cat')
+
+    def create(self, num):
+        try:
+            return create_listing(Listing(category=self.category,
+                user=self.owner, name='Listing', description='Description',
+                start_bid=1)).slug
+        finally:
+            connection.close()
+
+    def test_concurrent_creates_get_unique_slugs(self):
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            slugs = list(executor.map(self.create, range(self.listing_num)))
+
+        self.assertEqual(len(set(slugs)), self.listing_num)
+        self.assertEqual(Listing.objects.filter(category=self.category)
+            .count(), self.listing_num)
+
+class PlaceBidConcurrencyTest(TransactionTestCase):
+    """A stress test case for concurrent bids on one listing."""
+
+    bid_num = 300
+    workers = 16
+
+    def setUp(self):
+        self.owner = User.objects.create(username='Owner')
+        self.customers = [User.objects.create(username=f'Customer {num}')
+            for num in range(self.workers)]
+        self.listing = Listing.objects.create(
+            category=Category.objects.create(name='Cat', slug='cat'),
+            user=self.owner, name='Listing', slug='listing',
+            description='Description', start_bid=1)
+
+    def bid(self, num):
+        """Outbid the current bid read without a lock, so concurrent bidders
+        race for the same price.
+        """
+
+        try:
+            current_bid = Listing.objects.values_list(
+                'current_bid', flat=True).get(pk=self.listing.pk)
+            return place_bid(self.listing, self.customers[num % self.workers],
+                current_bid + 1)
+        finally:
+            connection.close()
+
+    def test_accepted_bids_are_strictly_increasing(self):
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            results = list(executor.map(self.bid, range(self.bid_num)))
+
+        accepted = [result for result in results if result.accepted]
+        bids = list(Bid.objects.filter(listing=self.listing)
+            .order_by('pk').values_list('bid', flat=True))
+        self.assertEqual(len(bids), len(accepted))
+        self.assertTrue(all(
+            prev < bid for prev, bid in zip(bids, bids[1:])))
+
+        listing = Listing.objects.get(pk=self.listing.pk)
+        self.assertEqual(listing.bid_count, len(bids))
+        self.assertEqual(listing.current_bid, bids[-1])
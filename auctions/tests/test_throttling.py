@@ -0,0 +1,115 @@
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, TestCase, \
+    override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from ..models import Category, Listing, Bid, Comment
+from ..throttling import (TokenBucket, get_bucket, get_client_ip,
+                          parse_rate, throttle)
+
+User = get_user_model()
+
+
+class TokenBucketTest(SimpleTestCase):
+    """A test case for the cache-backed token bucket."""
+
+    def setUp(self):
+        cache.clear()
+        self.bucket = TokenBucket('test', '4/min')
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('10/s'), (10, 1))
+        self.assertEqual(parse_rate('60/min'), (60, 60))
+        self.assertEqual(parse_rate('1/day'), (1, 86400))
+
+    def test_bucket_is_emptied(self):
+        results = [self.bucket.hit('a', now=600) for _ in range(5)]
+        self.assertEqual([result.allowed for result in results],
+            [True, True, True, True, False])
+        self.assertEqual(results[0].remaining, 3)
+        # the window is weighted by a quarter when a token is freed
+        self.assertEqual(results[-1].wait, 75)
+        self.assertTrue(self.bucket.hit('b', now=600).allowed)
+
+    def test_rejected_hits_take_no_tokens(self):
+        for _ in range(10):
+            self.bucket.hit('a', now=600)
+        self.assertEqual(cache.get(self.bucket.get_key('a', 10)), 4)
+
+    def test_window_slides(self):
+        for _ in range(4):
+            self.bucket.hit('a', now=630)
+        result = self.bucket.hit('a', now=665)
+        self.assertFalse(result.allowed)
+        self.assertAlmostEqual(result.wait, 10)
+
+        # half of the previous window is in the period
+        self.assertTrue(self.bucket.hit('a', now=690).allowed)
+        self.assertTrue(self.bucket.hit('a', now=690).allowed)
+        self.assertFalse(self.bucket.hit('a', now=690).allowed)
+        self.assertTrue(self.bucket.hit('a', now=705).allowed)
+
+    @override_settings(AUCTION_THROTTLE_RATES={'test': '1/min'})
+    def test_throttle_returns_wait_of_empty_bucket(self):
+        self.assertIsNone(throttle([('test', 'a'), ('unlimited', 'a')]))
+        wait = throttle([('unlimited', 'a'), ('test', 'a')])
+        self.assertTrue(60 <= wait <= 120)
+
+    @override_settings(AUCTION_THROTTLE_RATES={'test': '1/min',
+        'other': '5/min'})
+    def test_rejected_request_takes_no_tokens(self):
+        throttle([('test', 'a')])
+        self.assertIsNotNone(throttle([('other', 'a'), ('test', 'a'),
+            ('other', 'b')]))
+        self.assertEqual(get_bucket('other').hit('a').remaining, 4)
+        self.assertEqual(get_bucket('other').hit('b').remaining, 4)
+
+    @override_settings(AUCTION_THROTTLE_PROXIES=1)
+    def test_client_ip_behind_proxy(self):
+        request = RequestFactory().get('/',
+            HTTP_X_FORWARDED_FOR='10.0.0.1, 10.0.0.2')
+        self.assertEqual(get_client_ip(request), '10.0.0.2')
+
+
+@override_settings(AUCTION_THROTTLE_RATES={'bids_user': '1/min',
+    'writes_user': '1/min'})
+class ThrottledListingFormsTest(TestCase):
+    """A test case for throttled bid and comment forms of listing pages."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username='owner')
+        cls.customer = User.objects.create_user(username='customer')
+        cls.category = Category.objects.create(name='Cat', slug='cat')
+        cls.listing = Listing.objects.create(
+            category = cls.category,
+            user = cls.owner,
+            name = 'Listing',
+            slug = 'listing',
+            description = 'A description for test listing.',
+            start_bid = 10)
+
+    def setUp(self):
+        cache.clear()
+        self.location = reverse('auctions:listing',
+            args=[self.category.slug, self.listing.slug])
+        self.client.force_login(self.customer)
+
+    def test_bids_are_throttled(self):
+        self.client.post(self.location, {'bid': '15', 'bid_submit': 'bid'})
+        resp = self.client.post(self.location,
+            {'bid': '20', 'bid_submit': 'bid'})
+        self.assertEqual(resp.status_code, 429)
+        self.assertTrue(resp.has_header('Retry-After'))
+        self.assertIn('Too many requests', resp.context['bid_form']
+            .errors['bid'][0])
+        self.assertEqual(Bid.objects.filter(listing=self.listing).count(), 1)
+
+    def test_comments_are_throttled(self):
+        self.client.post(self.location,
+            {'text': 'First.', 'comment_submit': 'comment'})
+        resp = self.client.post(self.location,
+            {'text': 'Second.', 'comment_submit': 'comment'})
+        self.assertContains(resp, 'Too many requests', status_code=429)
+        self.assertEqual(Comment.objects.count(), 1)
@@ -1,4 +1,5 @@
 from unittest import skip, skipIf
+from django.core.cache import cache
 from django.test import TestCase, RequestFactory
 from django.urls import reverse, resolve
 from django.contrib.auth import get_user_model
@@ -53,6 +54,7 @@ class TestCategoryView(BaseTestViewMethodsMixin, TestCase):
                 name=f'Cat {category}', slug=f'cat-{category}')
 
     def setUp(self):
+        cache.clear()
         self.status_code = 200
         self.location = '/categories/'
         self.context_name = 'categories'
@@ -97,6 +99,39 @@ class TestSearchView(
         self.assertIn(f'{search}',
             resp.context[self.context_name][0].description)
 
+    def test_search_matches_word_prefix(self):
+        Listing.objects.create(category=Category.objects.get(name='Cat 1'),
+            user=User.objects.get(username='Tester'), name='Vintage camera',
+            slug='vintage-camera', description='Film.', start_bid=1)
+        resp = self.client.get('/search/', {'q': 'vint'})
+        self.assertEqual(len(resp.context[self.context_name]), 1)
+
+    def test_search_tolerates_typos(self):
+        Listing.objects.create(category=Category.objects.get(name='Cat 1'),
+            user=User.objects.get(username='Tester'), name='Vintage camera',
+            slug='vintage-camera', description='Film.', start_bid=1)
+        resp = self.client.get('/search/', {'q': 'camra'})
+        self.assertEqual(resp.context[self.context_name][0].name,
+            'Vintage camera')
+
+    def test_search_ranks_name_above_description(self):
+        category = Category.objects.get(name='Cat 1')
+        user = User.objects.get(username='Tester')
+        Listing.objects.create(category=category, user=user,
+            name='Old lamp', slug='old-lamp',
+            description='Goes well with a guitar.', start_bid=1)
+        Listing.objects.create(category=category, user=user,
+            name='Guitar', slug='guitar', description='Acoustic.',
+            start_bid=1)
+        resp = self.client.get('/search/', {'q': 'guitar'})
+        self.assertEqual([listing.name for listing in
+            resp.context[self.context_name]], ['Guitar', 'Old lamp'])
+
+    def test_search_by_username(self):
+        resp = self.client.get('/search/', {'q': 'tester'})
+        self.assertEqual(
+            resp.context['paginator'].count, 20)
+
     @skip
     def test_view_lists_only_active_listings(self):
         pass
@@ -122,6 +157,7 @@ class TestIndexView(
                 is_active = listing % 2)
 
     def setUp(self):
+        cache.clear()
         self.status_code = 200
         self.paginated_by = 15
         self.location = ''
@@ -151,6 +187,7 @@ class TestListingsByCatView(
                 is_active = listing % 2)
 
     def setUp(self):
+        cache.clear()
         self.status_code = 200
         self.paginated_by = 15
         self.cat_slug = 'cat-1'
@@ -220,6 +257,7 @@ class TestDetailedListingView(BaseTestViewMethodsMixin, TestCase):
             user=cls.user_customer, listing=cls.listing, bid=19.99)
 
     def setUp(self):
+        cache.clear()
         self.status_code = 200
         self.paginated_by = 20
         self.location = f'/{self.category.slug}/{self.listing.slug}/'
@@ -264,6 +302,22 @@ class TestDetailedListingView(BaseTestViewMethodsMixin, TestCase):
         self.assertNotIn(self.authenticated_as_owner_checklist['hidden'],
             resp.context)
 
+    def test_higher_bid_is_placed(self):
+        self.client.force_login(self.user_customer)
+        resp = self.client.post(self.location,
+            {'bid': '25.00', 'bid_submit': 'bid'})
+        self.assertRedirects(resp, self.location)
+        self.listing.refresh_from_db()
+        self.assertEqual(float(self.listing.current_bid), 25)
+
+    def test_lower_than_max_bid_is_rejected(self):
+        self.client.force_login(self.user_customer)
+        resp = self.client.post(self.location,
+            {'bid': '15.00', 'bid_submit': 'bid'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.context['bid_form'].errors)
+        self.assertEqual(Bid.objects.filter(listing=self.listing).count(), 1)
+
 class TestAddListingView(BaseTestViewMethodsMixin, TestCase):
     """A test case for Add Listing View."""
 
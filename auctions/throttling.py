@@ -0,0 +1,140 @@
+import math
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+THROTTLE_KEY = 'auctions:throttle:{scope}:{ident}:{window}'
+
+DURATIONS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """Parse a rate like `10/min` into a number of requests and a period
+    in seconds.
+    """
+
+    num, period = rate.split('/')
+    return int(num), DURATIONS[period[0]]
+
+
+def get_client_ip(request):
+    """Return the client's IP address. Behind `AUCTION_THROTTLE_PROXIES`
+    trusted proxies it's taken from `X-Forwarded-For`.
+    """
+
+    proxies = settings.AUCTION_THROTTLE_PROXIES
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if proxies and forwarded:
+        addrs = [addr.strip() for addr in forwarded.split(',')]
+        return addrs[-min(proxies, len(addrs))]
+    return request.META.get('REMOTE_ADDR')
+
+
+@dataclass(frozen=True)
+class ThrottleResult:
+    """A result of a hit of a bucket.
+    Fields: `allowed`, `remaining` (requests left now) and `wait` (seconds
+    until the next request is allowed, if it isn't).
+    """
+
+    allowed: bool
+    remaining: int = 0
+    wait: float | None = None
+
+
+class TokenBucket:
+    """A bucket of `num` tokens per `period` seconds, refilled continuously,
+    kept in the shared cache so every worker sees the same bucket.
+    Tokens are counted by atomic increments of per-window counters; the
+    count of the previous window is weighted by the part of it still
+    inside the sliding period.
+    """
+
+    def __init__(self, scope, rate):
+        self.scope = scope
+        self.num, self.period = parse_rate(rate)
+
+    def get_key(self, ident, window):
+        return THROTTLE_KEY.format(scope=self.scope, ident=ident,
+            window=window)
+
+    def get_wait(self, previous, count, elapsed):
+        """Return seconds until a token is free, given counts of the
+        previous and current windows and the elapsed part of the current.
+        """
+
+        if count < self.num:
+            # the previous window slides out of the period
+            fraction = 1 - (self.num - count - 1) / previous
+            return max(fraction - elapsed, 0) * self.period
+
+        # the current window becomes the previous one
+        fraction = max(1 - (self.num - 1) / count, 0)
+        return (1 - elapsed + fraction) * self.period
+
+    def hit(self, ident, now=None):
+        """Take a token for `ident`. Return a `ThrottleResult`."""
+
+        now = time.time() if now is None else now
+        window, elapsed = divmod(now / self.period, 1)
+        key = self.get_key(ident, int(window))
+
+        try:
+            count = cache.incr(key)
+        except ValueError:
+            cache.add(key, 0, timeout=self.period * 2 + 1)
+            count = cache.incr(key)
+        previous = cache.get(self.get_key(ident, int(window) - 1), 0)
+        used = previous * (1 - elapsed) + count
+        if used <= self.num:
+            return ThrottleResult(allowed=True,
+                remaining=int(self.num - used))
+
+        # a rejected request doesn't take a token
+        cache.decr(key)
+        return ThrottleResult(allowed=False,
+            wait=self.get_wait(previous, count - 1, elapsed))
+
+    def refund(self, ident, now):
+        """Give back the token of a hit at `now`, taken by a request that
+        another bucket rejected.
+        """
+
+        try:
+            cache.decr(self.get_key(ident, int(now / self.period)))
+        except ValueError:
+            # the window has expired
+            pass
+
+
+def get_bucket(scope):
+    """Return a bucket of a scope with the rate set by the
+    `AUCTION_THROTTLE_RATES` setting, or `None` if the scope isn't limited.
+    """
+
+    rate = settings.AUCTION_THROTTLE_RATES.get(scope)
+    return TokenBucket(scope, rate) if rate else None
+
+
+def throttle(hits):
+    """Take tokens of `(scope, ident)` pairs. Return seconds (rounded up)
+    to wait before retrying if a bucket is empty, otherwise `None`.
+    A rejected request stops at the empty bucket and takes no tokens.
+    """
+
+    now = time.time()
+    taken = []
+    for scope, ident in hits:
+        bucket = get_bucket(scope)
+        if bucket is None:
+            continue
+        result = bucket.hit(ident, now)
+        if not result.allowed:
+            for bucket, ident in taken:
+                bucket.refund(ident, now)
+            return math.ceil(result.wait)
+        taken.append((bucket, ident))
+    return None
@@ -3,7 +3,8 @@ from django.contrib.auth.decorators import login_required
 
 from .views import (IndexView, CategoryView, ListingsByCatView,
     DetailedListingView, ListingsByOwnerView, BiddingView, AddListingView,
-    AddToWatchlist, WatchlistView, CloseListingView, SearchView)
+    AddToWatchlist, WatchlistView, CloseListingView, SearchView,
+    PageCacheStatsView)
 
 
 app_name = 'auctions'
@@ -36,4 +37,7 @@ urlpatterns = [
         name='get_users_listings'),
 
     path('bidding', login_required(BiddingView.as_view()), name='bidding'),
+
+    # monitoring
+    path('cache-stats', PageCacheStatsView.as_view(), name='cache_stats'),
 ]
@@ -4,20 +4,29 @@ from django.contrib.auth import get_user_model
 from django.shortcuts import redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
-from django.utils.text import slugify
-from django.contrib.postgres.search import SearchVector
 from django.views.generic import (ListView, DetailView, View,
     FormView, RedirectView)
+from django.db.models import Exists, OuterRef
+from django.http import JsonResponse
+from django.contrib.admin.views.decorators import staff_member_required
 
+from .async_views import AsyncReadMixin
 from .models import Category, Listing, Watchlist
-from .forms import ListingForm, BidForm, CommentForm
-from .mixins import GetListingsQuerySetMixin
+from .cache import (AnonymousPageCacheMixin, LISTING_VERSION_KEY,
+    get_page_cache_stats)
+from .conditional import ConditionalPageMixin, get_listing_validators
+from .facets import get_facets
+from .filters import filter_listings
+from .forms import ListingForm, BidForm, CommentForm, SearchFilterForm
+from .mixins import GetListingsQuerySetMixin, KeysetPaginationMixin
+from .services import place_bid, close_listing, create_listing
+from .throttling import get_client_ip, throttle
 
 
 User = get_user_model()
 
 
-class CategoryView(ListView):
+class CategoryView(AsyncReadMixin, AnonymousPageCacheMixin, ListView):
     """Render a list of categories."""
 
     model = Category
@@ -30,8 +39,12 @@ class CategoryView(ListView):
         return self.model.objects.all()
 
 
-class SearchView(GetListingsQuerySetMixin, ListView):
-    """Render page that depends on user's request."""
+class SearchView(AsyncReadMixin, GetListingsQuerySetMixin,
+        KeysetPaginationMixin, ListView):
+    """Render page that depends on user's request, with facets of the
+    results: counts per category and per price bucket, which refine the
+    search by `category`, `min_price` and `max_price`.
+    """
 
     paginate_by = 15
     template_name = 'auctions/listing_search.html'
@@ -40,19 +53,73 @@ class SearchView(GetListingsQuerySetMixin, ListView):
 
     def get_queryset(self):
         """Call a `get_listingset` function to get a query of listings.
-        Filter the query by a search request.
+        Filter the query by refinements (invalid ones are ignored) and by
+        a search request ranked by relevance.
         """
 
         search_request = self.request.GET.get('q')
-        query = self.get_listingset().annotate(search=SearchVector(
-            'name', 'description', 'user__username'))
+        query = self.get_listingset()
+        form = SearchFilterForm(self.request.GET)
+        form.is_valid()
+        query = filter_listings(query, **form.cleaned_data)
         if search_request:
-            query = query.filter(search=search_request)
+            query = self.search_listings(query, search_request)
 
         return query
 
+    def get_refined_query(self, **params):
+        """Return a query string of the request's first page with params
+        replaced, `None` ones removed.
+        """
+
+        query = self.request.GET.copy()
+        query.pop(self.page_kwarg, None)
+        query.pop(self.cursor_kwarg, None)
+        for name, value in params.items():
+            if value is None:
+                query.pop(name, None)
+            else:
+                query[name] = value
+        return query.urlencode()
+
+    def get_facets(self):
+        """Return facets of the results, computed once per request."""
+
+        if not hasattr(self, 'facets'):
+            self.facets = get_facets(self.object_list)
+        return self.facets
+
+    def get_paginator(self, queryset, *args, **kwargs):
+        """Return a paginator of the results counted by their facets
+        instead of a count query.
+        """
+
+        paginator = super().get_paginator(queryset, *args, **kwargs)
+        paginator.count = self.get_facets()['count']
+        return paginator
 
-class IndexView(GetListingsQuerySetMixin, ListView):
+    def get_context_data(self, **kwargs):
+        """Return context with facets of the results and query strings
+        refining or resetting them.
+        """
+
+        context = super().get_context_data(**kwargs)
+        facets = self.get_facets()
+        context['facets_count'] = facets['count']
+        context['category_facets'] = [
+            {**item, 'query': self.get_refined_query(category=item['id'])}
+            for item in facets['categories']]
+        context['price_facets'] = [
+            {**item, 'query': self.get_refined_query(
+                min_price=item['min'], max_price=item['max'])}
+            for item in facets['prices']]
+        context['reset_query'] = self.get_refined_query(category=None,
+            min_price=None, max_price=None)
+        return context
+
+
+class IndexView(AsyncReadMixin, AnonymousPageCacheMixin,
+        GetListingsQuerySetMixin, KeysetPaginationMixin, ListView):
     """Render the homepage, set by a number of listings per page and
     template name.
     """
@@ -70,7 +137,8 @@ class IndexView(GetListingsQuerySetMixin, ListView):
         return self.get_listingset().filter(is_active=True)
 
 
-class ListingsByCatView(GetListingsQuerySetMixin, ListView):
+class ListingsByCatView(AsyncReadMixin, AnonymousPageCacheMixin,
+        GetListingsQuerySetMixin, KeysetPaginationMixin, ListView):
     """Render listings by chosen category."""
 
     paginate_by = 15
@@ -80,20 +148,26 @@ class ListingsByCatView(GetListingsQuerySetMixin, ListView):
 
     def get_queryset(self):
         """Call a `get_listingset` function to get a query of listings.
-        Return the query filtered by `is_active=True` and `cat_slug`.
+        Return the query filtered by `is_active=True` and the category of
+        `cat_slug`. Filtering by the category's id (not by a join on its
+        slug) lets the query walk the category's listings index.
         """
 
-        return self.get_listingset().filter(is_active=True, category__slug=self.kwargs['cat_slug'])
+        self.category = get_object_or_404(Category,
+            slug=self.kwargs['cat_slug'])
+        return self.get_listingset().filter(is_active=True,
+            category=self.category)
 
     def get_context_data(self, **kwargs):
         """Return context by category."""
 
         context = super().get_context_data(**kwargs)
-        context['category'] = get_object_or_404(Category, slug=self.kwargs['cat_slug'])
+        context['category'] = self.category
         return context
 
 
-class ListingsByOwnerView(GetListingsQuerySetMixin, ListView):
+class ListingsByOwnerView(GetListingsQuerySetMixin, KeysetPaginationMixin,
+        ListView):
     """Render listings created by a user."""
 
     paginate_by = 20
@@ -119,12 +193,42 @@ class GetFilledForm(View):
     bid_form_class = BidForm
     comment_form_class = CommentForm
 
+    def get_throttle_hits(self, form):
+        """Return throttle scopes and identities of a submitted form, the
+        same as of the API (see `auctions_api.throttling`).
+        """
+
+        if isinstance(form, BidForm):
+            hits = [('bids_user', self.request.user.pk),
+                ('bids_listing', self.object.pk)]
+        else:
+            hits = [('writes_user', self.request.user.pk)]
+        return hits + [('writes_ip', get_client_ip(self.request))]
+
+    def render_throttled(self, form, wait):
+        """Rerender the page with a throttled form and a `429 Too Many
+        Requests` status.
+        """
+
+        message = f'Too many requests. Try again in {wait} seconds.'
+        if isinstance(form, BidForm):
+            form.add_error('bid', message)
+            context = {'bid_form': form}
+        else:
+            form.add_error('text', message)
+            context = {'comment_form': form}
+        response = self.render_to_response(self.get_context_data(**context),
+            status=429)
+        response['Retry-After'] = str(wait)
+        return response
+
     @method_decorator(login_required)
     def post(self, request, *args, **kwargs):
         """Check `POST` request for type of submit. Depends on request
-        build a filled form for bid or comment. Redirect to the listing page if
-        form is valid. Otherwise append invalid data to context and rerender
-        the page.
+        build a filled form for bid or comment. Throttled forms are
+        rejected. Bids are placed by the `place_bid` service. Redirect to the
+        listing page if form is valid and the bid is accepted. Otherwise
+        append invalid data to context and rerender the page.
         """
 
         self.object = self.get_object()
@@ -137,27 +241,78 @@ class GetFilledForm(View):
         elif 'comment_submit' in request.POST:
             form = self.comment_form_class(post_data)
 
-        if form.is_valid():
+        wait = throttle(self.get_throttle_hits(form))
+        if wait is not None:
+            return self.render_throttled(form, wait)
+
+        if form.is_valid() and isinstance(form, BidForm):
+            result = place_bid(self.object, self.request.user,
+                form.cleaned_data['bid'])
+            if result.accepted:
+                return redirect(self.object.get_absolute_url())
+            form.add_error('bid', result.reason)
+        elif form.is_valid():
             form_data = form.save(commit=False)
             form_data.user = self.request.user
             form_data.listing = self.object
             form_data.save()
             return redirect(self.object.get_absolute_url())
-        elif isinstance(form, BidForm) and not form.is_valid():
+
+        if isinstance(form, BidForm) and not form.is_valid():
             context['bid_form'] = form
         elif isinstance(form, CommentForm) and not form.is_valid():
             context['comment_form'] = form
         return self.render_to_response(self.get_context_data(**context))
 
 
-class DetailedListingView(GetFilledForm, DetailView):
-    """Render a detailed listing page with a bid and a comment forms."""
+class DetailedListingView(AsyncReadMixin, AnonymousPageCacheMixin,
+        ConditionalPageMixin, GetFilledForm, DetailView):
+    """Render a detailed listing page with a bid and a comment forms.
+    Conditional requests are answered by validators of the listing, its
+    bids and comments, fetched with the listing itself.
+    """
 
     model = Listing
     template_name = 'auctions/listing.html'
     slug_url_kwarg = 'listing_slug'
     context_object_name = 'listing'
+    cache_query_params = ()
+
+    def get_cache_version_keys(self):
+        """Return the version key of the listing."""
+
+        return [LISTING_VERSION_KEY.format(slug=self.kwargs['listing_slug'])]
+
+    def get_queryset(self):
+        """Return listings with their categories, owners and comment stats.
+        Annotate `in_watchlist` for authenticated users.
+        """
+
+        query = self.model.objects.select_related('category', 'user')\
+            .with_comment_stats()
+        if self.request.user.is_authenticated:
+            query = query.annotate(in_watchlist=Exists(Watchlist.objects
+                .filter(user=self.request.user, listing=OuterRef('pk'))))
+        return query
 
+    def get_object(self, queryset=None):
+        """Return the listing, fetched once per request."""
+
+        if getattr(self, 'object', None) is None:
+            self.object = super().get_object(queryset)
+        return self.object
+
+    def get_validators(self):
+        """Return validators of the listing. Pages of authenticated users
+        also depend on the user, the watchlist and the CSRF secret of
+        rendered forms.
+        """
+
+        listing = self.get_object()
+        if not self.request.user.is_authenticated:
+            return get_listing_validators(listing)
+        return get_listing_validators(listing, self.request.user.pk,
+            listing.in_watchlist, self.request.META.get('CSRF_COOKIE'))
 
     def get_context_data(self, **kwargs):
         """Collect and return a context. Contains:
@@ -172,19 +327,22 @@ class DetailedListingView(GetFilledForm, DetailView):
         context['listing_slug'] = self.kwargs['listing_slug']
         context['start_bid'] = self.object.start_bid
         context['listing_owner'] = self.object.user
-        context['comments'] = self.object.comment_set.order_by('-date_added')
-
-        bids = self.object.bid_set.order_by('-bid')
-        if bids:
-            context['current_bid'] = bids[0].bid
+        context['comments'] = self.object.comment_set.select_related(
+            'user').order_by('-date_added')
+
+        bids = []
+        if self.object.bid_count:
+            bids = list(self.object.bid_set.select_related('user')
+                .order_by('-bid')[:1])
+            context['current_bid'] = self.object.current_bid
             context['current_bid_owner'] = bids[0].user
-            context['bid_count'] = len(bids)
+            context['bid_count'] = self.object.bid_count
 
         if self.request.user.is_authenticated:
-            context['in_watchlist'] = User.objects.get(
-                username=self.request.user).watchlist_set.filter(listing=self.object)
+            context['in_watchlist'] = self.object.in_watchlist
 
-            context['comment_form'] = self.comment_form_class()
+            if not context.get('comment_form'):
+                context['comment_form'] = self.comment_form_class()
 
             is_author = self.request.user == context['listing_owner']
             is_last_bidder = False
@@ -212,15 +370,13 @@ class AddListingView(FormView):
         return context
 
     def form_valid(self, form):
-        """Fill user and slug fields of the validated form and save it.
-        Redirect to just created listing page.
+        """Fill the user field of the validated form and save it with a
+        generated slug. Redirect to just created listing page.
         """
 
         listing = form.save(commit=False)
         listing.user = self.request.user
-        listing_id = Listing.objects.filter(category=listing.category).count() + 1
-        listing.slug = slugify(f'{listing.name}_{listing_id}')
-        listing.save()
+        create_listing(listing)
         return redirect(listing.get_absolute_url())
 
 
@@ -228,6 +384,8 @@ class CloseListingView(RedirectView):
     """Close a listing."""
 
     permanent = False
+    # writes on `GET`, see `auctions.routers.ReplicaMiddleware`
+    use_primary = True
     query_string = True
     pattern_name = 'close_listing'
 
@@ -237,8 +395,7 @@ class CloseListingView(RedirectView):
         """
 
         if listing.user == self.request.user:
-            listing.is_active = False
-            listing.save()
+            close_listing(listing)
         return listing
 
     def get_redirect_url(self, *args, **kwargs):
@@ -252,7 +409,7 @@ class CloseListingView(RedirectView):
         return listing.get_absolute_url()
 
 
-class BiddingView(ListView):
+class BiddingView(KeysetPaginationMixin, ListView):
     """Render list of bids made by a user."""
 
     paginate_by = 20
@@ -261,11 +418,15 @@ class BiddingView(ListView):
     context_object_name = 'bids'
 
     def get_queryset(self):
+        """Return bids of a user with their listings and categories."""
+
         user = get_object_or_404(User,  username=self.request.user)
-        return user.bid_set.order_by('-date_added')
+        return user.bid_set.select_related('listing__category')\
+            .order_by('-date_added')
 
 
-class WatchlistView(GetListingsQuerySetMixin, ListView):
+class WatchlistView(GetListingsQuerySetMixin, KeysetPaginationMixin,
+        ListView):
     """Render user's watchlist watchlist."""
 
     paginate_by = 20
@@ -289,6 +450,7 @@ class AddToWatchlist(RedirectView):
     """Add a listing to a user's watchlist."""
 
     permanent = False
+    use_primary = True
     query_string = True
     pattern_name = 'watch'
     model = Watchlist
@@ -311,3 +473,11 @@ class AddToWatchlist(RedirectView):
         self.watch_or_unwatch(listing)
 
         return listing.get_absolute_url()
+
+
+@method_decorator(staff_member_required, name='dispatch')
+class PageCacheStatsView(View):
+    """Return page cache hits and misses for monitoring."""
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse(get_page_cache_stats())
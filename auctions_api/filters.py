@@ -0,0 +1,53 @@
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend
+
+from auctions.filters import (ACTIVE_LISTING_ORDERINGS,
+    INDEXED_LISTING_ORDERINGS, filter_listings, order_listings)
+
+
+class ListingFilterSerializer(serializers.Serializer):
+    """A serializer of listing filters and the ordering of query parameters.
+    Fields: `category`, `user`, `is_active`, `has_bids`, `min_price`,
+    `max_price`, `ordering`.
+    Orderings are limited to the indexed ones.
+    """
+
+    category = serializers.IntegerField(required=False)
+    user = serializers.IntegerField(required=False)
+    is_active = serializers.BooleanField(required=False)
+    has_bids = serializers.BooleanField(required=False)
+    min_price = serializers.DecimalField(max_digits=19, decimal_places=2,
+        min_value=0, required=False)
+    max_price = serializers.DecimalField(max_digits=19, decimal_places=2,
+        min_value=0, required=False)
+    ordering = serializers.ChoiceField(choices=INDEXED_LISTING_ORDERINGS,
+        required=False)
+
+    def validate(self, attrs):
+        if attrs.get('ordering') in ACTIVE_LISTING_ORDERINGS and \
+                not attrs.get('is_active'):
+            raise serializers.ValidationError({'ordering': 'Ordering by '
+                f'{attrs["ordering"]} requires is_active=true.'})
+        min_price, max_price = attrs.get('min_price'), attrs.get('max_price')
+        if None not in (min_price, max_price) and min_price > max_price:
+            raise serializers.ValidationError(
+                {'max_price': 'Must not be less than min_price.'})
+        return attrs
+
+
+class ListingFilterBackend(BaseFilterBackend):
+    """Filter and order listings by query parameters (see
+    `ListingFilterSerializer`), the same way as the pages (see
+    `auctions.filters`). Invalid parameters are a `400 Bad Request`.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        params = ListingFilterSerializer(data=request.query_params.dict())
+        params.is_valid(raise_exception=True)
+        filters = dict(params.validated_data)
+        ordering = filters.pop('ordering', None)
+
+        queryset = filter_listings(queryset, **filters)
+        if ordering:
+            queryset = order_listings(queryset, ordering)
+        return queryset
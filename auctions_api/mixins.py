@@ -0,0 +1,179 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from auctions.conditional import get_not_modified_response, set_validators
+from auctions.pagination import InvalidOrdering, KeysetPaginator
+from .renderers import NDJSONRenderer
+from .serializers import ValuesSerializer
+
+
+class ConditionalGetMixin:
+    """Mixin for view sets that answer conditional `GET` requests.
+    Handlers call `get_not_modified_response` before querying and
+    serializing data. Validators are returned by a `get_<action>_validators`
+    method of the action, and are set on successful responses.
+    """
+
+    validators = (None, None)
+
+    def get_validators(self):
+        """Return an ETag and a last modified date of the action."""
+
+        method = getattr(self, f'get_{self.action}_validators', None)
+        return method() if method else (None, None)
+
+    def get_variant(self):
+        """Return parts of the request a response varies on: the path with
+        query parameters and the negotiated media type.
+        """
+
+        return (self.request.get_full_path(),
+            self.request.accepted_renderer.media_type)
+
+    def get_not_modified_response(self):
+        """Return a `304 Not Modified` response if the request's conditions
+        match the validators, otherwise `None`.
+        """
+
+        self.validators = self.get_validators()
+        return get_not_modified_response(self.request, *self.validators)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response,
+            *args, **kwargs)
+        if request.method in ('GET', 'HEAD') and response.status_code in (
+                200, 304):
+            set_validators(response, *self.validators)
+        return response
+
+
+def plan_queryset(queryset, fields):
+    """Return the query set narrowed to columns of serializer fields, with
+    relations of nested serializers fetched by `select_related`.
+    """
+
+    related, columns = [], []
+
+    def add_fields(model, fields, prefix):
+        for field in fields.values():
+            if field.write_only:
+                continue
+            try:
+                model_field = model._meta.get_field(field.source)
+            except FieldDoesNotExist:
+                # computed by the serializer, load all columns
+                columns.append(None)
+                continue
+            columns.append(prefix + model_field.name)
+            if isinstance(field, serializers.BaseSerializer) and \
+                    model_field.many_to_one:
+                related.append(prefix + model_field.name)
+                add_fields(model_field.related_model, field.fields,
+                    f'{prefix}{model_field.name}__')
+
+    add_fields(queryset.model, fields, '')
+    if related:
+        queryset = queryset.select_related(*related)
+    if None in columns:
+        return queryset
+    return queryset.only(*columns)
+
+
+class ValuesListMixin:
+    """Mixin for view sets listing objects by a `ValuesSerializer` of
+    their serializer class: the `list` action reads rows of the serialized
+    columns only, without model instances. The `retrieve` action loads
+    the serialized columns only, so `?fields=` narrows both queries, and
+    relations expanded by `?expand=` are read by joins.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action == 'retrieve':
+            queryset = plan_queryset(queryset, self.get_serializer().fields)
+        return queryset
+
+    def get_values_serializer(self, serializer_class=None):
+        return ValuesSerializer(
+            serializer_class or self.get_serializer_class(),
+            context=self.get_serializer_context())
+
+    def list(self, request, *args, **kwargs):
+        values = self.get_values_serializer()
+        queryset = values.get_queryset(
+            self.filter_queryset(self.get_queryset()))
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(
+                values.to_representation(page))
+        return Response(values.to_representation(queryset))
+
+
+class RelatedListMixin(ValuesListMixin):
+    """Mixin for view sets with actions listing related objects.
+    Paginate rows of the objects by a pagination class, or stream all of
+    them as NDJSON (`?format=ndjson` or `Accept: application/x-ndjson`),
+    so memory use doesn't grow with the result: from a server-side cursor,
+    or by keyset pages of `stream_chunk_size` rows under ASGI, where parts
+    of a stream are read in threads of `auctions.async_views.ASGIHandler`
+    and a cursor can't be held across them.
+    Actions set `renderer_classes=RelatedListMixin.related_renderer_classes`.
+    """
+
+    related_renderer_classes = (*api_settings.DEFAULT_RENDERER_CLASSES,
+        NDJSONRenderer)
+    stream_chunk_size = 2000
+
+    def list_related(self, queryset, serializer_class, pagination_class):
+        """Return a paginated or a streaming response of the query set."""
+
+        values = self.get_values_serializer(serializer_class)
+        queryset = values.get_queryset(queryset)
+        if isinstance(self.request.accepted_renderer, NDJSONRenderer):
+            return self.stream_related(queryset, values)
+
+        paginator = pagination_class()
+        page = paginator.paginate_queryset(queryset, self.request, view=self)
+        return paginator.get_paginated_response(
+            values.to_representation(page))
+
+    def get_chunks(self, queryset):
+        """Yield chunks of rows of the query set, each read by a query of
+        its own: keyset pages, or slices if the ordering isn't supported
+        by keysets.
+        """
+
+        try:
+            paginator = KeysetPaginator(queryset, self.stream_chunk_size)
+        except InvalidOrdering:
+            offset = 0
+            while chunk := list(
+                    queryset[offset:offset + self.stream_chunk_size]):
+                yield chunk
+                offset += len(chunk)
+            return
+
+        page = paginator.page()
+        yield page.object_list
+        while page.has_next():
+            page = paginator.page(page.next_cursor)
+            yield page.object_list
+
+    def stream_related(self, queryset, values):
+        """Return a response streaming rows of the query set as NDJSON."""
+
+        renderer = self.request.accepted_renderer
+        if isinstance(self.request._request, ASGIRequest):
+            content = (b''.join(renderer.render_lines(map(values.to_row,
+                chunk))) for chunk in self.get_chunks(queryset))
+        else:
+            content = renderer.render_lines(map(values.to_row,
+                queryset.iterator(chunk_size=self.stream_chunk_size)))
+        return StreamingHttpResponse(content,
+            content_type=renderer.media_type)
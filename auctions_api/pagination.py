@@ -1,12 +1,70 @@
+from collections import OrderedDict
+
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from auctions.pagination import (EstimatedCountPaginator, InvalidCursor,
+    InvalidOrdering, KeysetPaginator)
 
 
 class BasicPaginationParams(PageNumberPagination):
-    """Basic pagination parameters."""
+    """Basic pagination parameters.
+    Paginate by page numbers with an estimated count for big result sets,
+    or by a keyset if the request has a `cursor` parameter (empty for
+    the first page).
+    """
 
     page_size = 15
     page_size_query_param = 'page_size'
     max_page_size = 1000
+    django_paginator_class = EstimatedCountPaginator
+    cursor_query_param = 'cursor'
+    keyset_page = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Paginate the query set by a keyset if a cursor is requested and
+        the ordering allows it. Otherwise, paginate by page numbers.
+        """
+
+        self.keyset_page = None
+        if self.cursor_query_param not in request.query_params:
+            return super().paginate_queryset(queryset, request, view)
+
+        try:
+            paginator = KeysetPaginator(queryset, self.get_page_size(request))
+        except InvalidOrdering:
+            return super().paginate_queryset(queryset, request, view)
+
+        try:
+            self.keyset_page = paginator.page(
+                request.query_params[self.cursor_query_param])
+        except InvalidCursor as e:
+            raise NotFound(str(e))
+
+        self.request = request
+        return list(self.keyset_page)
+
+    def get_cursor_link(self, cursor):
+        """Return a link to the page of the cursor."""
+
+        if cursor is None:
+            return None
+        url = remove_query_param(
+            self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        if self.keyset_page is None:
+            return super().get_paginated_response(data)
+
+        return Response(OrderedDict([
+            ('next', self.get_cursor_link(self.keyset_page.next_cursor)),
+            ('previous', self.get_cursor_link(
+                self.keyset_page.previous_cursor)),
+            ('results', data),
+        ]))
 
 class ListingSetPagination(BasicPaginationParams):
     """Listing set's pagination parameters."""
@@ -0,0 +1,57 @@
+import orjson
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils import encoders
+
+
+# dates are passed to DRF's encoder, so their format is the stock one
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME
+
+
+def dumps(data):
+    """Encode data by orjson, types it doesn't know (decimals, dates, lazy
+    strings) by DRF's JSON encoder.
+    """
+
+    return orjson.dumps(data, default=encoders.JSONEncoder().default,
+        option=ORJSON_OPTIONS)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """Render JSON by orjson, several times faster than the standard
+    library on big pages, with the output of the stock compact renderer.
+    Indented and ASCII output is rendered by the stock renderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.ensure_ascii or not self.compact or self.get_indent(
+                accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type,
+                renderer_context)
+
+        # escaped like the stock renderer, for embedding in JavaScript
+        return dumps(data).replace(b'\xe2\x80\xa8', b'\\u2028')\
+            .replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Render data as newline delimited JSON: a line per item of a list,
+    otherwise a single line.
+    """
+
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render_lines(self, items):
+        """Yield encoded lines of items."""
+
+        for item in items:
+            yield dumps(item) + b'\n'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        items = data if isinstance(data, list) else [data]
+        return b''.join(self.render_lines(items))
@@ -1,9 +1,217 @@
-from rest_framework import serializers
+from functools import partial
+from time import perf_counter
 
+from django.contrib.auth import get_user_model
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from rest_framework import ISO_8601, serializers
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+
+from auctions.instrumentation import get_request_metrics
 from auctions.models import Category, Listing, Bid, Comment, Watchlist
+from auctions.services import create_listing
+
+
+def get_field_options(request):
+    """Return names of fields of `?fields=` (`None` for all fields) and of
+    fields to expand of `?expand=`, both comma separated.
+    """
+
+    params = getattr(request, 'query_params', request.GET)
+    fields, expand = (
+        [name for name in params.get(param, '').split(',') if name]
+        for param in ('fields', 'expand'))
+    return fields or None, expand
+
+
+class ModelSerializer(serializers.ModelSerializer):
+    """A model serializer timing representations of objects for request
+    metrics (see `auctions.instrumentation`).
+    Reads pick fields by `?fields=` and expand fields of
+    `Meta.expandable_fields`, factories of fields (e.g. nested serializers
+    replacing primary keys of relations), by `?expand=`.
+    """
+
+    def is_root(self):
+        """Return whether the serializer is the serializer of a response
+        rather than a nested one.
+        """
+
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS \
+                or not self.is_root():
+            return fields
+
+        only, expand = get_field_options(request)
+        expandable = getattr(self.Meta, 'expandable_fields', {})
+        unknown = [name for name in only or ()
+            if name not in fields and name not in expandable]
+        if unknown:
+            raise serializers.ValidationError(
+                {'fields': f'Unknown fields: {", ".join(unknown)}.'})
+        unknown = [name for name in expand if name not in expandable]
+        if unknown:
+            raise serializers.ValidationError(
+                {'expand': f'Fields can\'t be expanded: '
+                    f'{", ".join(unknown)}.'})
+
+        if only is not None:
+            fields = type(fields)((name, field) for name, field
+                in fields.items() if name in only or name in expand)
+        for name in expand:
+            fields[name] = expandable[name](read_only=True)
+        return fields
+
+    def to_representation(self, instance):
+        metrics = get_request_metrics()
+        if metrics is None:
+            return super().to_representation(instance)
+
+        started = perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            metrics.add_time('serialize', perf_counter() - started)
+
+class ValuesSerializer:
+    """A read only serializer of `.values()` rows for list endpoints, by
+    readable fields of a model serializer. Rows aren't loaded into model
+    instances, and values are converted by a plan compiled once per
+    serializer instead of DRF fields per row. Representations equal those
+    of the model serializer for plain model fields, relations by primary
+    key or by nested serializers (read by joins), decimals and ISO 8601
+    dates; other fields of model columns fall back to their
+    `to_representation`.
+    """
+
+    identity_fields = (serializers.BooleanField, serializers.CharField,
+        serializers.IntegerField)
+
+    def __init__(self, serializer_class, context=None):
+        self.plan = self.compile_fields(serializer_class.Meta.model,
+            serializer_class(context=context or {}).fields)
+
+    def compile_fields(self, model, fields, prefix=''):
+        return [self.compile(model, field, prefix)
+            for field in fields.values() if not field.write_only]
+
+    def compile(self, model, field, prefix=''):
+        """Return a `(name, column, converter)` plan of a field, the
+        converter is `None` if values are represented as they are, or a
+        plan of fields of a nested serializer of a relation, `None` if the
+        column of the relation is null.
+        """
+
+        opts = model._meta
+        try:
+            model_field = opts.get_field(field.source)
+        except FieldDoesNotExist:
+            raise ImproperlyConfigured(f'{field.field_name!r} isn\'t a '
+                f'column of {opts.label} and can\'t be read from values.')
+        column = prefix + (model_field.name if prefix
+            else model_field.attname)
 
+        if isinstance(field, serializers.BaseSerializer):
+            if not model_field.many_to_one:
+                raise ImproperlyConfigured(f'{field.field_name!r} isn\'t a '
+                    f'foreign key of {opts.label}.')
+            return field.field_name, column, self.compile_fields(
+                model_field.related_model, field.fields,
+                f'{prefix}{model_field.name}__')
+        if isinstance(field, serializers.PrimaryKeyRelatedField) and \
+                field.pk_field is None:
+            return field.field_name, column, None
+        if isinstance(field, self.identity_fields):
+            return field.field_name, column, None
+        if isinstance(field, serializers.DecimalField) and getattr(field,
+                'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING) \
+                and not field.localize:
+            # values have the scale of the column, i.e. `decimal_places`
+            return field.field_name, column, lambda value: format(value, 'f')
+        if isinstance(field, serializers.DateTimeField) and getattr(field,
+                'format', api_settings.DATETIME_FORMAT) == ISO_8601:
+            return field.field_name, column, \
+                self.get_datetime_converter(field)
+        return field.field_name, column, field.to_representation
 
-class CategorySerializer(serializers.ModelSerializer):
+    def get_datetime_converter(self, field):
+        field_timezone = getattr(field, 'timezone', field.default_timezone())
+
+        def convert(value):
+            if field_timezone is not None:
+                value = value.astimezone(field_timezone)
+            value = value.isoformat()
+            if value.endswith('+00:00'):
+                value = value[:-6] + 'Z'
+            return value
+
+        return convert
+
+    def get_columns(self, plan):
+        for _, column, convert in plan:
+            yield column
+            if isinstance(convert, list):
+                yield from self.get_columns(convert)
+
+    @property
+    def columns(self):
+        return list(dict.fromkeys(self.get_columns(self.plan)))
+
+    def get_queryset(self, queryset):
+        """Return the query set of rows of the serialized columns, and of
+        the primary key and ordering fields read by keyset pagination.
+        """
+
+        opts = queryset.model._meta
+        columns = self.columns + [opts.pk.attname]
+        for name in queryset.query.order_by:
+            try:
+                columns.append(opts.get_field(name.lstrip('-')).attname)
+            except (AttributeError, FieldDoesNotExist):
+                pass
+        return queryset.values(*dict.fromkeys(columns))
+
+    def to_row(self, row, plan=None):
+        """Return the representation of a row."""
+
+        item = {}
+        for name, column, convert in self.plan if plan is None else plan:
+            value = row[column]
+            if value is None or convert is None:
+                item[name] = value
+            elif isinstance(convert, list):
+                item[name] = self.to_row(row, convert)
+            else:
+                item[name] = convert(value)
+        return item
+
+    def to_representation(self, rows):
+        """Return representations of rows, timed for request metrics."""
+
+        metrics = get_request_metrics()
+        started = perf_counter()
+        data = [self.to_row(row) for row in rows]
+        if metrics is not None:
+            metrics.add_time('serialize', perf_counter() - started)
+        return data
+
+class UserSerializer(ModelSerializer):
+    """A public user data serializer of expanded relations.
+    Fields: `id`, `username`.
+    """
+
+    class Meta:
+        model = get_user_model()
+        fields = ('id', 'username')
+
+class CategorySerializer(ModelSerializer):
     """A category data serializer.
     Fields: `id`, `name`.
     """
@@ -12,48 +220,86 @@ class CategorySerializer(serializers.ModelSerializer):
         model = Category
         fields = ('id', 'name')
 
-class ListingSerializer(serializers.ModelSerializer):
+class ListingSerializer(ModelSerializer):
     """A listing data serializer.
     Fields: `id`, `category`, `user`, `name`, `description`, `image`,
-    `start_bid`, `date_added`, `date_updated`.
-    Read only fields: `id`, `user`, `date_added`, `date_updated`.
+    `start_bid`, `ends_at`, `is_active`, `winner`, `closed_at`,
+    `date_added`, `date_updated`.
+    Read only fields: `id`, `user`, `is_active`, `winner`, `closed_at`,
+    `date_added`, `date_updated`.
+    Expandable fields: `category`, `user`, `winner`, `current_bid`.
     """
 
     class Meta:
         model = Listing
         fields = ('id', 'category', 'user', 'name', 'description', 'image',
-            'start_bid', 'date_added', 'date_updated')
-        read_only_fields = ('id', 'user', 'date_added', 'date_updated')
+            'start_bid', 'ends_at', 'is_active', 'winner', 'closed_at',
+            'date_added', 'date_updated')
+        read_only_fields = ('id', 'user', 'is_active', 'winner', 'closed_at',
+            'date_added', 'date_updated')
+        expandable_fields = {
+            'category': CategorySerializer,
+            'user': UserSerializer,
+            'winner': UserSerializer,
+            'current_bid': partial(serializers.DecimalField, max_digits=19,
+                decimal_places=2),
+        }
+
+    def create(self, validated_data):
+        """Create a listing with a generated unique slug."""
+
+        return create_listing(Listing(**validated_data))
+
+class ListingSummarySerializer(ModelSerializer):
+    """A listing summary serializer of expanded relations.
+    Fields: `id`, `name`, `slug`, `current_bid`, `is_active`.
+    """
+
+    class Meta:
+        model = Listing
+        fields = ('id', 'name', 'slug', 'current_bid', 'is_active')
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(ModelSerializer):
     """A comment data serializer.
     Contains all fields.
     Read only `user` field.
+    Expandable fields: `user`, `listing`.
     """
 
     class Meta:
         model = Comment
         fields = '__all__'
         read_only_fields = ('user',)
+        expandable_fields = {
+            'user': UserSerializer,
+            'listing': ListingSummarySerializer,
+        }
 
-class BidSerializer(serializers.ModelSerializer):
+class BidSerializer(ModelSerializer):
     """A bid data serializer.
     Contains all fields.
     Read only `user` field.
+    Expandable fields: `user`, `listing`.
     """
 
     class Meta:
         model = Bid
         fields = '__all__'
         read_only_fields = ('user',)
+        expandable_fields = {
+            'user': UserSerializer,
+            'listing': ListingSummarySerializer,
+        }
 
-class WatchlistSerializer(serializers.ModelSerializer):
+class WatchlistSerializer(ModelSerializer):
     """A watchlist data serializer.
     Contains all fields.
     Read only `user` field.
+    Expandable field: `listing`.
     """
 
     class Meta:
         model = Watchlist
         fields = '__all__'
         read_only_fields = ('user',)
+        expandable_fields = {'listing': ListingSummarySerializer}
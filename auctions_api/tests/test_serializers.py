@@ -0,0 +1,173 @@
+import json
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory
+
+from account.models import User
+from auctions.models import Category, Listing, Bid, Comment
+from ..renderers import ORJSONRenderer
+from ..serializers import (BidSerializer, CommentSerializer,
+    ListingSerializer, ValuesSerializer)
+
+
+class ValuesSerializerTest(TestCase):
+    """A test case for the read only serialization of `.values()` rows,
+    equal to the model serializers'.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create(username='Owner')
+        cls.customer = User.objects.create(username='Customer')
+        cls.category = Category.objects.create(name='Cat', slug='cat')
+        cls.listing = Listing.objects.create(category=cls.category,
+            user=cls.owner, name='Listing  ', slug='listing',
+            description='Description', start_bid=Decimal('1.5'),
+            image='https://example.com/image.png',
+            ends_at=timezone.now() + timezone.timedelta(days=1))
+        Listing.objects.create(category=cls.category, user=cls.owner,
+            name='Other', slug='other', description='Description',
+            start_bid=3, is_active=False)
+        for num in range(3):
+            Bid.objects.create(user=cls.customer, listing=cls.listing,
+                bid=Decimal('2.25') + num)
+            Comment.objects.create(user=cls.customer, listing=cls.listing,
+                text=f'Comment {num}')
+
+    def assertSameRepresentation(self, serializer_class, queryset):
+        context = {'request': APIRequestFactory().get('/')}
+        expected = serializer_class(queryset, many=True, context=context).data
+        values = ValuesSerializer(serializer_class, context=context)
+        data = values.to_representation(values.get_queryset(queryset))
+        self.assertEqual(json.dumps(data), json.dumps(expected))
+
+    def test_same_as_model_serializers(self):
+        self.assertSameRepresentation(ListingSerializer,
+            Listing.objects.order_by('pk'))
+        self.assertSameRepresentation(BidSerializer,
+            Bid.objects.order_by('pk'))
+        self.assertSameRepresentation(CommentSerializer,
+            Comment.objects.order_by('pk'))
+
+    def test_columns_only(self):
+        values = ValuesSerializer(BidSerializer)
+        self.assertEqual(values.columns, ['id', 'bid', 'date_added',
+            'date_updated', 'user_id', 'listing_id'])
+
+    def test_renderer_output_equals_stock_renderer(self):
+        data = ListingSerializer(Listing.objects.order_by('pk'),
+            many=True).data
+        data = {'results': data, 'price': Decimal('1.50'),
+            'date': timezone.now()}
+        self.assertEqual(ORJSONRenderer().render(data),
+            JSONRenderer().render(data))
+        self.assertEqual(ORJSONRenderer().render(data, 'application/json; '
+            'indent=2'), JSONRenderer().render(data, 'application/json; '
+            'indent=2'))
+
+    def test_list_endpoints(self):
+        client = APIClient()
+        resp = client.get('/api/v1/listings/')
+        self.assertEqual(resp.json()['results'][0]['name'], 'Other')
+        resp = client.get(f'/api/v1/listings/{self.listing.pk}/bids/')
+        self.assertEqual([bid['bid'] for bid in resp.json()['results']],
+            ['4.25', '3.25', '2.25'])
+        # counts of small pages may be estimated, depending on table stats
+        resp = client.get('/api/v1/comments/')
+        self.assertEqual(len(resp.json()['results']), 3)
+
+        client.force_authenticate(self.customer)
+        resp = client.get('/api/v1/my-bids/')
+        self.assertEqual(resp.json()['results'][0]['listing'],
+            self.listing.pk)
+
+
+class SparseFieldsTest(TestCase):
+    """A test case for picking fields by `?fields=` and expanding relations
+    by `?expand=` on lists and details.
+    """
+
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create(username='Owner')
+        cls.customer = User.objects.create(username='Customer')
+        cls.category = Category.objects.create(name='Cat', slug='cat')
+        cls.listing = Listing.objects.create(category=cls.category,
+            user=cls.owner, name='Listing', slug='listing',
+            description='Description', start_bid=Decimal('1.5'))
+        cls.other = Category.objects.create(name='Other', slug='other')
+        Listing.objects.create(category=cls.other, user=cls.owner,
+            name='Other', slug='other', description='Description',
+            start_bid=3)
+        Bid.objects.create(user=cls.customer, listing=cls.listing,
+            bid=Decimal('2.25'))
+        cls.listing.refresh_from_db()
+
+    def test_fields(self):
+        resp = self.client.get('/api/v1/listings/?fields=id,name')
+        self.assertEqual(resp.json()['results'], [
+            {'id': self.listing.pk + 1, 'name': 'Other'},
+            {'id': self.listing.pk, 'name': 'Listing'}])
+
+        with CaptureQueriesContext(connection) as queries:
+            resp = self.client.get(
+                f'/api/v1/listings/{self.listing.pk}/?fields=name')
+        self.assertEqual(resp.json(), {'name': 'Listing'})
+        sql = queries[-1]['sql']
+        self.assertIn('"name"', sql)
+        self.assertNotIn('"description"', sql)
+
+    def test_expand(self):
+        # a keyset page doesn't count rows, relations are joined
+        with self.assertNumQueries(1):
+            resp = self.client.get('/api/v1/listings/?cursor='
+                '&fields=id&expand=category,user,current_bid')
+        self.assertEqual(resp.json()['results'], [
+            {'id': self.listing.pk + 1,
+                'category': {'id': self.other.pk, 'name': 'Other'},
+                'user': {'id': self.owner.pk, 'username': 'Owner'},
+                'current_bid': '3.00'},
+            {'id': self.listing.pk,
+                'category': {'id': self.category.pk, 'name': 'Cat'},
+                'user': {'id': self.owner.pk, 'username': 'Owner'},
+                'current_bid': '2.25'}])
+
+        with self.assertNumQueries(1):
+            resp = self.client.get(f'/api/v1/listings/{self.listing.pk}/'
+                '?expand=category,winner')
+        data = resp.json()
+        self.assertEqual(data['category'],
+            {'id': self.category.pk, 'name': 'Cat'})
+        self.assertIsNone(data['winner'])
+        self.assertEqual(data['user'], self.owner.pk)
+
+        self.client.force_authenticate(self.customer)
+        resp = self.client.get('/api/v1/my-bids/?fields=bid&expand=listing')
+        self.assertEqual(resp.json()['results'], [{'bid': '2.25',
+            'listing': {'id': self.listing.pk, 'name': 'Listing',
+                'slug': 'listing', 'current_bid': '2.25',
+                'is_active': True}}])
+
+    def test_keyset_page_of_fields(self):
+        resp = self.client.get('/api/v1/listings/?fields=name&page_size=1'
+            '&cursor=')
+        data = resp.json()
+        self.assertEqual(data['results'], [{'name': 'Other'}])
+        resp = self.client.get(data['next'])
+        self.assertEqual(resp.json()['results'], [{'name': 'Listing'}])
+
+    def test_unknown_fields(self):
+        resp = self.client.get('/api/v1/listings/?fields=id,secret')
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn('secret', resp.json()['fields'])
+        resp = self.client.get(f'/api/v1/listings/{self.listing.pk}/'
+            '?expand=description')
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn('expand', resp.json())
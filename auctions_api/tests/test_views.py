@@ -0,0 +1,278 @@
+import json
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from rest_framework.test import APIClient
+
+from account.models import User
+from auctions.models import Category, Listing, Bid, Comment
+
+
+class RelatedListActionsTest(TestCase):
+    """A test case for paginated and streamed nested actions of listings
+    and categories.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create(username='Owner')
+        cls.customer = User.objects.create(username='Customer')
+        cls.category = Category.objects.create(name='Cat', slug='cat')
+        cls.listings = [Listing.objects.create(
+            category=cls.category, user=cls.owner, name=f'Listing {num}',
+            slug=f'listing-{num}', description='Description', start_bid=1)
+            for num in range(3)]
+        cls.listing = cls.listings[0]
+        for num in range(12):
+            Bid.objects.create(user=cls.customer, listing=cls.listing,
+                bid=num + 2)
+            Comment.objects.create(user=cls.customer, listing=cls.listing,
+                text=f'Comment {num}')
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def get_url(self, action):
+        if action == 'listings':
+            return f'/api/v1/categories/{self.category.pk}/listings/'
+        return f'/api/v1/listings/{self.listing.pk}/{action}/'
+
+    def test_comments_are_paginated(self):
+        resp = self.client.get(self.get_url('comments'))
+        self.assertEqual(resp.data['count'], 12)
+        self.assertEqual(len(resp.data['results']), 10)
+        self.assertEqual(resp.data['results'][0]['text'], 'Comment 11')
+        self.assertIsNotNone(resp.data['next'])
+
+    def test_bids_cursor_mode(self):
+        resp = self.client.get(self.get_url('bids'),
+            {'cursor': '', 'page_size': 5})
+        self.assertNotIn('count', resp.data)
+        self.assertEqual([bid['bid'] for bid in resp.data['results']],
+            ['13.00', '12.00', '11.00', '10.00', '9.00'])
+
+        resp = self.client.get(resp.data['next'])
+        self.assertEqual(resp.data['results'][0]['bid'], '8.00')
+
+    def test_bids_are_streamed_as_ndjson(self):
+        resp = self.client.get(self.get_url('bids'), {'format': 'ndjson'})
+        self.assertTrue(resp.streaming)
+        self.assertEqual(resp['Content-Type'], 'application/x-ndjson')
+
+        lines = b''.join(resp.streaming_content).decode().splitlines()
+        bids = [json.loads(line)['bid'] for line in lines]
+        self.assertEqual(len(bids), 12)
+        self.assertEqual(bids[0], '13.00')
+
+    def test_category_listings_are_streamed_by_accept_header(self):
+        resp = self.client.get(self.get_url('listings'),
+            HTTP_ACCEPT='application/x-ndjson')
+        self.assertTrue(resp.streaming)
+        lines = b''.join(resp.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)['name'] for line in lines],
+            ['Listing 2', 'Listing 1', 'Listing 0'])
+
+    def test_category_listings_are_paginated(self):
+        resp = self.client.get(self.get_url('listings'), {'page_size': 2})
+        self.assertEqual(resp.data['count'], 3)
+        self.assertEqual(len(resp.data['results']), 2)
+
+
+class ListingConditionalGetTest(TestCase):
+    """A test case for conditional requests of listing resources."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create(username='Owner')
+        cls.customer = User.objects.create(username='Customer')
+        cls.category = Category.objects.create(name='Cat', slug='cat')
+        cls.listing = Listing.objects.create(
+            category=cls.category, user=cls.owner, name='Listing',
+            slug='listing', description='Description', start_bid=1)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def assertNotModified(self, url, queries):
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(queries):
+            resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp['ETag'], etag)
+        return resp
+
+    def test_listings_are_not_modified(self):
+        self.assertNotModified('/api/v1/listings/', queries=0)
+
+        etag = self.client.get('/api/v1/listings/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Listing.objects.filter(pk=self.listing.pk).first().save()
+        resp = self.client.get('/api/v1/listings/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+
+    def test_etag_depends_on_query(self):
+        etag = self.client.get('/api/v1/listings/')['ETag']
+        resp = self.client.get('/api/v1/listings/', {'page_size': 1},
+            HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+
+    def test_bids_are_not_modified_until_a_bid(self):
+        url = f'/api/v1/listings/{self.listing.pk}/bids/'
+        resp = self.assertNotModified(url, queries=1)
+        self.assertTrue(resp.has_header('Last-Modified'))
+
+        Bid.objects.create(user=self.customer, listing=self.listing, bid=2)
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=resp['ETag'])
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.data['results']), 1)
+
+    def test_comments_are_not_modified_until_a_comment(self):
+        url = f'/api/v1/listings/{self.listing.pk}/comments/'
+        resp = self.assertNotModified(url, queries=1)
+
+        Comment.objects.create(user=self.customer, listing=self.listing,
+            text='A comment.')
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=resp['ETag'])
+        self.assertEqual(resp.status_code, 200)
+
+    def test_streams_have_own_etag(self):
+        url = f'/api/v1/listings/{self.listing.pk}/bids/'
+        etag = self.client.get(url)['ETag']
+        resp = self.client.get(url, {'format': 'ndjson'},
+            HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+
+
+@override_settings(AUCTION_THROTTLE_RATES={'bids_listing': '1/min',
+    'writes_ip': '2/min'})
+class ThrottledWritesTest(TestCase):
+    """A test case for throttled bids and writes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create(username='Owner')
+        cls.customers = [User.objects.create(username=f'Customer {num}')
+            for num in range(3)]
+        cls.category = Category.objects.create(name='Cat', slug='cat')
+        cls.listing = Listing.objects.create(
+            category=cls.category, user=cls.owner, name='Listing',
+            slug='listing', description='Description', start_bid=1)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def post_bid(self, user, bid):
+        self.client.force_authenticate(user)
+        return self.client.post('/api/v1/my-bids/',
+            {'listing': self.listing.pk, 'bid': bid})
+
+    def test_bids_on_listing_are_throttled(self):
+        self.assertEqual(self.post_bid(self.customers[0], 2).status_code, 201)
+        resp = self.post_bid(self.customers[1], 3)
+        self.assertEqual(resp.status_code, 429)
+        self.assertTrue(60 <= int(resp['Retry-After']) <= 120)
+        self.assertEqual(self.listing.bid_set.count(), 1)
+
+    def test_rejected_bid_takes_no_tokens_of_other_throttles(self):
+        self.post_bid(self.customers[0], 2)
+        self.assertEqual(self.post_bid(self.customers[1], 3).status_code, 429)
+        resp = self.client.post('/api/v1/comments/',
+            {'listing': self.listing.pk, 'text': 'Comment'})
+        self.assertEqual(resp.status_code, 201)
+
+    def test_bid_on_invalid_listing_has_no_bucket(self):
+        self.client.force_authenticate(self.customers[0])
+        resp = self.client.post('/api/v1/my-bids/',
+            {'listing': 'x' * 300, 'bid': 2})
+        self.assertEqual(resp.status_code, 400)
+
+    def test_writes_from_ip_are_throttled(self):
+        for num, customer in enumerate(self.customers):
+            self.client.force_authenticate(customer)
+            resp = self.client.post('/api/v1/comments/',
+                {'listing': self.listing.pk, 'text': f'Comment {num}'})
+        self.assertEqual(resp.status_code, 429)
+        self.assertEqual(Comment.objects.count(), 2)
+
+    def test_reads_are_not_throttled(self):
+        for _ in range(3):
+            resp = self.client.get('/api/v1/comments/')
+        self.assertEqual(resp.status_code, 200)
+
+
+class ListingFiltersTest(TestCase):
+    """A test case for filtering and ordering the listing set of the API."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create(username='Owner')
+        cls.customer = User.objects.create(username='Customer')
+        cls.category = Category.objects.create(name='Cat', slug='cat')
+        cls.other = Category.objects.create(name='Other', slug='other')
+        cls.listings = [Listing.objects.create(
+            category=cls.category if num % 2 else cls.other,
+            user=cls.customer if num == 3 else cls.owner,
+            name=f'Listing {num}', slug=f'listing-{num}',
+            description='Description', start_bid=num + 1)
+            for num in range(4)]
+        Bid.objects.create(user=cls.customer, listing=cls.listings[0],
+            bid=10)
+        Listing.objects.filter(pk=cls.listings[2].pk).update(is_active=False)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def get_names(self, **params):
+        resp = self.client.get('/api/v1/listings/',
+            {'fields': 'name', **params})
+        self.assertEqual(resp.status_code, 200)
+        return [item['name'] for item in resp.data['results']]
+
+    def test_filters(self):
+        self.assertEqual(self.get_names(category=self.category.pk),
+            ['Listing 3', 'Listing 1'])
+        self.assertEqual(self.get_names(user=self.customer.pk), ['Listing 3'])
+        self.assertEqual(self.get_names(is_active='false'), ['Listing 2'])
+        self.assertEqual(self.get_names(has_bids='true'), ['Listing 0'])
+        self.assertEqual(self.get_names(min_price='2', max_price='3.5'),
+            ['Listing 2', 'Listing 1'])
+
+    def test_orderings(self):
+        self.assertEqual(self.get_names(ordering='-current_bid'),
+            ['Listing 0', 'Listing 3', 'Listing 2', 'Listing 1'])
+        self.assertEqual(self.get_names(ordering='date_added'),
+            ['Listing 0', 'Listing 1', 'Listing 2', 'Listing 3'])
+        self.assertEqual(self.get_names(ordering='current_bid', cursor='',
+            page_size=2), ['Listing 1', 'Listing 2'])
+
+    def test_invalid_parameters(self):
+        for params in ({'ordering': 'name'}, {'ordering': 'ends_at'},
+                {'min_price': 'cheap'}, {'min_price': 5, 'max_price': 2},
+                {'is_active': 'maybe'}):
+            with self.subTest(params=params):
+                resp = self.client.get('/api/v1/listings/', params)
+                self.assertEqual(resp.status_code, 400)
+
+        resp = self.client.get('/api/v1/listings/',
+            {'ordering': 'ends_at', 'is_active': 'true'})
+        self.assertEqual(resp.status_code, 200)
+
+    def test_search_with_facets(self):
+        cache.clear()
+        resp = self.client.get('/api/v1/listings/search/',
+            {'q': 'listing', 'is_active': 'true', 'fields': 'name'})
+        self.assertEqual(resp.status_code, 200)
+        facets = resp.data['facets']
+        self.assertEqual(facets['count'], 3)
+        self.assertEqual([(item['name'], item['count'])
+            for item in facets['categories']], [('Cat', 2), ('Other', 1)])
+        self.assertEqual(sum(item['count'] for item in facets['prices']), 3)
+        self.assertEqual(len(resp.data['results']), 3)
+
+        resp = self.client.get('/api/v1/listings/search/',
+            {'q': 'listing', 'ordering': 'current_bid', 'fields': 'name'})
+        self.assertEqual([item['name'] for item in resp.data['results']],
+            ['Listing 1', 'Listing 2', 'Listing 3', 'Listing 0'])
+        self.assertIn('ETag', resp)
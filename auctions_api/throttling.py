@@ -0,0 +1,95 @@
+import time
+
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+from auctions.throttling import get_bucket, get_client_ip
+
+
+class BucketThrottle(BaseThrottle):
+    """Throttle writes by a token bucket of a scope shared with the pages
+    (see `auctions.throttling`). Reading requests aren't throttled.
+    Like `auctions.throttling.throttle`, a request stops at the first
+    throttle rejecting it: later throttles of the view skip it and tokens
+    taken by earlier ones are given back.
+    """
+
+    scope = None
+    wait_seconds = None
+
+    def get_ident(self, request, view):
+        """Return an identity of the requester's bucket, or `None` to skip
+        throttling.
+        """
+
+        raise NotImplementedError('.get_ident() must be overridden')
+
+    def allow_request(self, request, view):
+        if request.method in SAFE_METHODS \
+                or getattr(request, 'throttle_rejected', False):
+            return True
+        bucket = get_bucket(self.scope)
+        ident = self.get_ident(request, view)
+        if bucket is None or ident is None:
+            return True
+
+        now = time.time()
+        result = bucket.hit(ident, now)
+        taken = getattr(request, 'throttle_taken', [])
+        if result.allowed:
+            request.throttle_taken = [*taken, (bucket, ident, now)]
+            return True
+
+        for bucket, ident, now in taken:
+            bucket.refund(ident, now)
+        request.throttle_rejected = True
+        self.wait_seconds = result.wait
+        return False
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class UserWriteThrottle(BucketThrottle):
+    """Throttle writes of an authenticated user."""
+
+    scope = 'writes_user'
+
+    def get_ident(self, request, view):
+        return request.user.pk if request.user.is_authenticated else None
+
+
+class IPWriteThrottle(BucketThrottle):
+    """Throttle writes from an IP address."""
+
+    scope = 'writes_ip'
+
+    def get_ident(self, request, view):
+        return get_client_ip(request)
+
+
+class UserBidThrottle(UserWriteThrottle):
+    """Throttle bids of an authenticated user."""
+
+    scope = 'bids_user'
+
+
+class ListingBidThrottle(BucketThrottle):
+    """Throttle bids on a listing from all users, so a hot listing's row
+    lock isn't flooded.
+    """
+
+    scope = 'bids_listing'
+
+    def get_ident(self, request, view):
+        """Return the id of the bid's listing. A bid without a valid id is
+        rejected by the serializer, so it doesn't get a bucket.
+        """
+
+        if request.method != 'POST' or not isinstance(request.data, dict):
+            return None
+        try:
+            listing = int(request.data.get('listing'))
+        except (TypeError, ValueError):
+            return None
+        return listing if 0 < listing < 2 ** 31 else None
@@ -1,44 +1,60 @@
 from django.core.exceptions import PermissionDenied
-from django.utils.text import slugify
+from django.db import IntegrityError, transaction
 
 from rest_framework import viewsets, mixins
-from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 
 from djoser.permissions import CurrentUserOrAdmin
 
+from auctions.async_views import AsyncReadMixin
+from auctions.cache import LISTINGS_VERSION_KEY, get_versions
+from auctions.conditional import get_listing_validators, make_etag
+from auctions.facets import get_facets
+from auctions.filters import search_listings
 from auctions.models import Category, Listing, Bid, Comment, Watchlist
+from auctions.services import place_bid
 from .serializers import (CategorySerializer, ListingSerializer,
                           CommentSerializer, BidSerializer,
                           WatchlistSerializer)
+from .filters import ListingFilterBackend
+from .mixins import ConditionalGetMixin, RelatedListMixin, ValuesListMixin
+from .throttling import (UserWriteThrottle, IPWriteThrottle,
+                         UserBidThrottle, ListingBidThrottle)
 from .pagination import (ListingSetPagination, BidSetPagination,
                          CommentSetPagination, WatchlistPagination)
 
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+class CategoryViewSet(AsyncReadMixin, RelatedListMixin,
+                      viewsets.ReadOnlyModelViewSet):
     """A read only view set for the `Category` model.
     Data serializer: `CategorySerializer`.
 
     View set and detail instance.
-    Filter listings by category.
+    Filter listings by category (paginated or streamed).
     """
 
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
 
     @action(methods=['get',], detail=True,
-        url_path='listings')
+        url_path='listings',
+        renderer_classes=RelatedListMixin.related_renderer_classes)
     def listings(self, request, pk=None):
-        """Get listings on the chosen category.
+        """Get listings on the chosen category, newest first.
         Data serializer: `ListingSerializer`.
+        Pagination class: `ListingSetPagination`.
         """
 
-        queryset = Listing.objects.filter(category__pk=pk)
-        serializer = ListingSerializer(queryset, many=True)
-        return Response(serializer.data)
+        queryset = Listing.objects.filter(category__pk=pk)\
+            .order_by('-date_added')
+        return self.list_related(queryset, ListingSerializer,
+            ListingSetPagination)
 
-class ListingViewSet(mixins.CreateModelMixin,
+class ListingViewSet(AsyncReadMixin,
+                     ConditionalGetMixin,
+                     RelatedListMixin,
+                     mixins.CreateModelMixin,
                      mixins.RetrieveModelMixin,
                      mixins.UpdateModelMixin,
                      mixins.ListModelMixin,
@@ -48,31 +64,92 @@ class ListingViewSet(mixins.CreateModelMixin,
     Pagination class: `ListingSetPagination`.
 
     View a set and a detail listing, create and update listings, get comments
-    and bids on the chosen listing.
+    and bids on the chosen listing (paginated or streamed), search listings
+    with facets of the results. The set, search, comments and bids answer
+    conditional requests (`ETag`, `Last-Modified`).
 
     Permissions:
         - Reading for all users.
         - Creation for all authenticated users
         - Updation and deletions for owners and staff only
+
+    The set is filtered by `category`, `user`, `is_active`, `has_bids`,
+    `min_price` and `max_price`, and ordered by `ordering`, one of the
+    indexed orderings (see `ListingFilterBackend`).
+
+    Writes are throttled per user and per IP address. Reads are served by
+    an async view under ASGI (see `auctions.async_views`).
     """
 
-    queryset = Listing.objects.order_by('-date_added')
+    queryset = Listing.objects.order_by('-date_added', '-id')
     serializer_class = ListingSerializer
+    filter_backends = (ListingFilterBackend,)
     permission_classes = (IsAuthenticatedOrReadOnly,)
+    throttle_classes = (UserWriteThrottle, IPWriteThrottle)
     pagination_class = ListingSetPagination
 
+    def get_list_validators(self):
+        """Return an ETag of the listing set from the version of listings,
+        bumped on every listing change (see `auctions.signals`). A set read
+        from a replica lagging behind the version has no ETag.
+        """
+
+        versions = get_versions([LISTINGS_VERSION_KEY])
+        if versions is None:
+            return None, None
+        return make_etag(*versions, *self.get_variant()), None
+
+    def get_listing_validators(self):
+        """Return validators of the requested listing's bids and comments,
+        or none if it doesn't exist.
+        """
+
+        listing = Listing.objects.with_comment_stats()\
+            .filter(pk=self.kwargs['pk']).first()
+        if listing is None:
+            return None, None
+        return get_listing_validators(listing, *self.get_variant())
+
+    get_comments_validators = get_bid_validators = get_listing_validators
+    get_search_validators = get_list_validators
+
+    def list(self, request, *args, **kwargs):
+        return self.get_not_modified_response() or super().list(
+            request, *args, **kwargs)
+
+    @action(methods=['get',], detail=False, url_path='search')
+    def search(self, request):
+        """Search listings by `q`, ranked by relevance unless an `ordering`
+        is requested, filtered like the set. The page has `facets` of all
+        results: their `count`, counts of `categories` and a histogram of
+        `prices` (see `auctions.facets`).
+        Data serializer: `ListingSerializer`.
+        Pagination class: `ListingSetPagination`.
+        """
+
+        not_modified = self.get_not_modified_response()
+        if not_modified:
+            return not_modified
+
+        queryset = self.filter_queryset(self.get_queryset())
+        search_request = request.query_params.get('q')
+        if search_request:
+            queryset = search_listings(queryset, search_request,
+                ranked='ordering' not in request.query_params)
+
+        values = self.get_values_serializer()
+        page = self.paginate_queryset(values.get_queryset(queryset))
+        response = self.get_paginated_response(
+            values.to_representation(page))
+        response.data['facets'] = get_facets(queryset)
+        return response
+
     def perform_create(self, serializer):
         """Create a listing.
-        Automatic fill `user` and `slug` fields.
+        Automatic fill `user` field, `slug` is generated by the serializer.
         """
 
-        listing_id = self.queryset.filter(category=serializer.validated_data['category']).count() + 1
-        title = serializer.validated_data['name']
-
-        serializer.save(
-            user=self.request.user,
-            slug=slugify(f'{title}_{listing_id}')
-        )
+        serializer.save(user=self.request.user)
 
     def perform_update(self, serializer):
         """Permission to update for owner and staff only."""
@@ -85,28 +162,41 @@ class ListingViewSet(mixins.CreateModelMixin,
             raise PermissionDenied('User is not allowed to modify this listing.')
 
     @action(methods=['get',], detail=True,
-        url_path='comments')
+        url_path='comments',
+        renderer_classes=RelatedListMixin.related_renderer_classes)
     def comments(self, request, pk=None):
-        """Get comments on the chosen listing.
+        """Get comments on the chosen listing, newest first.
         Data serializer: `CommentSerializer`.
+        Pagination class: `CommentSetPagination`.
         """
 
-        queryset = Comment.objects.filter(listing__pk=pk)
-        serializer = CommentSerializer(queryset, many=True)
-        return Response(serializer.data)
+        not_modified = self.get_not_modified_response()
+        if not_modified:
+            return not_modified
+
+        queryset = Comment.objects.filter(listing__pk=pk)\
+            .order_by('-date_added')
+        return self.list_related(queryset, CommentSerializer,
+            CommentSetPagination)
 
     @action(methods=['get',], detail=True,
-        url_path='bids')
+        url_path='bids',
+        renderer_classes=RelatedListMixin.related_renderer_classes)
     def bid(self, request, pk=None):
-        """Get bids on the chosen listing.
+        """Get bids on the chosen listing, highest first.
         Data serializer: `BidSerializer`.
+        Pagination class: `BidSetPagination`.
         """
 
-        queryset = Bid.objects.filter(listing__pk=pk)
-        serializer = BidSerializer(queryset, many=True)
-        return Response(serializer.data)
+        not_modified = self.get_not_modified_response()
+        if not_modified:
+            return not_modified
+
+        queryset = Bid.objects.filter(listing__pk=pk).order_by('-bid')
+        return self.list_related(queryset, BidSerializer, BidSetPagination)
 
-class WatchlistViewSet(mixins.CreateModelMixin,
+class WatchlistViewSet(ValuesListMixin,
+                       mixins.CreateModelMixin,
                        mixins.RetrieveModelMixin,
                        mixins.DestroyModelMixin,
                        mixins.ListModelMixin,
@@ -131,14 +221,18 @@ class WatchlistViewSet(mixins.CreateModelMixin,
 
     def perform_create(self, serializer):
         """Create a watchlist instance if it didn't exist. Otherwise, raise a
-        permission denied error.
+        permission denied error. Concurrent duplicates are rejected by the
+        unique constraint.
         """
 
-        if self.get_queryset().filter(listing=serializer.validated_data['listing']):
+        try:
+            with transaction.atomic():
+                serializer.save(user=self.request.user)
+        except IntegrityError:
             raise PermissionDenied('Already in watchlist.')
-        serializer.save(user=self.request.user)
 
-class BidViewSet(mixins.CreateModelMixin,
+class BidViewSet(ValuesListMixin,
+                 mixins.CreateModelMixin,
                  mixins.ListModelMixin,
                  viewsets.GenericViewSet):
     """A view set for a `Bid` model.
@@ -146,40 +240,37 @@ class BidViewSet(mixins.CreateModelMixin,
     Pagination class: `BidSetPagination`.
 
     View a set of user's bids, create and delete bids for the user that requests.
+    Bids are throttled per user, per listing and per IP address.
     """
 
     serializer_class = BidSerializer
     permission_classes = (CurrentUserOrAdmin,)
+    throttle_classes = (UserBidThrottle, ListingBidThrottle, IPWriteThrottle)
     pagination_class = BidSetPagination
 
     def get_queryset(self):
-        """Return a bid set of the requested user."""
+        """Return a bid set of the requested user ordered by descending
+        `date_added`.
+        """
 
         user = self.request.user
-        return Bid.objects.filter(user=user)
+        return Bid.objects.filter(user=user).order_by('-date_added')
 
     def perform_create(self, serializer):
-        """Create a bid instance if a user isn't a listing owner and if a new
-        bid is higher than the current one. Otherwise, raise a permission
-        denied error.
+        """Create a bid instance with the `place_bid` service if a user isn't
+        a listing owner and if a new bid is higher than the current one.
+        Otherwise, raise a permission denied error.
         """
 
-        listing = serializer.validated_data['listing']
-        if listing.user == self.request.user:
-            raise PermissionDenied('User cannot bid own listings.')
-
-        queryset = self.get_queryset()
-        start_bid = listing.start_bid
-        current_bid = max(start_bid,
-            queryset.filter(listing=listing).order_by('-bid')[0].bid
-                ) if queryset.filter(listing=listing) else start_bid
+        result = place_bid(serializer.validated_data['listing'],
+            self.request.user, serializer.validated_data['bid'])
+        if not result.accepted:
+            raise PermissionDenied(result.reason)
 
-        if serializer.validated_data['bid'] < current_bid:
-            raise PermissionDenied('Wrong bid value.')
+        serializer.instance = result.bid
 
-        serializer.save(user=self.request.user)
-
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(AsyncReadMixin, ValuesListMixin,
+                     viewsets.ModelViewSet):
     """A view set for a `Comment` model.
     Data serializer: `CommentSerializer`.
     Pagination class: `CommentSetPagination`.
@@ -190,10 +281,13 @@ class CommentViewSet(viewsets.ModelViewSet):
         - Reading for all users.
         - Creation for all authenticated users
         - Updation and deletions for owners and staff only
+
+    Writes are throttled per user and per IP address.
     """
 
     serializer_class = CommentSerializer
     permission_classes = (IsAuthenticatedOrReadOnly,)
+    throttle_classes = (UserWriteThrottle, IPWriteThrottle)
     queryset = Comment.objects.all()
     pagination_class = CommentSetPagination
 
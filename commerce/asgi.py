@@ -2,6 +2,8 @@
 ASGI config for commerce project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Listing events are streamed by `ListingEventsApplication`, other requests
+are handled by Django (`auctions.async_views.ASGIHandler`).
 
 For more information on this file, see
 https://docs.djangoproject.com/en/3.0/howto/deployment/asgi/
@@ -9,8 +11,15 @@ https://docs.djangoproject.com/en/3.0/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'commerce.settings')
 
-application = get_asgi_application()
+django.setup(set_prefix=False)
+
+from auctions.async_views import ASGIHandler  # noqa: E402
+from auctions.events import ListingEventsApplication  # noqa: E402
+
+django_application = ASGIHandler()
+
+application = ListingEventsApplication(django_application)
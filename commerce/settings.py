@@ -1,5 +1,5 @@
 import os
-from decouple import config
+from decouple import Csv, config
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -26,6 +26,7 @@ INSTALLED_APPS = [
     'account',
     'auctions',
     'auctions_api',
+    'graphs',
     'rest_framework',
     'rest_framework.authtoken',
     'djoser',
@@ -41,14 +42,17 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'auctions.metrics.MetricsMiddleware',
+    'auctions.instrumentation.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'auctions.async_views.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'auctions.routers.ReplicaMiddleware',
 ]
 
 ROOT_URLCONF = 'commerce.urls'
@@ -75,18 +79,125 @@ WSGI_APPLICATION = 'commerce.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.0/ref/settings/#databases
 
+# Connections are pooled in each worker process and returned to the pool at
+# the end of a request (`CONN_MAX_AGE` 0), see `auctions.backends.postgresql`.
+# Behind a transaction pooling PgBouncer (`PSQL_TRANSACTION_POOLER`) server-side
+# cursors and startup options aren't supported: set the search threshold on
+# the database (`ALTER DATABASE ... SET pg_trgm.word_similarity_threshold`).
+PSQL_TRANSACTION_POOLER = config('PSQL_TRANSACTION_POOLER', default=False,
+    cast=bool)
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql_psycopg2',
+        'ENGINE': 'auctions.backends.postgresql',
         'NAME': config('PSQL_NAME'),
         'USER': config('PSQL_U'),
         'PASSWORD': config('PSQL_PASS'),
         'HOST': config('PSQL_HOST'),
         'PORT': config('PSQL_PORT'),
-        'CONN_MAX_AGE': 500,
+        'CONN_MAX_AGE': 0,
+        'POOL': {
+            'MAX_SIZE': config('PSQL_POOL_SIZE', default=10, cast=int),
+            'TIMEOUT': 10,
+            'MAX_IDLE': 300,
+            'MAX_LIFETIME': 3600,
+            # idle seconds after which a connection is checked before reuse
+            'CHECK_AFTER': 1,
+        },
+        'DISABLE_SERVER_SIDE_CURSORS': PSQL_TRANSACTION_POOLER,
+        # Typo tolerance of the listing search (`<%` operator of pg_trgm).
+        'OPTIONS': {} if PSQL_TRANSACTION_POOLER else
+            {'options': '-c pg_trgm.word_similarity_threshold=0.5'},
+    }
+}
+
+# Threads of an ASGI worker running views (see `auctions.async_views`), at
+# most the size of the connection pool. Middleware must be async capable
+# under ASGI, see `auctions.async_views.ASGIHandler`.
+AUCTION_ASYNC_READ_THREADS = config('ASYNC_READ_THREADS', default=10,
+    cast=int)
+
+# Read replicas of `PSQL_REPLICA_HOSTS` (`replica_1`, ...), reads of safe
+# requests are routed to them by `auctions.routers`.
+PSQL_REPLICA_HOSTS = config('PSQL_REPLICA_HOSTS', default='', cast=Csv())
+
+for num, host in enumerate(PSQL_REPLICA_HOSTS, 1):
+    DATABASES[f'replica_{num}'] = {**DATABASES['default'], 'HOST': host,
+        'TEST': {'MIRROR': 'default'}}
+
+DATABASE_ROUTERS = ['auctions.routers.ReplicaRouter']
+
+# Options of `auctions.routers.ReplicaMiddleware`: replica aliases, the
+# replication lag in seconds above which a replica isn't read, how often
+# lag is checked, and seconds a user reads from the primary after a write.
+AUCTION_DB_ROUTING = {
+    'REPLICAS': [f'replica_{num}'
+        for num in range(1, len(PSQL_REPLICA_HOSTS) + 1)],
+    'MAX_LAG': 5,
+    'CHECK_INTERVAL': 5,
+    'PIN_SECONDS': 10,
+}
+
+# Cache and listing events broker
+# Local memory by default (development, tests), Redis if `REDIS_URL` is set.
+
+REDIS_URL = config('REDIS_URL', default='')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
     }
+    AUCTION_EVENTS = {
+        'BACKEND': 'auctions.events.RedisBroker',
+        'LOCATION': REDIS_URL,
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+    AUCTION_EVENTS = {
+        'BACKEND': 'auctions.events.InProcessBroker',
+    }
+
+# Rates of bid and write throttles shared by pages and the API, see
+# `auctions.throttling`. A scope without a rate isn't limited.
+AUCTION_THROTTLE_RATES = {
+    'bids_user': '10/min',
+    'bids_listing': '10/s',
+    'writes_user': '60/min',
+    'writes_ip': '300/min',
+}
+AUCTION_THROTTLE_PROXIES = config('THROTTLE_PROXIES', default=0, cast=int)
+
+# Facets of search results, see `auctions.facets`: edges of price buckets,
+# and facets of queries requested `POPULAR_HITS` times within
+# `CACHE_TIMEOUT` seconds are cached for as long.
+AUCTION_SEARCH_FACETS = {
+    'PRICE_BUCKETS': [10, 50, 100, 500, 1000],
+    'POPULAR_HITS': 3,
+    'CACHE_TIMEOUT': 60,
 }
 
+# Request metrics of `auctions.instrumentation.RequestMetricsMiddleware`:
+# a share of sampled requests, budgets of queries and milliseconds, and
+# whether to send the `Server-Timing` header.
+AUCTION_REQUEST_METRICS = {
+    'SAMPLE_RATE': config('METRICS_SAMPLE_RATE', default=1.0 if DEBUG else 0.1,
+        cast=float),
+    'QUERY_BUDGET': 30,
+    'TIME_BUDGET': 500,
+    'HEADER': True,
+}
+
+# A bearer token of Prometheus scraping `/metrics`. Without it metrics are
+# shown to staff only.
+AUCTION_METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
 AUTH_USER_MODEL = 'account.User'
 
 # Password validation
@@ -133,6 +244,11 @@ USE_TZ = True
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static'),]
+STATICFILES_FINDERS = [
+    'django.contrib.staticfiles.finders.FileSystemFinder',
+    'django.contrib.staticfiles.finders.AppDirectoriesFinder',
+    'graphs.finders.PlotlyJSFinder',
+]
 
 # WhiteNoise settings
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
@@ -147,7 +263,7 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_RENDERER_CLASSES': (
-        'rest_framework.renderers.JSONRenderer',
+        'auctions_api.renderers.ORJSONRenderer',
     ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework.authentication.TokenAuthentication',
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class GraphsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'graphs'
+
+    def ready(self):
+        from . import signals
@@ -0,0 +1,35 @@
+import os
+
+import plotly
+from django.contrib.staticfiles.finders import BaseFinder
+from django.core.files.storage import FileSystemStorage
+
+
+class PlotlyJSFinder(BaseFinder):
+    """A static files finder of the plotly.js bundle shipped with the
+    installed `plotly` package. Serves it as `graphs/plotly.min.js`, so it
+    is hashed and cached by the static files storage like other assets and
+    always matches the package version.
+    """
+
+    path = 'graphs/plotly.min.js'
+    source = 'plotly.min.js'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        location = os.path.join(
+            os.path.dirname(plotly.__file__), 'package_data')
+        self.storage = FileSystemStorage(location=location)
+        self.storage.prefix = os.path.dirname(self.path)
+
+    def check(self, **kwargs):
+        return []
+
+    def find(self, path, all=False):
+        if path != self.path:
+            return []
+        match = self.storage.path(self.source)
+        return [match] if all else match
+
+    def list(self, ignore_patterns):
+        yield self.source, self.storage
@@ -0,0 +1,25 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from auctions.models import Category, Listing
+from auctions.signals import listings_created
+from .views import CATEGORY_ANALYTICS_CACHE_KEY
+
+
+@receiver(post_save, sender=Listing)
+@receiver(post_delete, sender=Listing)
+@receiver(listings_created, sender=Listing)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_analytics(sender, **kwargs):
+    """Drop cached category analytics when listings are created (also in
+    bulk), changed (e.g. moved to another category) or deleted, or a
+    category changes.
+    Bids don't save listings, so they don't invalidate the cache.
+    The cache is dropped on commit, so a concurrent request can't cache
+    analytics read before the change is committed.
+    """
+
+    transaction.on_commit(lambda: cache.delete(CATEGORY_ANALYTICS_CACHE_KEY))
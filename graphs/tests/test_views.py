@@ -0,0 +1,85 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from auctions.models import Category, Listing
+from ..views import CATEGORY_ANALYTICS_CACHE_KEY
+
+User = get_user_model()
+
+
+class TestCategoryAnalyticsView(TestCase):
+    """A test case for Category Analytics View."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='Tester')
+        cls.categories = [Category.objects.create(
+            name=f'Cat {num}', slug=f'cat-{num}') for num in range(3)]
+
+        for listing in range(6):
+            cls.create_listing(listing, cls.categories[listing % 2])
+
+    @classmethod
+    def create_listing(cls, num, category):
+        return Listing.objects.create(
+            category = category,
+            user = cls.user,
+            name = f'Listing {num}',
+            slug = f'listing-{num}',
+            description = f'A description for test {num}.',
+            start_bid = num + 1)
+
+    def setUp(self):
+        cache.clear()
+        self.location = reverse('graphs:cat_graph')
+        self.client.force_login(self.user)
+
+    def test_view_uses_correct_template(self):
+        resp = self.client.get(self.location)
+        self.assertTemplateUsed(resp, 'graphs/category_analytics.html')
+
+    def test_graph_specs_count_listings_per_category(self):
+        resp = self.client.get(self.location)
+        bar = resp.context['bar']['data'][0]
+        self.assertEqual(bar['x'], ['Cat 0', 'Cat 1', 'Cat 2'])
+        self.assertEqual(bar['y'], [3, 3, 0])
+
+    def test_plotly_js_is_linked_not_embedded(self):
+        resp = self.client.get(self.location)
+        self.assertContains(resp, 'graphs/plotly.min.', count=1)
+        self.assertLess(len(resp.content), 100_000)
+
+    def test_aggregate_runs_once_and_is_cached(self):
+        # Session and user queries, then one aggregate query.
+        with self.assertNumQueries(3):
+            self.client.get(self.location)
+        with self.assertNumQueries(2):
+            self.client.get(self.location)
+
+    def test_new_listing_invalidates_cache(self):
+        self.client.get(self.location)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_listing(6, self.categories[2])
+        resp = self.client.get(self.location)
+        self.assertEqual(resp.context['bar']['data'][0]['y'], [3, 3, 1])
+
+    def test_category_change_invalidates_cache(self):
+        self.client.get(self.location)
+        listing = Listing.objects.get(slug='listing-0')
+        listing.category = self.categories[2]
+        with self.captureOnCommitCallbacks(execute=True):
+            listing.save()
+        resp = self.client.get(self.location)
+        self.assertEqual(resp.context['bar']['data'][0]['y'], [2, 3, 1])
+
+    def test_cache_is_invalidated_on_commit(self):
+        self.client.get(self.location)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.create_listing(6, self.categories[2])
+            self.client.get(self.location)
+        self.assertIsNotNone(cache.get(CATEGORY_ANALYTICS_CACHE_KEY))
+        for callback in callbacks:
+            callback()
+        self.assertIsNone(cache.get(CATEGORY_ANALYTICS_CACHE_KEY))
@@ -1,14 +1,19 @@
-from django.shortcuts import render
+import json
+
+from django.core.cache import cache
 from django.views.generic import ListView
 from django.db.models import Count
 
 import plotly.graph_objects as go
-import plotly.io as pio
-from plotly.subplots import make_subplots
 
+from auctions.instrumentation import record_cache
 from auctions.models import Category
 
 
+CATEGORY_ANALYTICS_CACHE_KEY = 'graphs:category_analytics'
+CATEGORY_ANALYTICS_CACHE_TIMEOUT = 60 * 10
+
+
 class Graph:
     """A class to create analytics using Plotly graphs."""
     def __init__(self,
@@ -21,19 +26,23 @@ class Graph:
         self.labels = labels
         self.values = values
 
-    def get_graph_html(self, fig):
+    def get_graph_spec(self, fig):
+        """Return a figure as a JSON compatible spec (`data` and `layout`)
+        to be drawn by plotly.js on the client.
+        """
+
         fig.update_layout(
             paper_bgcolor='rgba(0,0,0,0)',
             title_text=self.title,
             title_x=0.5)
-        graph:str = pio.to_html(fig, include_plotlyjs=True, full_html=True)
-        return graph
+        spec:dict = json.loads(fig.to_json())
+        return spec
 
     def make_bar_graph(self):
         fig = go.Figure(data=[
             go.Bar(x=self.labels, y=self.values, name=self.name)
         ])
-        return self.get_graph_html(fig)
+        return self.get_graph_spec(fig)
 
     def make_pie_graph(self):
         fig = go.Figure(data=[
@@ -43,10 +52,14 @@ class Graph:
         ])
         if self.name:
             fig.update_traces(hoverinfo='label+value+name')
-        return self.get_graph_html(fig)
+        return self.get_graph_spec(fig)
 
 
 class CategoryAnalyticsView(ListView):
+    """Render analytics of listings per category. Graph specs are cached
+    and invalidated on listing and category changes (see `signals`).
+    """
+
     model = Category
     template_name = 'graphs/category_analytics.html'
     context_object_name = 'cat_graph'
@@ -58,16 +71,32 @@ class CategoryAnalyticsView(ListView):
         return qs
 
     def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        graphs = self.get_graph()
+        graphs = cache.get(CATEGORY_ANALYTICS_CACHE_KEY)
+        record_cache(hit=graphs is not None)
+        if graphs is None:
+            graphs = self.get_graph()
+            cache.set(CATEGORY_ANALYTICS_CACHE_KEY, graphs,
+                CATEGORY_ANALYTICS_CACHE_TIMEOUT)
+
+        context = super().get_context_data(
+            object_list=graphs['categories'], **kwargs)
         context['bar'] = graphs['bar']
         context['pie'] = graphs['pie']
         return context
 
     def get_graph(self):
+        """Aggregate listings per category with one query and return graph
+        specs with category names.
+        """
+
         title = 'Number of listings per category'
-        categories = tuple(cat.name for cat in self.get_queryset())
-        listings_count = tuple(cat.listings_count for cat in self.get_queryset())
+        rows = tuple(self.get_queryset().values_list('name', 'listings_count'))
+        categories = tuple(name for name, _ in rows)
+        listings_count = tuple(count for _, count in rows)
         name = 'listings'
         graph = Graph(title, categories, listings_count, name)
-        return {'bar': graph.make_bar_graph(), 'pie': graph.make_pie_graph()}
+        return {
+            'categories': categories,
+            'bar': graph.make_bar_graph(),
+            'pie': graph.make_pie_graph(),
+        }
@@ -0,0 +1,28 @@
+// Keep the current bid of a listing page up to date from its event stream.
+(function () {
+    const curBid = document.querySelector('.cur-bid[data-events-url]');
+    if (!curBid || !window.EventSource) {
+        return;
+    }
+
+    const source = new EventSource(curBid.dataset.eventsUrl);
+
+    function showBid(event) {
+        const state = JSON.parse(event.data);
+        if (!state.bid_count) {
+            return;
+        }
+        const noun = state.bid_count === 1 ? 'bid' : 'bids';
+        curBid.innerHTML =
+            '<div>Current bid: <span id="price"></span></div><div></div>';
+        curBid.querySelector('#price').textContent = 'US $' + state.current_bid;
+        curBid.lastChild.textContent = state.bid_count + ' ' + noun;
+    }
+
+    source.addEventListener('listing', showBid);
+    source.addEventListener('bid', showBid);
+    source.addEventListener('closed', function () {
+        source.close();
+        window.location.reload();
+    });
+})();